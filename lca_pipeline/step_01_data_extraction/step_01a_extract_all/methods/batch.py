@@ -0,0 +1,154 @@
+import os
+import time
+import multiprocessing as mp
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .helpers_io import sanitize_filename
+from .json_io import read_json, write_json
+
+# =================================================================================================================================
+# BATCH EXTRACTION OF SEVERAL IFC MODELS
+# =================================================================================================================================
+
+# Extracts a whole portfolio of IFC models in parallel worker processes (one model per worker).
+# Each model gets its own namespaced output directory:
+#   <output_directory>/<model>/step_01_data_extraction/step_01a_extract_all/
+# and a combined batch_summary.json is written to <output_directory>.
+# The CPU cores are split between the models, i.e. each model runs its BREP pool with cpu_count // workers processes.
+
+BATCH_SUMMARY_FILENAME = "batch_summary.json"
+MODEL_OUTPUT_SUBDIRECTORY = Path("step_01_data_extraction/step_01a_extract_all")
+
+
+# Returns the IFC files of a batch source
+# The source is either a directory (all *.ifc files in it) or a manifest file with one IFC path per line
+# (.txt, lines starting with "#" are ignored) or a list of paths (.json / .yaml)
+def collect_ifc_files(source):
+    source = Path(source)
+    if source.is_dir():
+        return sorted(source.glob("*.ifc"))
+
+    if not source.exists():
+        raise FileNotFoundError(f"Batch source '{source}' does not exist.")
+
+    if source.suffix.lower() == ".json":
+        entries = read_json(source)
+    elif source.suffix.lower() in (".yaml", ".yml"):
+        import yaml
+        with open(source, "r", encoding="utf-8") as f:
+            entries = yaml.safe_load(f)
+    else:
+        with open(source, "r", encoding="utf-8") as f:
+            entries = [line.strip() for line in f if line.strip() and not line.strip().startswith("#")]
+
+    # Relative paths in a manifest are relative to the manifest itself
+    files = []
+    for entry in entries or []:
+        path = Path(entry)
+        if not path.is_absolute() and not path.exists():
+            path = source.parent / path
+        files.append(path)
+    return files
+
+
+# Unique output namespace per model (file stem, suffixed if two models have the same name)
+def model_namespaces(ifc_files):
+    namespaces = []
+    used = {}
+    for ifc_file in ifc_files:
+        name = sanitize_filename(Path(ifc_file).stem)
+        if name in used:
+            used[name] += 1
+            name = f"{name}_{used[name]}"
+        else:
+            used[name] = 0
+        namespaces.append(name)
+    return namespaces
+
+
+# Runs in a batch worker process
+def _extract_batch_model(ifc_file, output_directory, master_config, entity_config, brep_workers):
+    from .extract_model import extract_model
+    try:
+        seconds = extract_model(ifc_file, output_directory, master_config, entity_config, brep_workers)
+        return {"Status": "ok", "Seconds": round(seconds, 2)}
+    except Exception as e:
+        return {"Status": "error", "Error": str(e)}
+
+
+# Reads the element counters of an extracted model for the batch summary
+def _model_counters(output_directory):
+    metadata_path = Path(output_directory) / "metadata_step_01a.json"
+    if not metadata_path.exists():
+        return {}
+    metadata = read_json(metadata_path)
+    module = metadata.get("Module 01: Data Extraction", {}).get("Module 01a: Extract All Elements", {})
+    return {
+        "IFC Project Name": metadata.get("IFC Project Name"),
+        "Building Elements without Childern": module.get("Building Elements without Childern"),
+        "Building Elements with Childern": module.get("Building Elements with Childern (Disregarded for inference)"),
+        "BREP Timeouts": len(module.get("BREP Timeouts", [])),
+        "BREP Worker Crashes": len(module.get("BREP Worker Crashes", []))
+    }
+
+
+def run_batch(source, output_directory, master_config, entity_config, workers=0):
+
+    start_time = time.time()
+
+    ifc_files = collect_ifc_files(source)
+    if not ifc_files:
+        raise FileNotFoundError(f"No IFC files found in batch source '{source}'.")
+
+    # Split the cores between the models running in parallel
+    cpu_count = os.cpu_count() or 1
+    workers = workers if workers and workers > 0 else min(len(ifc_files), cpu_count)
+    workers = min(workers, len(ifc_files))
+    brep_workers = master_config.get("extraction_config", {}).get("brep_workers", 0)
+    if not brep_workers:
+        brep_workers = max(1, cpu_count // workers)
+
+    print(f"Batch extraction of {len(ifc_files)} IFC models with {workers} parallel models, {brep_workers} BREP workers each.")
+
+    namespaces = model_namespaces(ifc_files)
+    results = {}
+
+    # "spawn" gives every model a clean process (the BREP pool inside may fork again)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as executor:
+        futures = {}
+        for ifc_file, namespace in zip(ifc_files, namespaces):
+            model_output_directory = Path(output_directory) / namespace / MODEL_OUTPUT_SUBDIRECTORY
+            future = executor.submit(
+                _extract_batch_model, str(ifc_file), str(model_output_directory),
+                master_config, entity_config, brep_workers
+            )
+            futures[future] = (ifc_file, namespace, model_output_directory)
+
+        for future in as_completed(futures):
+            ifc_file, namespace, model_output_directory = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"Status": "error", "Error": str(e)}  # Worker process died
+            result["IFC File"] = str(ifc_file)
+            result["Output Directory"] = str(model_output_directory)
+            result.update(_model_counters(model_output_directory))
+            results[namespace] = result
+            print(f"[{result['Status'].upper()}] {namespace}")
+
+    # Combined run summary
+    summary = {
+        "Models": len(ifc_files),
+        "Succeeded": sum(1 for result in results.values() if result["Status"] == "ok"),
+        "Failed": sum(1 for result in results.values() if result["Status"] != "ok"),
+        "Parallel Models": workers,
+        "BREP Workers per Model": brep_workers,
+        "Total Time [s]": round(time.time() - start_time, 2),
+        "Results": {namespace: results[namespace] for namespace in namespaces if namespace in results}
+    }
+    os.makedirs(output_directory, exist_ok=True)
+    summary_path = Path(output_directory) / BATCH_SUMMARY_FILENAME
+    write_json(summary, summary_path, "report")
+
+    print(f"Batch extraction finished in {summary['Total Time [s]']:.2f} seconds ({summary['Succeeded']}/{summary['Models']} models).")
+    return summary
@@ -0,0 +1,109 @@
+import time
+from pathlib import Path
+from .extractor import extractor
+from .helpers_store import export_json_tree, store_path
+from .helpers_io import load_ifc_file
+from .helpers_geometry import tessellation_settings
+from . import helpers_snapshot as snap
+from .helpers_profiler import ExtractionProfiler
+
+
+# Runs the full step 01a extraction for one IFC model into the given output directory
+# (Elements/, Compositions/, BoQ, metadata and manifests are written below output_directory)
+# brep_workers overrides the configured number of BREP workers (used by the batch mode)
+def extract_model(ifc_input_file, output_directory, master_config, entity_config, brep_workers=None):
+
+    start_time = time.time()
+
+    # Output paths
+    out_directory_boq = Path(output_directory)
+    out_directory_compositions = out_directory_boq / "Compositions"
+    out_directory_elements = out_directory_boq / "Elements"
+
+    # Read geometry settings
+    extraction_config = master_config.get("extraction_config", {})
+    brep_toggle = extraction_config.get("brep_enabled", True)
+    brep_timeout = extraction_config.get("brep_timeout", 30)
+    if brep_workers is None:
+        brep_workers = extraction_config.get("brep_workers", 0)
+    brep_max_tasks = extraction_config.get("brep_max_tasks_per_worker", 200)
+    analytic_toggle = extraction_config.get("analytic_geometry", True)
+    brep_mode = extraction_config.get("brep_mode", "full")
+    brep_obb_entities = extraction_config.get("brep_obb_entities", [])
+    incremental = extraction_config.get("incremental", False)
+    output_format = extraction_config.get("output_format", "json")
+    export_tree = extraction_config.get("export_json_tree", True)
+    entity_bool = extraction_config.get("include_all_entities", True)
+    full_composition_extraction = extraction_config.get("full_composition_extraction", False)
+    memory_config = extraction_config.get("memory", {}) or {}
+    chunk_size = memory_config.get("chunk_size", 0)
+    max_rss_mb = memory_config.get("max_rss_mb", 0)
+    tessellation = tessellation_settings(
+        extraction_config.get("tessellation_profile", "auto"),
+        extraction_config.get("complexity_metrics", True),
+        extraction_config.get("tessellation_profiles")
+    )
+
+    # Optional extraction profiler (see helpers_profiler.py)
+    profiling_config = extraction_config.get("profiling", {}) or {}
+    profiler = ExtractionProfiler(
+        profiling_config.get("enabled", False),
+        profiling_config.get("top_n", 20),
+        profiling_config.get("python_profiler", "none")
+    )
+    profiler.start()
+
+    # Optional snapshot of the parsed model, keyed by the IFC file hash (see helpers_snapshot.py)
+    # Only valid for the same geometry settings, as these change the data sheets
+    snapshot_config = extraction_config.get("model_snapshot", {}) or {}
+    snapshot = None
+    if snapshot_config.get("enabled", False):
+        snapshot_directory = snapshot_config.get("directory", "data/pipeline/cache/model_snapshots")
+        snapshot_settings = {
+            "BREP Enabled": brep_toggle,
+            "BREP Timeout": brep_timeout,
+            "Analytic Geometry": analytic_toggle,
+            "BREP Mode": brep_mode,
+            "BREP OBB Entities": sorted(brep_obb_entities or []),
+            "Tessellation": tessellation,
+            "Full Composition Extraction": full_composition_extraction
+        }
+        snapshot = snap.load_snapshot(snapshot_directory, snap.file_sha256(ifc_input_file), snapshot_settings)
+
+    # Load the IFC file, unless all selected elements can be served from the snapshot
+    # OCC is only started if BREP geometry is computed
+    model = None
+    if snap.snapshot_covers_selection(snapshot, entity_config, entity_bool):
+        print("All selected elements found in the model snapshot, the IFC file is not parsed.")
+    else:
+        with profiler.phase("IFC Parsing"):
+            model = load_ifc_file(str(ifc_input_file), use_occ=brep_toggle)
+
+    # Extract element data and save each IfcBuildingElement separately
+    extractor(
+        brep_toggle, brep_timeout, str(ifc_input_file),
+        model, out_directory_elements, out_directory_compositions,
+        out_directory_boq, entity_config, entity_bool,
+        brep_workers, brep_max_tasks, analytic_toggle,
+        brep_mode, brep_obb_entities, incremental,
+        output_format, tessellation, snapshot,
+        chunk_size, max_rss_mb, profiler,
+        full_composition_extraction
+        )
+
+    # Store the newly extracted elements in the snapshot
+    if snapshot is not None and model is not None:
+        snap.save_snapshot(snapshot_directory, snapshot)
+    elif snapshot is not None:
+        snapshot["Sheets"].close()
+
+    # The BoQ is written during extraction. With JSONL, export the per-element JSON tree for the following steps
+    if output_format == "jsonl" and export_tree:
+        with profiler.phase("JSON Tree Export"):
+            export_json_tree(store_path(out_directory_boq), out_directory_elements, out_directory_compositions)
+
+    # Write the extraction profile next to metadata_step_01a.json (only if profiling is enabled)
+    profiler.stop(out_directory_boq)
+    profiler.save(out_directory_boq)
+
+    return time.time() - start_time
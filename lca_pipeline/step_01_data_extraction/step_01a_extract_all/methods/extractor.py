@@ -1,6 +1,4 @@
 import os
-import json
-import concurrent.futures
 from . import helpers_units as unit
 from . import helpers_io as inout
 from . import helpers_metadata as meta
@@ -10,158 +8,453 @@ from . import helpers_psets as prop
 from . import helpers_relationships as rela
 from . import helpers_location as loc
 from . import helpers_file_metadata as file_meta
+from . import helpers_index as idx
+from . import helpers_type_cache as type_cache_helpers
+from . import helpers_manifest as manifest
+from . import helpers_store as store
+from .extractor_boq import boq_row, BoqWriter, read_boq
+from .helpers_memory import MemoryMonitor
+from .geometry_runner import GeometryRunner
+from .helpers_profiler import NO_PROFILER
+from .json_io import write_json
 
 
-def extractor(brep_toggle, brep_timeout, ifc_input_file, model, out_directory_elements, out_directory_compositions, out_directory_boq, entity_config, entity_bool=True):
+# Creates the data sheet of an element
+# BREP timeouts and worker crashes are appended to the given lists
+# Each helper family is timed by the extraction profiler (no-op if profiling is disabled, see helpers_profiler.py)
+def element_sheet(element, brep_outcome, element_ifc_quantities, rel_index, type_cache, spatial_index, lc_factor, brep_timeouts, brep_crashes, profiler=NO_PROFILER):
+
+    # Initialize the data dictionary for each element
+    element_data = {}
+    global_id = meta.globalid(element)
+
+    # --- ELEMENT METADATA ---
+    with profiler.family(global_id, "Metadata"):
+        metadata = {}
+        metadata["Name"] = meta.name(element)
+        metadata["Description"] = meta.description(element)
+        metadata["UID"] = meta.uid(element)
+        metadata["GlobalId"] = global_id
+        metadata["Type"] = meta.entity(element)
+        metadata["ObjectType"] = meta.objecttype(element)
+        metadata["Classification"] = meta.extract_classification_info(element, rel_index, type_cache)
+        decomposes, is_decomposed_by = meta.extract_hierarchy(element, rel_index)
+        metadata["Decomposes"] = decomposes
+        metadata["Is Decomposed By"] = is_decomposed_by
+        element_data["Element Metadata"] = metadata
+    profiler.element(global_id, metadata["Name"], metadata["Type"])
+
+    # --- MATERIAL DATA ---
+    with profiler.family(global_id, "Materials"):
+        material_data = mat.extract_material_associations(element, rel_index, lc_factor, type_cache)
+        element_data["Element Material Data"] = material_data
+
+    # --- GEOMETRY DATA ---
+    geometry_data = {}
+    geometry_data["Quantities (IFC)"] = element_ifc_quantities
+    geometry_data["Geometric Representation"] = geo.representation(element)
+
+    # Merge analytic or BREP-related geometry data (BREP computed by the geometry pool with timeout specifications)
+    if brep_outcome is not None:
+        if brep_outcome["Status"] == "ok":
+            geometry_data.update(brep_outcome["Geometry"])
+        elif brep_outcome["Status"] == "timeout":
+            print(f"[TIMEOUT] Skipping BREP geometry for element {meta.name(element)}")
+            brep_timeouts.append({
+                "Name": meta.name(element),
+                "GlobalId": global_id
+            })
+        elif brep_outcome["Status"] == "crashed":
+            print(f"[CRASH] BREP worker crashed on element {meta.name(element)}")
+            brep_crashes.append({
+                "Name": meta.name(element),
+                "GlobalId": global_id
+            })
+    element_data["Element Geometry Data"] = geometry_data
+
+    # --- PROPERTY SETS ---
+    with profiler.family(global_id, "Psets"):
+        psets_data = {}
+        psets_data["Psets Element"] = prop.extract_element_psets(element, rel_index)
+        psets_data["Psets Object Type"] = prop.extract_type_psets(element, rel_index, type_cache)
+        element_data["Element Property Sets"] = psets_data
+
+    # --- RELATIONSHIPS ---
+    with profiler.family(global_id, "Relationships"):
+        relationships_data = {}
+        relationships_data["Nests"] = rela.nests(element, rel_index)
+        relationships_data["Is Nested By"] = rela.is_nested_by(element, rel_index)
+        relationships_data["Covers"] = rela.covers(element, rel_index)
+        relationships_data["Is Covered By"] = rela.is_covered_by(element, rel_index)
+        relationships_data["Has Openings"] = rela.openings(element, rel_index)
+        relationships_data["Assigned Groups"] = rela.group_assignments(element, rel_index)
+        element_data["Element Relationships"] = relationships_data
+
+    # --- LOCATION ---
+    with profiler.family(global_id, "Location"):
+        location_data = {}
+        location_data["Storeys Map"] = inout.model_context_reference("Storeys Map")
+        location_data["Element Located in Storey"] = loc.element_storey_name(element, rel_index, spatial_index)
+        location_data["Spatial Relationship"] = loc.extract_full_spatial_hierarchy(element, rel_index, spatial_index)
+        element_data["Element Location"] = location_data
+
+    return element_data
+
+
+# Creates the lightweight data sheet of a composition parent (identity and child references only)
+# Composition parents are not inferred, their parts are extracted as individual elements
+def composition_stub(element, rel_index, type_cache, profiler=NO_PROFILER):
+    global_id = meta.globalid(element)
+    with profiler.family(global_id, "Metadata"):
+        metadata = {}
+        metadata["Name"] = meta.name(element)
+        metadata["Description"] = meta.description(element)
+        metadata["UID"] = meta.uid(element)
+        metadata["GlobalId"] = global_id
+        metadata["Type"] = meta.entity(element)
+        metadata["ObjectType"] = meta.objecttype(element)
+        metadata["Classification"] = meta.extract_classification_info(element, rel_index, type_cache)
+        decomposes, is_decomposed_by = meta.extract_hierarchy(element, rel_index)
+        metadata["Decomposes"] = decomposes
+        metadata["Is Decomposed By"] = is_decomposed_by
+    profiler.element(global_id, metadata["Name"], metadata["Type"])
+    return {"Element Metadata": metadata, "Extraction": "Composition Stub"}
+
+
+def extractor(brep_toggle, brep_timeout, ifc_input_file, model, out_directory_elements, out_directory_compositions, out_directory_boq, entity_config, entity_bool=True, brep_workers=None, brep_max_tasks=200, analytic_toggle=True, brep_mode="full", brep_obb_entities=None, incremental=False, output_format="json", tessellation=None, snapshot=None, chunk_size=0, max_rss_mb=0, profiler=NO_PROFILER, full_composition_extraction=False):
 
     # Initialize counters for single and composition elements & bill of quantities rows
     count_single_elements = 0
     count_composition_elements = 0
     count_skipped_elements = 0
+    count_composition_stubs = 0
     brep_timeouts = []
+    brep_crashes = []
+
+    # Peak memory per extraction phase (see helpers_memory.py)
+    memory = MemoryMonitor(max_rss_mb)
 
-    # Check IFC schema version to specify the correct entity type
-    schema_version = model.schema_name
-    entity_type = "IfcBuiltElement" if schema_version.startswith("IFC4.3") else "IfcBuildingElement"
-
-    # Load all IfcBuildingElements from IFC model
-    elements = model.get_entities_by_type(entity_type)
-
-    # Extract global model values before looping element
-    formatted_units, lc_factor = unit.model_units(model)
-    sorted_storey_map = loc.sorted_storey_map(model, lc_factor)
-    hierarchy_tree, parent_lookup = loc.extract_spatial_hierarchy(model, lc_factor)
-    classification_relationships = model.get_entities_by_type("IfcRelAssociatesClassification")
-    property_relationships = model.get_entities_by_type("IfcRelDefinesByProperties")
-    type_relationships = model.get_entities_by_type("IfcRelDefinesByType")
-    material_relationships = model.get_entities_by_type("IfcRelAssociatesMaterial")
-    spatial_relationships = model.get_entities_by_type("IfcRelContainedInSpatialStructure")
-    aggregates_relationships = model.get_entities_by_type("IfcRelAggregates")
-    nesting_relationships = model.get_entities_by_type("IfcRelNests")
-    covering_relationships = model.get_entities_by_type("IfcRelCoversBldgElements")
-    void_relationships = model.get_entities_by_type("IfcRelVoidsElement")
-    group_relationships = model.get_entities_by_type("IfcRelAssignsToGroup")
-
-    # Get File Metadata for overview sheet
-    file_metadata = file_meta.get_file_metadata(ifc_input_file, model, formatted_units)
+    # Data sheets of the model snapshot (see helpers_snapshot.py), these elements are not extracted again
+    snapshot_sheets = snapshot["Sheets"] if snapshot is not None else {}
+    count_snapshot_elements = 0
+    rel_index = None
+    spatial_index = None
+    lc_factor = 1
+    angle_factor = 1.0
+
+    if model is not None:
+        # Check IFC schema version to specify the correct entity type
+        schema_version = model.schema_name
+        entity_type = "IfcBuiltElement" if schema_version.startswith("IFC4.3") else "IfcBuildingElement"
+
+        # Load all IfcBuildingElements from IFC model
+        elements = model.get_entities_by_type(entity_type)
+
+        # Extract global model values before looping element
+        formatted_units, lc_factor = unit.model_units(model)
+        angle_factor = unit.plane_angle_factor(model)
+        sorted_storey_map = loc.sorted_storey_map(model, lc_factor)
+
+        with memory.phase("Model Index"):
+            # One pass over all relationship entities, so that each helper only looks up the relationships of its element
+            with profiler.phase("Relationship Index"):
+                rel_index = idx.build_relationship_index(model)
+
+            # Spatial hierarchy and spatial index (container, storey and ancestor path per element, memoized)
+            with profiler.phase("Spatial Index"):
+                hierarchy_tree, parent_lookup = loc.extract_spatial_hierarchy(model, rel_index, lc_factor)
+                spatial_index = loc.build_spatial_index(hierarchy_tree, parent_lookup)
+
+        # Get File Metadata for overview sheet
+        file_metadata = file_meta.get_file_metadata(ifc_input_file, model, formatted_units)
+
+        # (GlobalId, IFC entity, element) of all building elements in model order
+        catalogue = [(meta.globalid(element), meta.entity(element), element) for element in elements]
+
+        if snapshot is not None:
+            snapshot["Model"] = {
+                "Units": formatted_units,
+                "Storeys Map": sorted_storey_map,
+                "Spatial Hierarchy": hierarchy_tree,
+                "File Metadata": dict(file_metadata),
+                "Elements": {global_id: {"Type": element_type} for global_id, element_type, _ in catalogue}
+            }
+    else:
+        # The IFC file was not loaded, all model-level data comes from the snapshot
+        snapshot_model = snapshot["Model"]
+        formatted_units = snapshot_model["Units"]
+        sorted_storey_map = snapshot_model["Storeys Map"]
+        hierarchy_tree = snapshot_model["Spatial Hierarchy"]
+        file_metadata = dict(snapshot_model["File Metadata"])
+        catalogue = [(global_id, entry["Type"], None) for global_id, entry in snapshot_model["Elements"].items()]
+
+    # Type psets, type materials and type classifications are extracted once per IfcTypeObject (filled on first access)
+    type_cache = type_cache_helpers.new_type_cache()
+
+    # Storeys, spatial hierarchy and units are written once to model_context.json instead of into every element
+    inout.save_model_context({
+        "Storeys Map": sorted_storey_map,
+        "Spatial Hierarchy": hierarchy_tree,
+        "Units": formatted_units
+    }, out_directory_boq)
 
     # Some IFC files have identical names for elements. Keep track of used names
     used_names = {}
 
-    # Iterate over all IfcBuildingElements
-    for element in elements:
-
-        # Get entity and skip based on config/1_extraction_config.yaml
-        element_type = meta.entity(element)
+    # Get entity and skip based on config/1_extraction_config.yaml
+    selected = []
+    for global_id, element_type, element in catalogue:
         if entity_bool == False:
             if not entity_config.get(element_type, False):
                 count_skipped_elements += 1
                 continue # Skip this element
+        selected.append((global_id, element_type, element))
 
-        try:
-            # === CREATE DATA SHEETS FOR EACH ELEMENT ===
-
-            # Initialize the data dictionary for each element
-            element_data = {}
-
-            # --- ELEMENT METADATA ---
-            metadata = {}
-            metadata["Name"] = meta.name(element)
-            metadata["Description"] = meta.description(element)
-            metadata["UID"] = meta.uid(element)
-            metadata["GlobalId"] = meta.globalid(element)
-            metadata["Type"] = meta.entity(element)
-            metadata["ObjectType"] = meta.objecttype(element)
-            metadata["Classification"] = meta.extract_classification_info(element, classification_relationships)
-            decomposes, is_decomposed_by = meta.extract_hierarchy(element, aggregates_relationships)
-            metadata["Decomposes"] = decomposes
-            metadata["Is Decomposed By"] = is_decomposed_by
-            element_data["Element Metadata"] = metadata
-
-            # --- MATERIAL DATA ---
-            material_data = mat.extract_material_associations(element, material_relationships, type_relationships, lc_factor)
-            element_data["Element Material Data"] = material_data
-
-            # --- GEOMETRY DATA ---
-            geometry_data = {}
-            geometry_data["Quantities (IFC)"] = geo.quantities_ifc(element, property_relationships, lc_factor)
-            geometry_data["Geometric Representation"] = geo.representation(element)
-
-            # Calculate BREP-related geometry data with boolean and timout specifications
-            if brep_toggle:
-                with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-                    future = executor.submit(geo.compute_brep_geometry_data, element, lc_factor)
-                    try:
-                        brep_result, obb_dimensions = future.result(brep_timeout)
-                        geometry_data.update(brep_result)
-                    except concurrent.futures.TimeoutError:
-                        print(f"[TIMEOUT] Skipping BREP geometry for element {meta.name(element)}")
-                        brep_timeouts.append({
-                            "Name": meta.name(element),
-                            "GlobalId": meta.globalid(element)
-                        })
-            element_data["Element Geometry Data"] = geometry_data
-
-            # --- PROPERTY SETS ---
-            psets_data = {}
-            psets_data["Psets Element"] = prop.extract_element_psets(element, property_relationships)
-            psets_data["Psets Object Type"] = prop.extract_type_psets(element, type_relationships)
-            element_data["Element Property Sets"] = psets_data
-                
-            # --- RELATIONSHIPS ---
-            relationships_data = {}
-            relationships_data["Nests"] = rela.nests(element, nesting_relationships)
-            relationships_data["Is Nested By"] = rela.is_nested_by(element, nesting_relationships)
-            relationships_data["Covers"] = rela.covers(element, covering_relationships)
-            relationships_data["Is Covered By"] = rela.is_covered_by(element, covering_relationships)
-            relationships_data["Has Openings"] = rela.openings(element, void_relationships)
-            relationships_data["Assigned Groups"] = rela.group_assignments(element, group_relationships)
-            element_data["Element Relationships"] = relationships_data
-
-            # --- LOCATION ---
-            location_data = {}
-            location_data["Storeys Map"] = sorted_storey_map
-            location_data["Element Located in Storey"] = loc.element_storey_name(element)
-            location_data["Spatial Relationship"] = loc.extract_full_spatial_hierarchy(element, spatial_relationships, parent_lookup, hierarchy_tree)
-            element_data["Element Location"] = location_data
-
-            # --- EXPORT ---
-            base_name = meta.name(element) or "Unnamed"
-
-            if base_name not in used_names:
-                used_names[base_name] = 0
-                final_name = base_name
-            else:
-                used_names[base_name] += 1
-                final_name = f"{base_name}_{used_names[base_name]}"
-
-
-            # Choose directory based on is_decompsed_by
-            if is_decomposed_by:
-                inout.save_individual_json(element_data, out_directory_compositions, final_name)
-                count_composition_elements += 1
-            else:     
-                inout.save_individual_json(element_data, out_directory_elements, final_name)
-                count_single_elements += 1
-
-        except Exception as e:
-            name = meta.name(element) or "Unnamed"
-            globalid = meta.globalid(element) or "No GlobalId"
-            print(f"Error processing element: Name='{name}', GlobalId='{globalid}'")
-            print(f"Exception: {e}")
+    # Content hash of every selected element for the extraction manifest (see helpers_manifest.py)
+    # The hashes walk the whole element graph, so they are only computed for incremental runs and the model snapshot
+    track_changes = incremental or snapshot is not None
+    element_hashes = {}
+    context_hash = None
+    if track_changes:
+        hash_memo = {}
+        with memory.phase("Content Hashes"), profiler.phase("Content Hashes"):
+            for global_id, _, element in selected:
+                if global_id in snapshot_sheets:
+                    element_hashes[global_id] = snapshot_sheets.content_hash(global_id)
+                else:
+                    element_hashes[global_id] = manifest.element_content_hash(element, rel_index, hash_memo)
+        hash_memo = None  # The hashes of shared sub-graphs are not needed anymore
+        # The composition mode is part of the context hash, switching it extracts the composition parents again
+        # So is the extractor code: a new version of the extractor extracts all elements again
+        context_hash = manifest.model_context_hash(
+            sorted_storey_map, hierarchy_tree, formatted_units, full_composition_extraction, manifest.extractor_code_hash()
+        )
+
+    # In incremental mode, compare against the previous run and only extract new or changed elements
+    previous_manifest = manifest.load_manifest(out_directory_boq) if incremental else None
+    if previous_manifest and previous_manifest.get("Output Format", "json") != output_format:
+        previous_manifest = None  # Output files of the previous run are in another format
+    previous_elements = previous_manifest.get("Elements", {}) if previous_manifest else {}
+    if track_changes:
+        new_ids, changed_ids, unchanged_ids, removed_ids = manifest.compare_manifest(element_hashes, previous_manifest, context_hash, out_directory_boq)
+    else:
+        new_ids, changed_ids, unchanged_ids, removed_ids = [global_id for global_id, _, _ in selected], [], [], []
+    changed_set = set(changed_ids)
+    unchanged_set = set(unchanged_ids)
+
+    manifest_elements = {global_id: previous_elements[global_id] for global_id in unchanged_ids}
+    for entry in manifest_elements.values():
+        if entry.get("Composition"):
+            count_composition_elements += 1
+        else:
+            count_single_elements += 1
+    selected = [entry for entry in selected if entry[0] not in unchanged_set]
+
+    # File names of unchanged and changed elements stay reserved, so new elements do not overwrite them
+    reserved_names = {previous_elements[global_id].get("Name") for global_id in unchanged_ids + changed_ids}
+
+    # JSONL output: element records are streamed into one append-only store and the BoQ rows are built in the same pass
+    # A full run starts a new store, an incremental run appends to the existing one
+    # (forked BREP workers inherit the open file, but never write to it)
+    element_store = None
+    if output_format == "jsonl":
+        element_store = store.ElementStore(store.store_path(out_directory_boq), truncate=not previous_manifest)
+
+    # BoQ rows are computed from the data sheets in memory and streamed into the BoQ file during extraction
+    # Rows of unchanged elements are taken over from the previous BoQ (or rebuilt from their stored data sheet)
+    previous_boq_rows = read_boq(out_directory_boq) if previous_manifest else {}
+    boq_writer = BoqWriter(out_directory_boq)
+    stored_records = None
+    for global_id in unchanged_ids:
+        if previous_elements[global_id].get("Composition"):
             continue
-    
+        row = previous_boq_rows.get(global_id)
+        if row is None:
+            if element_store is not None:
+                if stored_records is None:
+                    stored_records, _ = store.read_store(element_store.path)
+                data = stored_records.get(global_id, {}).get("Data")
+            else:
+                data = manifest.load_element_file(out_directory_boq, previous_elements[global_id])
+            row = boq_row(data) if data else None
+        if row is not None:
+            boq_writer.write(row)
+    previous_boq_rows = stored_records = None
+
+    # Delete outputs of removed and changed elements (changed ones are written again below)
+    # In the store, removed elements get a tombstone and changed elements are superseded by their new record
+    for global_id in removed_ids:
+        if element_store is not None:
+            element_store.delete(global_id)
+        else:
+            manifest.delete_element_file(out_directory_boq, previous_elements.get(global_id))
+    if element_store is None:
+        for global_id in changed_ids:
+            manifest.delete_element_file(out_directory_boq, previous_elements.get(global_id))
+
+    # Geometry phase (IFC quantities, analytic geometry, BREP in the geometry pool), see geometry_runner.py
+    geometry = GeometryRunner(
+        ifc_input_file, model, rel_index, lc_factor, angle_factor, brep_toggle, brep_timeout,
+        brep_workers, brep_max_tasks, analytic_toggle, brep_mode, brep_obb_entities, tessellation, max_rss_mb, profiler
+    )
+
+    # Memory-bounded mode: the geometry and the data sheets are processed in chunks of elements, and the geometry
+    # results of a chunk are dropped before the next one. max_rss_mb is a soft limit (see helpers_memory.py): if the RSS
+    # is above it after a chunk, the type object cache is cleared and the chunk size is halved.
+    chunk_size = chunk_size if chunk_size and chunk_size > 0 else max(len(selected), 1)
+    configured_chunk_size = chunk_size
+    chunk_start = 0
+
+    with geometry:
+        while chunk_start < len(selected):
+            chunk = selected[chunk_start:chunk_start + chunk_size]
+            chunk_start += len(chunk)
+
+            # Elements that have to be extracted from the model (position in chunk -> position in chunk_elements)
+            # Composition parents are detected up front and only get a stub (no geometry, psets, relationships or location)
+            chunk_elements = []
+            extraction_positions = {}
+            stub_positions = set()
+            for entry_position, (global_id, _, element) in enumerate(chunk):
+                if global_id in snapshot_sheets:
+                    continue
+                if not full_composition_extraction and meta.is_composition(element, rel_index):
+                    stub_positions.add(entry_position)
+                else:
+                    extraction_positions[entry_position] = len(chunk_elements)
+                    chunk_elements.append(element)
+
+            with memory.phase("Geometry"), profiler.phase("Geometry"):
+                ifc_quantities, brep_results = geometry.compute(chunk_elements)
+
+            with memory.phase("Data Sheets"), profiler.phase("Data Sheets"):
+                # Iterate over all selected IfcBuildingElements of the chunk
+                for entry_position, (global_id, element_type, element) in enumerate(chunk):
+
+                    try:
+                        # === CREATE DATA SHEETS FOR EACH ELEMENT ===
+                        # Elements of the model snapshot are not extracted again
+                        if global_id in snapshot_sheets:
+                            element_data = snapshot_sheets.data(global_id)
+                            is_composition = snapshot_sheets.composition(global_id)
+                            count_snapshot_elements += 1
+                        elif entry_position in stub_positions:
+                            element_data = composition_stub(element, rel_index, type_cache, profiler)
+                            is_composition = True
+                            count_composition_stubs += 1
+                            if snapshot is not None:
+                                snapshot_sheets.add(global_id, element_data, element_hashes[global_id], is_composition)
+                        else:
+                            position = extraction_positions[entry_position]
+                            element_data = element_sheet(
+                                element, brep_results[position], ifc_quantities[position],
+                                rel_index, type_cache, spatial_index, lc_factor, brep_timeouts, brep_crashes, profiler
+                            )
+                            is_composition = bool(element_data["Element Metadata"]["Is Decomposed By"])
+                            if snapshot is not None:
+                                snapshot_sheets.add(global_id, element_data, element_hashes[global_id], is_composition)
+
+                        # --- EXPORT ---
+                        base_name = element_data["Element Metadata"]["Name"] or "Unnamed"
+
+                        # Changed elements keep the file name of the previous run
+                        if global_id in changed_set and previous_elements[global_id].get("Name"):
+                            final_name = previous_elements[global_id]["Name"]
+                        else:
+                            final_name = None
+                            while final_name is None or final_name in reserved_names:
+                                if base_name not in used_names:
+                                    used_names[base_name] = 0
+                                    final_name = base_name
+                                else:
+                                    used_names[base_name] += 1
+                                    final_name = f"{base_name}_{used_names[base_name]}"
+
+
+                        # Choose directory based on is_decompsed_by
+                        with profiler.family(global_id, "Output"):
+                            if element_store is not None:
+                                element_store.write(global_id, final_name, is_composition, element_data)
+                                output_path = element_store.path
+                            elif is_composition:
+                                output_path = inout.save_individual_json(element_data, out_directory_compositions, final_name)
+                            else:     
+                                output_path = inout.save_individual_json(element_data, out_directory_elements, final_name)
+
+                            if is_composition:
+                                count_composition_elements += 1
+                            else:
+                                boq_writer.write(boq_row(element_data))
+                                count_single_elements += 1
+
+                        # Register the element in the extraction manifest
+                        manifest_elements[global_id] = {
+                            "Hash": element_hashes.get(global_id),
+                            "Name": final_name,
+                            "File": os.path.relpath(output_path, out_directory_boq),
+                            "Composition": is_composition
+                        }
+
+                    except Exception as e:
+                        name = (meta.name(element) if element is not None else None) or "Unnamed"
+                        print(f"Error processing element: Name='{name}', GlobalId='{global_id or 'No GlobalId'}'")
+                        print(f"Exception: {e}")
+                        continue
+
+            # Drop the geometry results of the chunk (the OCC shapes only exist in the BREP workers)
+            ifc_quantities = brep_results = chunk_elements = None
+            if memory.over_limit() and chunk_size > 1:
+                type_cache["Types"].clear()
+                chunk_size = max(1, chunk_size // 2)
+                print(f"[MEMORY] RSS above {max_rss_mb} MB, chunk size reduced to {chunk_size}.")
+
+    # Close the BoQ and the store (rewrite it if it holds more outdated than current records)
+    with profiler.phase("Output Finalization"):
+        boq_writer.close()
+        if element_store is not None:
+            element_store.close()
+            _, stale_records = store.read_store(element_store.path)
+            if stale_records > len(manifest_elements):
+                store.compact_store(element_store.path)
+
     # Add composition and skipped element counters to metadata
     file_metadata["Module 01: Data Extraction"] = {
         "Module 01a: Extract All Elements": {
             "Building Elements with Childern (Disregarded for inference)": count_composition_elements,
             "Building Elements without Childern": count_single_elements,
             "Skipped Elements due to Configuration": count_skipped_elements,
-            "BREP Timeouts": brep_timeouts
+            "Composition Parents Written as Stub": count_composition_stubs,
+            "BREP Timeouts": brep_timeouts,
+            "BREP Worker Crashes": brep_crashes,
+            "Geometry Cache": geometry.geometry_cache_stats,
+            "Type Object Cache": type_cache_helpers.type_cache_stats(type_cache),
+            "Elements with Analytic Geometry (OCC skipped)": geometry.analytic_count,
+            "Lazy BREP Mode": geometry.lazy_mode_report(),
+            "Tessellation": geometry.tessellation_report(),
+            "Memory": memory.report(configured_chunk_size, geometry.worker_peak_rss_mb, chunk_size),
+            "Model Snapshot": {
+                "Enabled": snapshot is not None,
+                "IFC File Parsed": model is not None,
+                "Elements from Snapshot": count_snapshot_elements
+            },
+            "Incremental Extraction": {
+                "Enabled": incremental,
+                "New Elements": len(new_ids),
+                "Changed Elements": len(changed_ids),
+                "Removed Elements": len(removed_ids),
+                "Unchanged Elements (skipped)": len(unchanged_ids)
+            }
         }
     }
 
     # Export the Metadata JSON file
     file_metadata_output_path = os.path.join(out_directory_boq, "metadata_step_01a.json")
-    with open(file_metadata_output_path, "w", encoding="utf-8") as jsonfile:
-        json.dump(file_metadata, jsonfile, indent=4)
\ No newline at end of file
+    write_json(file_metadata, file_metadata_output_path, "report")
+
+    # Export the extraction manifest and the changed set (used to limit the work of later stages)
+    # Without change tracking, the manifest of an earlier run no longer describes the output and is removed
+    if track_changes:
+        manifest.save_manifest(out_directory_boq, {"Model Context Hash": context_hash, "Output Format": output_format, "Elements": manifest_elements})
+        manifest.save_changed_elements(out_directory_boq, new_ids, changed_ids, removed_ids, len(unchanged_ids), manifest_elements)
+    else:
+        manifest.remove_manifest(out_directory_boq)
@@ -1,14 +1,110 @@
 from . import helpers_boq as boq
 import csv
 import os
-import json
+from .json_io import read_json
 
+BOQ_FILENAME = "BoQ_step_01a.csv"
+
+# Write buffer of the BoQ file (bytes)
+BOQ_BUFFER_SIZE = 1024 * 1024
+
+BOQ_FIELDNAMES = ["GlobalId", "Name", "Entity", "ObjectType", "Storey", "Length [m]", "Length Source", "Largest Surface Area [m^2]", "Area Source", "Volume [m^3]", "Volume Source"]
+
+
+# Builds the BoQ row of one element data sheet
+def boq_row(data):
+    element_metadata = data.get("Element Metadata", {})
+    geometry_data = data.get("Element Geometry Data", {})
+    psets_element = data.get("Element Property Sets", {}).get("Psets Element", {})
+
+    element_entity = element_metadata.get("Type")
+    ifc_quants_element = geometry_data.get("Quantities (IFC)", {})
+    element_quantities_compas = geometry_data.get("Quantities (COMPAS)", {})
+    volume_compas = element_quantities_compas.get("Net Volume")
+    element_quantities_analytic = geometry_data.get("Quantities (Analytic)", {})
+    obb_dimensions = geometry_data.get("Bounding Box Dimensions (OBB - local frame)", {})
+
+    # Calculate prioritized quantities & log sources
+    volume, area, length, volume_source, area_source, length_source = boq.extract_quantities(
+        volume_compas, element_entity, ifc_quants_element, psets_element, obb_dimensions,
+        element_quantities_analytic
+    )
+
+    return {
+        "GlobalId": element_metadata.get("GlobalId", "Unknown"),
+        "Name": element_metadata.get("Name", "Unknown"),
+        "Entity": element_entity,
+        "ObjectType": element_metadata.get("ObjectType", "Unknown"),
+        "Storey": data.get("Element Location", {}).get("Element Located in Storey", "Unknown"),
+        "Length [m]": length or 0,
+        "Length Source": length_source,
+        "Largest Surface Area [m^2]": area or 0,
+        "Area Source": area_source,
+        "Volume [m^3]": volume or 0,
+        "Volume Source": volume_source
+    }
+
+
+def boq_path(out_directory_boq):
+    return os.path.join(out_directory_boq, BOQ_FILENAME)
+
+
+class BoqWriter:
+    """
+    Buffered CSV writer for the BoQ rows, filled while the elements are extracted.
+    The file is written to a temporary path and moved into place on close, so an interrupted run keeps the previous BoQ.
+    """
+
+    def __init__(self, out_directory_boq):
+        self.path = boq_path(out_directory_boq)
+        self.temporary_path = f"{self.path}.tmp"
+        os.makedirs(out_directory_boq, exist_ok=True)
+        self.file = open(self.temporary_path, "w", newline='', encoding="utf-8-sig", buffering=BOQ_BUFFER_SIZE)
+        self.writer = csv.DictWriter(self.file, fieldnames=BOQ_FIELDNAMES)
+        self.writer.writeheader()
+        self.rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, row):
+        self.writer.writerow(row)
+        self.rows += 1
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+            os.replace(self.temporary_path, self.path)
+
+
+# Reads the rows of an existing BoQ, keyed by GlobalId (used to keep the rows of unchanged elements)
+def read_boq(out_directory_boq):
+    path = boq_path(out_directory_boq)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", newline='', encoding="utf-8-sig") as csvfile:
+        return {row["GlobalId"]: row for row in csv.DictReader(csvfile) if row.get("GlobalId")}
+
+
+# Export the Bill of Quantities to a CSV file
+def write_boq(boq_rows, out_directory_boq):
+    with BoqWriter(out_directory_boq) as writer:
+        for row in boq_rows:
+            writer.write(row)
+
+
+# Rebuilds the BoQ from the element data sheets in Elements/ (standalone, see rebuild_boq.py)
+# The extraction writes the BoQ itself, this is only needed if the data sheets were edited or the BoQ was lost
 def extractor_boq(out_directory_elements, out_directory_boq):
 
     # Filename list
-    source_files = os.listdir(out_directory_elements)
+    source_files = sorted(os.listdir(out_directory_elements))
 
     boq_rows = []
+    failed_files = []
 
     # Iterate over source files
     for filename in source_files:
@@ -17,48 +113,14 @@ def extractor_boq(out_directory_elements, out_directory_boq):
 
             try:
 
-                with open(source_path, "r", encoding="utf-8") as file:
-                    data = json.load(file)
-
-                element_metadata = data.get("Element Metadata", {})
-                geometry_data = data.get("Element Geometry Data", {})
-                psets_element = data.get("Element Property Sets", {}).get("Psets Element", {})
-
-                element_entity = element_metadata.get("Type")
-                ifc_quants_element = geometry_data.get("Quantities (IFC)", {})
-                element_quantities_compas = geometry_data.get("Quantities (COMPAS)", {})
-                volume_compas = element_quantities_compas.get("Net Volume")
-                obb_dimensions = geometry_data.get("Bounding Box Dimensions (OBB - local frame)", {})
-
-                # Calculate prioritized quantities & log sources
-                volume, area, length, volume_source, area_source, length_source = boq.extract_quantities(
-                    volume_compas, element_entity, ifc_quants_element, psets_element, obb_dimensions
-                )
-
-                boq_row = {
-                    "GlobalId": element_metadata.get("GlobalId", "Unknown"),
-                    "Name": element_metadata.get("Name", "Unknown"),
-                    "Entity": element_entity,
-                    "ObjectType": element_metadata.get("ObjectType", "Unknown"),
-                    "Length [m]": length or 0,
-                    "Length Source": length_source,
-                    "Largest Surface Area [m^2]": area or 0,
-                    "Area Source": area_source,
-                    "Volume [m^3]": volume or 0,
-                    "Volume Source": volume_source
-                }
-
-                boq_rows.append(boq_row)
+                data = read_json(source_path)
+
+                boq_rows.append(boq_row(data))
 
             except Exception as e:
+                failed_files.append(filename)
+                print(f"[BOQ] Skipping {filename}: {e}")
                 continue
 
-    # Export the Bill of Quantities to a CSV file
-    boq_output_path = os.path.join(out_directory_boq, "BoQ_step_01a.csv")
-    boq_fieldnames = ["GlobalId", "Name", "Entity", "ObjectType", "Length [m]", "Length Source", "Largest Surface Area [m^2]", "Area Source", "Volume [m^3]", "Volume Source"]
-
-    with open(boq_output_path, "w", newline='', encoding="utf-8-sig") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=boq_fieldnames)
-        writer.writeheader()
-        writer.writerows(boq_rows)
-
+    write_boq(boq_rows, out_directory_boq)
+    return len(boq_rows), failed_files
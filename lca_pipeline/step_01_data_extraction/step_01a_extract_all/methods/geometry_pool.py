@@ -0,0 +1,200 @@
+import os
+import sys
+import time
+import multiprocessing as mp
+from collections import deque
+from multiprocessing.connection import wait
+from . import helpers_geometry as geo
+from .helpers_memory import rss_mb
+
+# =================================================================================================================================
+# PROCESS POOL FOR BREP GEOMETRY
+# =================================================================================================================================
+
+# The BREP/tessellation/OBB computation runs in separate worker processes, so that
+# - the work is spread across all cores (no GIL contention),
+# - a timeout actually stops the computation (the worker is killed and respawned),
+# - a segfault inside OCC only takes down one worker and not the whole extraction run.
+# Workers are recycled after a fixed number of tasks, or when their RSS exceeds max_rss_mb, to keep their memory bounded.
+
+# Seconds between two checks of running tasks against the timeout
+POLL_INTERVAL = 0.5
+
+# IFC model used inside the worker processes.
+# With the "fork" start method, workers inherit the model that is already loaded in the main process.
+# With "spawn" (macOS/Windows), each worker loads the IFC file once when it starts.
+_worker_model = None
+
+
+def _start_method():
+    if sys.platform.startswith("linux") and "fork" in mp.get_all_start_methods():
+        return "fork"
+    return "spawn"
+
+
+# Main loop of a worker process: receives (position, GlobalId) tasks until it gets None
+def _worker_main(conn, ifc_input_file, lc_factor, tessellation):
+    global _worker_model
+    if _worker_model is None:
+        from .helpers_io import load_ifc_file
+        _worker_model = load_ifc_file(ifc_input_file)
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+
+        position, global_id = task
+        start_time = time.time()
+        try:
+            element = _worker_model.get_entity_by_global_id(global_id)
+            payload = geo.compute_brep_geometry_data(element, lc_factor, tessellation)
+            conn.send((position, "ok", payload, time.time() - start_time))
+        except Exception as e:
+            conn.send((position, "error", str(e), time.time() - start_time))
+
+    conn.close()
+
+
+# Result of an element whose geometry could not be computed
+def failed_result(status, seconds):
+    return {"Status": status, "Geometry": {}, "OBB": None, "Frame": None, "Tessellation": None, "Seconds": seconds}
+
+
+class GeometryPool:
+    """
+    Computes BREP geometry data for many elements in parallel worker processes.
+    Results of map() are returned in the order of the submitted elements.
+    """
+
+    def __init__(self, ifc_input_file, model, lc_factor, brep_timeout, workers=None, max_tasks_per_worker=200, tessellation=None, max_rss_mb=0):
+        self.ifc_input_file = str(ifc_input_file)
+        self.lc_factor = lc_factor
+        self.tessellation = tessellation
+        self.max_rss_mb = max_rss_mb if max_rss_mb and max_rss_mb > 0 else None
+        self.peak_rss_mb = 0.0
+        self.brep_timeout = brep_timeout
+        self.workers = workers if workers and workers > 0 else (os.cpu_count() or 1)
+        self.max_tasks_per_worker = max_tasks_per_worker if max_tasks_per_worker and max_tasks_per_worker > 0 else None
+        self.context = mp.get_context(_start_method())
+        self.slots = []
+
+        # Forked workers reuse the already parsed model of the main process
+        global _worker_model
+        if self.context.get_start_method() == "fork":
+            _worker_model = model
+
+    def __enter__(self):
+        self.slots = [self._spawn() for _ in range(self.workers)]
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # Starts a new worker process and returns its slot
+    def _spawn(self):
+        parent_conn, child_conn = self.context.Pipe()
+        process = self.context.Process(
+            target=_worker_main,
+            args=(child_conn, self.ifc_input_file, self.lc_factor, self.tessellation),
+            daemon=True
+        )
+        process.start()
+        child_conn.close()  # Only the worker holds this end, so a crash shows up as EOF
+        return {"process": process, "conn": parent_conn, "task": None, "started": None, "tasks_done": 0}
+
+    # Stops a worker (gracefully if possible) and frees its connection
+    def _retire(self, slot, kill=False):
+        process = slot["process"]
+        if kill:
+            process.kill()
+        else:
+            try:
+                slot["conn"].send(None)
+            except (OSError, BrokenPipeError):
+                pass
+        process.join(timeout=5)
+        if process.is_alive():
+            process.kill()
+            process.join()
+        slot["conn"].close()
+
+    def _replace(self, slot, kill=False):
+        self._retire(slot, kill=kill)
+        index = self.slots.index(slot)
+        self.slots[index] = self._spawn()
+
+    # Computes the geometry for a list of GlobalIds, returns one result dict per GlobalId (same order)
+    # Each result contains "Status" ("ok", "timeout", "crashed" or "error"), "Geometry", "OBB", "Frame", "Tessellation" and "Seconds"
+    def map(self, global_ids):
+        results = [None] * len(global_ids)
+        pending = deque(enumerate(global_ids))
+
+        while pending or any(slot["task"] is not None for slot in self.slots):
+
+            # Hand out tasks to idle workers
+            for slot in self.slots:
+                if slot["task"] is None and pending:
+                    position, global_id = pending.popleft()
+                    try:
+                        slot["conn"].send((position, global_id))
+                    except (OSError, BrokenPipeError):
+                        pending.appendleft((position, global_id))
+                        self._replace(slot, kill=True)
+                        continue
+                    slot["task"] = position
+                    slot["started"] = time.time()
+
+            busy = {slot["conn"]: slot for slot in self.slots if slot["task"] is not None}
+            if not busy:
+                continue
+
+            for conn in wait(list(busy.keys()), timeout=POLL_INTERVAL):
+                slot = busy[conn]
+                position = slot["task"]
+                try:
+                    _, status, payload, seconds = conn.recv()
+                except (EOFError, OSError):
+                    # Worker died while processing (e.g., segfault in OCC)
+                    results[position] = failed_result("crashed", time.time() - slot["started"])
+                    self._replace(slot, kill=True)
+                    continue
+
+                if status == "ok":
+                    brep_result, obb_dimensions, obb_frame, tessellation_info = payload
+                    results[position] = {
+                        "Status": "ok", "Geometry": brep_result, "OBB": obb_dimensions, "Frame": obb_frame,
+                        "Tessellation": tessellation_info, "Seconds": seconds
+                    }
+                else:
+                    print(f"[BREP ERROR] Failed to extract geometry: {payload}")
+                    results[position] = failed_result("error", seconds)
+
+                slot["task"] = None
+                slot["tasks_done"] += 1
+
+                # Recycle the worker to release memory held by OCC
+                worker_rss = rss_mb(slot["process"].pid)
+                if worker_rss is not None:
+                    self.peak_rss_mb = max(self.peak_rss_mb, worker_rss)
+                if self.max_tasks_per_worker and slot["tasks_done"] >= self.max_tasks_per_worker:
+                    self._replace(slot)
+                elif self.max_rss_mb and worker_rss is not None and worker_rss > self.max_rss_mb:
+                    self._replace(slot)
+
+            # Kill workers that exceed the timeout (this really stops the computation)
+            now = time.time()
+            for slot in list(self.slots):
+                if slot["task"] is not None and now - slot["started"] > self.brep_timeout:
+                    results[slot["task"]] = failed_result("timeout", now - slot["started"])
+                    self._replace(slot, kill=True)
+
+        return results
+
+    def close(self):
+        for slot in self.slots:
+            self._retire(slot)
+        self.slots = []
@@ -0,0 +1,152 @@
+from . import helpers_metadata as meta
+from . import helpers_geometry as geo
+from . import helpers_boq as boq
+from . import helpers_geometry_cache as geo_cache
+from . import helpers_geometry_analytic as geo_analytic
+from .geometry_pool import GeometryPool
+from .helpers_profiler import NO_PROFILER
+
+# =================================================================================================================================
+# GEOMETRY PHASE OF THE EXTRACTION
+# =================================================================================================================================
+
+# Computes the geometry-related data of the elements to extract:
+#   1. IFC quantities (needed for the lazy mode and the data sheets)
+#   2. closed-form geometry of extruded, revolved and simple CSG solids (no OCC needed)
+#   3. lazy mode: skip OCC for elements whose IFC quantities already cover volume, area and length
+#   4. BREP geometry in the geometry pool, elements sharing a mapped representation are only computed once
+# The runner can be called once for all elements or chunk by chunk (memory-bounded mode).
+# Counters are accumulated over all calls, the geometry pool is started on first use and kept until close().
+
+
+class GeometryRunner:
+
+    def __init__(self, ifc_input_file, model, rel_index, lc_factor, angle_factor, brep_toggle, brep_timeout,
+                 brep_workers=None, brep_max_tasks=200, analytic_toggle=True, brep_mode="full",
+                 brep_obb_entities=None, tessellation=None, max_rss_mb=0, profiler=NO_PROFILER):
+        self.ifc_input_file = ifc_input_file
+        self.model = model
+        self.rel_index = rel_index
+        self.lc_factor = lc_factor
+        self.angle_factor = angle_factor
+        self.brep_toggle = brep_toggle
+        self.brep_timeout = brep_timeout
+        self.brep_workers = brep_workers
+        self.brep_max_tasks = brep_max_tasks
+        self.analytic_toggle = analytic_toggle
+        self.brep_mode = brep_mode
+        self.obb_entities = set(brep_obb_entities or [])
+        self.tessellation = tessellation
+        self.max_rss_mb = max_rss_mb
+        self.profiler = profiler
+        self.pool = None
+        self.worker_peak_rss_mb = None  # Peak RSS of the BREP worker processes (set on close)
+
+        # Accumulated counters
+        self.geometry_cache_stats = {}
+        self.analytic_count = 0
+        self.lazy_skipped = 0
+        self.brep_seconds = []
+        self.tessellation_times = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _geometry_pool(self):
+        if self.pool is None:
+            self.pool = GeometryPool(
+                self.ifc_input_file, self.model, self.lc_factor, self.brep_timeout,
+                self.brep_workers, self.brep_max_tasks, self.tessellation, self.max_rss_mb
+            ).__enter__()
+        return self.pool
+
+    # Returns the IFC quantities and the geometry results of the given elements (same order)
+    def compute(self, elements):
+        rel_index, lc_factor, profiler = self.rel_index, self.lc_factor, self.profiler
+
+        # IFC quantities are needed before the BREP calculation (lazy mode) and for the data sheets
+        ifc_quantities = []
+        for element in elements:
+            with profiler.family(meta.globalid(element), "IFC Quantities"):
+                ifc_quantities.append(geo.quantities_ifc(element, rel_index, lc_factor))
+        brep_results = [None] * len(elements)
+
+        # Extruded, revolved and simple CSG solids are evaluated in closed form (no OCC needed)
+        occ_positions = list(range(len(elements)))
+        if self.analytic_toggle:
+            occ_positions = []
+            for position, element in enumerate(elements):
+                with profiler.family(meta.globalid(element), "Analytic Geometry"):
+                    analytic_data = geo_analytic.compute_analytic_geometry_data(element, rel_index, lc_factor, self.angle_factor)
+                if analytic_data:
+                    brep_results[position] = {"Status": "ok", "Geometry": analytic_data}
+                    self.analytic_count += 1
+                else:
+                    occ_positions.append(position)
+
+        # Lazy mode: skip OCC for elements whose IFC quantities already cover volume, area and length,
+        # unless their entity type needs the OBB context for the prompts
+        if self.brep_toggle and self.brep_mode == "lazy":
+            remaining_positions = []
+            for position in occ_positions:
+                element_type = meta.entity(elements[position])
+                if element_type not in self.obb_entities and boq.has_ifc_quantities(element_type, ifc_quantities[position]):
+                    self.lazy_skipped += 1
+                else:
+                    remaining_positions.append(position)
+            occ_positions = remaining_positions
+
+        # Calculate BREP-related geometry data in parallel worker processes
+        # Elements sharing a mapped representation are only computed once (see helpers_geometry_cache.py)
+        if self.brep_toggle and occ_positions:
+            occ_elements = [elements[position] for position in occ_positions]
+            task_positions, representative_of, cache_stats = geo_cache.plan_geometry_tasks(occ_elements, rel_index)
+            for key, value in cache_stats.items():
+                self.geometry_cache_stats[key] = self.geometry_cache_stats.get(key, 0) + value
+
+            task_results = self._geometry_pool().map([meta.globalid(occ_elements[position]) for position in task_positions])
+            self.brep_seconds.extend(result["Seconds"] for result in task_results if result["Status"] == "ok")
+            for position, result in zip(task_positions, task_results):
+                # BREP and tessellation times are measured in the worker processes (the BREP time includes the tessellation)
+                global_id = meta.globalid(occ_elements[position])
+                tessellation_seconds = (result.get("Tessellation") or {}).get("Seconds") or 0.0
+                profiler.record(global_id, "BREP", result["Seconds"] - tessellation_seconds)
+                if result.get("Tessellation"):
+                    profiler.record(global_id, "Tessellation", tessellation_seconds)
+                    self.tessellation_times.append({
+                        "Name": meta.name(occ_elements[position]),
+                        "GlobalId": meta.globalid(occ_elements[position]),
+                        "Type": meta.entity(occ_elements[position]),
+                        **result["Tessellation"]
+                    })
+
+            occ_results = geo_cache.expand_geometry_results(occ_elements, task_positions, representative_of, task_results, lc_factor)
+            for position, occ_result in zip(occ_positions, occ_results):
+                brep_results[position] = occ_result
+
+        return ifc_quantities, brep_results
+
+    # Time saved by lazy mode, estimated from the mean BREP time of the computed elements
+    def lazy_mode_report(self):
+        average_brep_seconds = sum(self.brep_seconds) / len(self.brep_seconds) if self.brep_seconds else 0.0
+        return {
+            "BREP Mode": self.brep_mode,
+            "Elements Skipped (IFC Quantities Available)": self.lazy_skipped,
+            "Estimated Time Saved [s]": round(self.lazy_skipped * average_brep_seconds, 2)
+        }
+
+    # Tessellation profile and per-element tessellation time (to tune the profiles)
+    def tessellation_report(self):
+        report = dict(self.tessellation or {"Profile": "fixed"})
+        report["Total Tessellation Time [s]"] = round(sum(entry["Seconds"] for entry in self.tessellation_times), 2)
+        report["Elements"] = self.tessellation_times
+        return report
+
+    def close(self):
+        if self.pool is not None:
+            self.worker_peak_rss_mb = self.pool.peak_rss_mb
+            self.pool.close()
+            self.pool = None
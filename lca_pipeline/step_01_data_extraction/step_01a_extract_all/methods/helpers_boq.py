@@ -1,6 +1,22 @@
-# Extract volume, area, and length from best available source (1. IFC / 2. Pset/ 3. Bounding Box).
+# Extract volume, area, and length from best available source (1. IFC / 2. Analytic or BREP geometry / 3. Pset / 4. Bounding Box).
 
-def extract_quantities(volume_compas, element_entity, ifc_quants_element, psets_element, obb_dimensions):
+# Entities whose area is taken from the footprint instead of the side area
+FOOTPRINT_AREA_ENTITIES = ("IfcSlab", "IfcRoof", "IfcCovering", "IfcStair", "IfcStairFlight", "IfcRamp", "IfcFooting")
+
+
+# Returns True if the IFC quantities (P1) provide volume, area and length for the BoQ,
+# in which case BREP quantities (P2) would not be used
+def has_ifc_quantities(element_entity, ifc_quants_element):
+    if not isinstance(ifc_quants_element, dict):
+        return False
+    area_key = "Net Footprint Area" if element_entity in FOOTPRINT_AREA_ENTITIES else "Net Side Area"
+    return all(
+        isinstance(ifc_quants_element.get(key), (int, float))
+        for key in ("Net Volume", area_key, "Length")
+    )
+
+
+def extract_quantities(volume_compas, element_entity, ifc_quants_element, psets_element, obb_dimensions, analytic_quants_element=None):
     volume = None
     area = None
     length = None
@@ -19,6 +35,10 @@ def extract_quantities(volume_compas, element_entity, ifc_quants_element, psets_
             except (ValueError, TypeError):
                 volume = None
 
+    if volume is None and isinstance(analytic_quants_element, dict) and analytic_quants_element.get("Net Volume") is not None:
+        volume = round(analytic_quants_element["Net Volume"], 4)
+        volume_source = "(P2) Analytic Geometry"
+
     if volume is None and volume_compas is not None:
         volume = round(volume_compas, 4)
         volume_source = "(P2) COMPAS Brep"
@@ -43,7 +63,7 @@ def extract_quantities(volume_compas, element_entity, ifc_quants_element, psets_
 
     # ==== Area Calculation ====
     if isinstance(ifc_quants_element, dict):
-        if element_entity in ("IfcSlab", "IfcRoof", "IfcCovering", "IfcStair", "IfcStairFlight", "IfcRamp", "IfcFooting"):
+        if element_entity in FOOTPRINT_AREA_ENTITIES:
             area = ifc_quants_element.get("Net Footprint Area")
         else:
             area = ifc_quants_element.get("Net Side Area")
@@ -54,6 +74,10 @@ def extract_quantities(volume_compas, element_entity, ifc_quants_element, psets_
             except (ValueError, TypeError):
                 area = None
 
+    if area is None and isinstance(analytic_quants_element, dict) and analytic_quants_element.get("Largest Face Area") is not None:
+        area = round(analytic_quants_element["Largest Face Area"], 4)
+        area_source = "(P2) Analytic Geometry"
+
     if area is None and isinstance(obb_dimensions, dict):
         obb_values = [obb_dimensions.get(axis) for axis in ("X", "Y", "Z") if obb_dimensions.get(axis) is not None]
         if obb_values and len(obb_values) == 3:
@@ -1,4 +1,7 @@
 import math
+import time
+from .helpers_index import related
+from .helpers_geometry_stats import mesh_arrays, mesh_statistics, HORIZONTAL_TOLERANCE
 
 # =================================================================================================================================
 # EXTRACT GEOMETRY DATA USING IFC CLASSES / PROPERTIES
@@ -6,7 +9,7 @@ import math
 
 # Function to extract geometry quantities like volume, area, and dimensions from IfcElementQuantity
 # This only uses IFC entities and Psets (no COMPAS)
-def quantities_ifc(element, property_relationships, lc_factor):
+def quantities_ifc(element, rel_index, lc_factor):
     quantities = {
         "Width": "Not defined",
         "Width unit": "METRE",
@@ -30,42 +33,41 @@ def quantities_ifc(element, property_relationships, lc_factor):
 
     try:
 
-        for rel in property_relationships:
-            if element in rel.RelatedObjects:
-                if hasattr(rel, "RelatingPropertyDefinition") and rel.RelatingPropertyDefinition:
-                    quantity_set = rel.RelatingPropertyDefinition
-                    
-                    # Check if the property is of type IfcElementQuantity and has quantities
-                    if quantity_set.is_a("IfcElementQuantity") and hasattr(quantity_set, "Quantities"):
-                        for quantity in quantity_set.Quantities:
-                            if hasattr(quantity, "Name"):
-                                q_name = quantity.Name.lower()  # Normalize for comparison
-
-                                # Extract volume values
-                                if "volume" in q_name and hasattr(quantity, "VolumeValue"):
-                                    if "gross" in q_name:
-                                        quantities["Gross Volume"] = round(quantity.VolumeValue, 4)
-                                    elif "net" in q_name:
-                                        quantities["Net Volume"] = round(quantity.VolumeValue, 4)
-
-                                # Extract area values
-                                elif "area" in q_name and hasattr(quantity, "AreaValue"):
-                                    if "grossside" in q_name:
-                                        quantities["Gross Side Area"] = round(quantity.AreaValue, 4)
-                                    elif "netside" in q_name:
-                                        quantities["Net Side Area"] = round(quantity.AreaValue, 4)
-                                    elif "grossfootprint" in q_name:
-                                        quantities["Gross Footprint Area"] = round(quantity.AreaValue, 4)
-                                    elif "netfootprint" in q_name:
-                                        quantities["Net Footprint Area"] = round(quantity.AreaValue, 4)
-
-                                # Extract length values and apply conversion factor
-                                elif "length" in q_name and hasattr(quantity, "LengthValue"):
-                                    quantities["Length"] = round((lc_factor * quantity.LengthValue), 4)
-                                elif "width" in q_name and hasattr(quantity, "LengthValue"):
-                                    quantities["Width"] = round((lc_factor * quantity.LengthValue), 4)
-                                elif "height" in q_name and hasattr(quantity, "LengthValue"):
-                                    quantities["Height"] = round((lc_factor * quantity.LengthValue), 4)
+        for rel in related(rel_index, "property_definitions", element):
+            if hasattr(rel, "RelatingPropertyDefinition") and rel.RelatingPropertyDefinition:
+                quantity_set = rel.RelatingPropertyDefinition
+                
+                # Check if the property is of type IfcElementQuantity and has quantities
+                if quantity_set.is_a("IfcElementQuantity") and hasattr(quantity_set, "Quantities"):
+                    for quantity in quantity_set.Quantities:
+                        if hasattr(quantity, "Name"):
+                            q_name = quantity.Name.lower()  # Normalize for comparison
+
+                            # Extract volume values
+                            if "volume" in q_name and hasattr(quantity, "VolumeValue"):
+                                if "gross" in q_name:
+                                    quantities["Gross Volume"] = round(quantity.VolumeValue, 4)
+                                elif "net" in q_name:
+                                    quantities["Net Volume"] = round(quantity.VolumeValue, 4)
+
+                            # Extract area values
+                            elif "area" in q_name and hasattr(quantity, "AreaValue"):
+                                if "grossside" in q_name:
+                                    quantities["Gross Side Area"] = round(quantity.AreaValue, 4)
+                                elif "netside" in q_name:
+                                    quantities["Net Side Area"] = round(quantity.AreaValue, 4)
+                                elif "grossfootprint" in q_name:
+                                    quantities["Gross Footprint Area"] = round(quantity.AreaValue, 4)
+                                elif "netfootprint" in q_name:
+                                    quantities["Net Footprint Area"] = round(quantity.AreaValue, 4)
+
+                            # Extract length values and apply conversion factor
+                            elif "length" in q_name and hasattr(quantity, "LengthValue"):
+                                quantities["Length"] = round((lc_factor * quantity.LengthValue), 4)
+                            elif "width" in q_name and hasattr(quantity, "LengthValue"):
+                                quantities["Width"] = round((lc_factor * quantity.LengthValue), 4)
+                            elif "height" in q_name and hasattr(quantity, "LengthValue"):
+                                quantities["Height"] = round((lc_factor * quantity.LengthValue), 4)
     except Exception as e:
         pass
     # Clean up unused fields
@@ -96,17 +98,84 @@ def representation(element):
 # =================================================================================================================================
 
 
+# Tessellation profiles
+# The linear deflection is a fraction of the element size (diagonal of its axis-aligned bounding box),
+# clamped to a minimum and maximum deflection (metres). A 40 m slab and a 1 m door are thus tessellated
+# with a comparable number of faces instead of the same absolute tolerance.
+# "coarse" is enough for the OBB extents, "fine" is used when the tessellation counts (complexity) are requested.
+TESSELLATION_PROFILES = {
+    "coarse": {"relative_deflection": 0.01, "min_deflection": 0.005, "max_deflection": 0.1},
+    "fine": {"relative_deflection": 0.0005, "min_deflection": 0.0005, "max_deflection": 0.01}
+}
+
+# Absolute linear deflection (model units) of the "fixed" profile and the fallback if the element size is unknown
+FIXED_LINEAR_DEFLECTION = 0.001
+
+
+# Resolves the configured tessellation profile
+# "auto" selects "fine" if complexity metrics are requested and "coarse" otherwise, "fixed" keeps the absolute deflection
+def tessellation_settings(profile="auto", complexity_metrics=True, profiles=None):
+    available = {name: dict(values) for name, values in TESSELLATION_PROFILES.items()}
+    for name, values in (profiles or {}).items():
+        available.setdefault(name, {}).update(values)
+
+    if profile == "auto":
+        profile = "fine" if complexity_metrics else "coarse"
+    if profile != "fixed" and profile not in available:
+        print(f"[WARNING] Unknown tessellation profile '{profile}', using 'fine'.")
+        profile = "fine"
+
+    settings = {"Profile": profile, "Complexity Metrics": bool(complexity_metrics)}
+    if profile != "fixed":
+        settings["Relative Deflection"] = available[profile]["relative_deflection"]
+        settings["Min Deflection"] = available[profile]["min_deflection"]
+        settings["Max Deflection"] = available[profile]["max_deflection"]
+    return settings
+
+
+# Linear deflection (model units) for an element, relative to its size
+def linear_deflection(brep, settings, lc_factor):
+    if not settings or settings["Profile"] == "fixed":
+        return FIXED_LINEAR_DEFLECTION
+    try:
+        box = brep.aabb()
+        size = math.sqrt(box.xsize ** 2 + box.ysize ** 2 + box.zsize ** 2) * lc_factor
+    except Exception:
+        return FIXED_LINEAR_DEFLECTION
+    deflection = min(max(size * settings["Relative Deflection"], settings["Min Deflection"]), settings["Max Deflection"])
+    return deflection / lc_factor
+
+
 # Method to convert element to mesh
-def get_mesh(element):
+# Returns the mesh and the tessellation info (profile, linear deflection and tessellation time)
+def get_mesh(element, settings=None, lc_factor=1):
     brep = element.geometry
+    start_time = time.time()
     try:
-        mesh, polylines = brep.to_viewmesh(linear_deflection=0.001)
-        obb = mesh.obb()
-        return mesh, obb
+        deflection = linear_deflection(brep, settings, lc_factor)
+        mesh, polylines = brep.to_viewmesh(linear_deflection=deflection)
+        info = {
+            "Profile": settings["Profile"] if settings else "fixed",
+            "Linear Deflection": round(deflection * lc_factor, 6),
+            "Seconds": round(time.time() - start_time, 4)
+        }
+        return mesh, info
     except Exception as e:
         return None, None
 
 
+# Tessellation statistics (counts, PCA-based OBB, dominant axis, cardinal direction) computed with NumPy on the
+# vertex / face arrays of the mesh, see helpers_geometry_stats
+def tessellation_statistics(mesh, lc_factor):
+    if mesh is None:
+        return None
+    try:
+        vertices, faces = mesh_arrays(mesh)
+        return mesh_statistics(vertices, faces, lc_factor)
+    except Exception:
+        return None
+
+
 def quantities_compas(brep, lc_factor):
     quantities = {}
     try:
@@ -123,64 +192,38 @@ def quantities_compas(brep, lc_factor):
         pass
     return quantities if quantities else {}
 
-# Method to get tessellation counts (i.e., describing the complexity of the mesh)
-def face_count(mesh):
-    try:
-        return {
-            "Face Count": len(list(mesh.faces()))
-        }
-    except Exception:
-        return {}
-
-# Method to get tessellation counts (i.e., describing the complexity of the mesh)
-def vertex_count(mesh):
-    try:
-        return {
-            "Vertex Count": len(list(mesh.vertices()))
-        }
-    except Exception:
-        return {}
-    
-# Method to get tessellation counts (i.e., describing the complexity of the mesh)
-def edge_count(mesh):
-    try:
-        return {
-            "Edge Count": len(list(mesh.edges()))
-        }
-    except Exception:
-        return {}
-
-
-# Bounding box dimensions with dominant axis handling
-def bounding_box_dimensions(obb, length_conversion_factor):
-    if obb is None:
-        return {}
-
-    try:
-        xaxis, yaxis, zaxis = obb.frame.xaxis, obb.frame.yaxis, obb.frame.zaxis
-
-        # Find the dominant axis (the one most aligned with global Z)
-        dominant_axis = max(
-            [("X", abs(xaxis.z)), ("Y", abs(yaxis.z)), ("Z", abs(zaxis.z))],
-            key=lambda x: x[1]
-        )[0]
-
-        # Rearrange box dimensions based on dominant axis
-        if dominant_axis == "Z":
-            x_size, y_size, z_size = obb.xsize, obb.ysize, obb.zsize
-        elif dominant_axis == "Y":
-            x_size, y_size, z_size = obb.xsize, obb.zsize, obb.ysize
-        else:  # dominant_axis == "X"
-            x_size, y_size, z_size = obb.ysize, obb.xsize, obb.zsize
-
-        return {
-            "X": round(x_size * length_conversion_factor, 2),
-            "Y": round(y_size * length_conversion_factor, 2),
-            "Z": round(z_size * length_conversion_factor, 2),
-            "Bounding Box Dimensions Unit": "METRE"
-        }
-    except AttributeError:
+# Tessellation counts (i.e., describing the complexity of the mesh)
+def tessellation_count(stats, key):
+    if not stats:
         return {}
+    return {key: stats[key]}
+
+
+# Box dimensions of an OBB frame, rearranged such that Z is the axis most aligned with global Z
+def dimensions_from_frame(frame, length_conversion_factor):
+    xaxis, yaxis, zaxis = frame["Axes"]
+    xsize, ysize, zsize = frame["Sizes"]
+
+    # Find the dominant axis (the one most aligned with global Z)
+    dominant_axis = max(
+        [("X", abs(xaxis[2])), ("Y", abs(yaxis[2])), ("Z", abs(zaxis[2]))],
+        key=lambda x: x[1]
+    )[0]
+
+    # Rearrange box dimensions based on dominant axis
+    if dominant_axis == "Z":
+        x_size, y_size, z_size = xsize, ysize, zsize
+    elif dominant_axis == "Y":
+        x_size, y_size, z_size = xsize, zsize, ysize
+    else:  # dominant_axis == "X"
+        x_size, y_size, z_size = ysize, xsize, zsize
+
+    return {
+        "X": round(x_size * length_conversion_factor, 2),
+        "Y": round(y_size * length_conversion_factor, 2),
+        "Z": round(z_size * length_conversion_factor, 2),
+        "Bounding Box Dimensions Unit": "METRE"
+    }
 
 def bounding_box_volume(obb_dimensions):
     obb_values = [obb_dimensions.get(axis) for axis in ("X", "Y", "Z") if obb_dimensions.get(axis) is not None]
@@ -207,15 +250,10 @@ def real_volume_to_bounding_box_ratio(brep, obb_volume, lc_factor):
     except Exception:
         return None    
 
-# Converts the x-axis orientation vector of the obb into a cardinal direction (N, NE, E, SE, S, SW, W, NW).
-def get_cardinal_direction_from_vector(obb):
-    if not obb or not hasattr(obb, "frame") or not hasattr(obb.frame, "xaxis"):
-        return "Not defined"
-
-    xaxis = obb.frame.xaxis
-    x, y = xaxis.x, xaxis.y
-
-    if x == 0 and y == 0:
+# Converts the horizontal components of a direction vector into a cardinal direction
+# A (nearly) vertical direction has no cardinal direction (float noise of the horizontal components is ignored)
+def cardinal_direction(x, y):
+    if math.hypot(x, y) <= HORIZONTAL_TOLERANCE:
         return "Undefined"
 
     angle_rad = math.atan2(y, x)
@@ -233,22 +271,42 @@ def get_cardinal_direction_from_vector(obb):
     return "E"  # Default fallback
 
 
-def compute_brep_geometry_data(element, lc_factor):
+# Re-orients cached geometry data of a shared representation for another instance
+# Volume, areas, OBB extents and tessellation counts are unchanged, only the axis-dependent fields are recomputed
+# The rotation (3x3, rows) maps the OBB axes of the cached instance onto the axes of the new instance
+def reorient_geometry_data(geometry_data, frame, rotation, lc_factor):
+    oriented = dict(geometry_data)
+    if not frame:
+        return oriented
+    axes = [
+        [sum(rotation[row][col] * axis[col] for col in range(3)) for row in range(3)]
+        for axis in frame["Axes"]
+    ]
+    oriented_frame = {"Axes": axes, "Sizes": frame["Sizes"]}
+    oriented["Bounding Box Dimensions (OBB - local frame)"] = dimensions_from_frame(oriented_frame, lc_factor)
+    oriented["Primary Object Axis (Cardinal Direction)"] = cardinal_direction(axes[0][0], axes[0][1])
+    return oriented
+
+
+# Returns the geometry data, the OBB dimensions, the OBB frame (used to re-orient cached results) and the tessellation info
+def compute_brep_geometry_data(element, lc_factor, tessellation=None):
     try:
         geometry_data = {}
-        mesh, obb = get_mesh(element)
+        mesh, tessellation_info = get_mesh(element, tessellation, lc_factor)
+        stats = tessellation_statistics(mesh, lc_factor)
         brep = element.geometry
         geometry_data["Quantities (COMPAS)"] = quantities_compas(brep, lc_factor)
-        obb_dimensions = bounding_box_dimensions(obb, lc_factor)
+        obb_dimensions = stats["Bounding Box Dimensions"] if stats else {}
         geometry_data["Bounding Box Dimensions (OBB - local frame)"] = obb_dimensions
         obb_volume = bounding_box_volume(obb_dimensions)
         geometry_data["Bounding Box Volume"] = obb_volume
         geometry_data["Real Volume to Bounding Box Volume Ratio"] = real_volume_to_bounding_box_ratio(brep, obb_volume, lc_factor)
-        geometry_data["Face Count (tessellated element)"] = face_count(mesh)
-        geometry_data["Vertex Count (tessellated element)"] = vertex_count(mesh)
-        geometry_data["Edge Count (tessellated element)"] = edge_count(mesh)
-        geometry_data["Primary Object Axis (Cardinal Direction)"] = get_cardinal_direction_from_vector(obb)
-        return geometry_data, obb_dimensions
+        if not tessellation or tessellation["Complexity Metrics"]:
+            geometry_data["Face Count (tessellated element)"] = tessellation_count(stats, "Face Count")
+            geometry_data["Vertex Count (tessellated element)"] = tessellation_count(stats, "Vertex Count")
+            geometry_data["Edge Count (tessellated element)"] = tessellation_count(stats, "Edge Count")
+        geometry_data["Primary Object Axis (Cardinal Direction)"] = stats["Cardinal Direction"] if stats else "Not defined"
+        return geometry_data, obb_dimensions, stats["Frame"] if stats else None, tessellation_info
     except Exception as e:
         print(f"[BREP ERROR] Failed to extract geometry: {e}")
-        return {}, None
+        return {}, None, None, None
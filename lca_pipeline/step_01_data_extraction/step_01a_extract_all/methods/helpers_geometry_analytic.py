@@ -0,0 +1,472 @@
+import math
+from .helpers_index import related
+from .helpers_geometry_cache import body_representations, direction_vector, rotation_from_axes, object_placement_rotation
+from .helpers_geometry import dimensions_from_frame, bounding_box_volume, cardinal_direction
+
+# =================================================================================================================================
+# ANALYTIC GEOMETRY (FAST PATH WITHOUT OCC)
+# =================================================================================================================================
+
+# Most walls and slabs are IfcExtrudedAreaSolids. For these (and for revolved solids and simple CSG primitives),
+# volume, surface area and bounding extents follow in closed form from the profile and the sweep parameters.
+# If every body item of an element can be evaluated here, the element does not need to be sent to OCC.
+# Anything else (boolean results, B-reps, tessellations, elements with openings) returns None and falls back to OCC.
+# Entities are matched by their exact name, as is_a(name) also matches subtypes with another shape
+# (tapered sweeps, profiles with rounded corners), which are left to OCC as well.
+
+# Number of steps used to sample revolved profiles for the bounding box
+REVOLUTION_SAMPLES = 64
+
+
+# ----------------------------------------------------------------
+# Transformations (rotation matrix with axes as columns + translation)
+# ----------------------------------------------------------------
+
+IDENTITY_TRANSFORM = ([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]], [0.0, 0.0, 0.0])
+
+
+def _point(cartesian_point):
+    coordinates = list(cartesian_point.Coordinates)
+    while len(coordinates) < 3:
+        coordinates.append(0.0)
+    return [float(c) for c in coordinates]
+
+
+def _placement_transform(placement):
+    if placement is None:
+        return IDENTITY_TRANSFORM
+    zaxis = direction_vector(getattr(placement, "Axis", None), [0.0, 0.0, 1.0])
+    xref = direction_vector(getattr(placement, "RefDirection", None), [1.0, 0.0, 0.0])
+    location = getattr(placement, "Location", None)
+    return rotation_from_axes(zaxis, xref), (_point(location) if location is not None else [0.0, 0.0, 0.0])
+
+
+def _apply(transform, point):
+    rotation, translation = transform
+    return [sum(rotation[row][k] * point[k] for k in range(3)) + translation[row] for row in range(3)]
+
+
+def _compose(outer, inner):
+    outer_rotation, outer_translation = outer
+    inner_rotation, inner_translation = inner
+    rotation = [[sum(outer_rotation[row][k] * inner_rotation[k][col] for k in range(3)) for col in range(3)] for row in range(3)]
+    return rotation, _apply(outer, inner_translation)
+
+
+def _invert(transform):
+    rotation, translation = transform
+    transposed = [[rotation[col][row] for col in range(3)] for row in range(3)]
+    return transposed, [-sum(transposed[row][k] * translation[k] for k in range(3)) for row in range(3)]
+
+
+def _scaled(transform, scale):
+    rotation, translation = transform
+    return [[value * scale for value in row] for row in rotation], translation
+
+
+# ----------------------------------------------------------------
+# Profiles (2D)
+# ----------------------------------------------------------------
+
+def _polygon(points):
+    # Drop the closing point of closed polylines
+    if len(points) > 2 and points[0] == points[-1]:
+        points = points[:-1]
+    if len(points) < 3:
+        return None
+
+    area2 = 0.0
+    cx = cy = 0.0
+    perimeter = 0.0
+    px = py = 0.0
+    edges = []
+    for i in range(len(points)):
+        x0, y0 = points[i]
+        x1, y1 = points[(i + 1) % len(points)]
+        cross = x0 * y1 - x1 * y0
+        area2 += cross
+        cx += (x0 + x1) * cross
+        cy += (y0 + y1) * cross
+        length = math.hypot(x1 - x0, y1 - y0)
+        perimeter += length
+        px += (x0 + x1) / 2 * length
+        py += (y0 + y1) / 2 * length
+        edges.append((x1 - x0, y1 - y0))
+
+    if area2 == 0 or perimeter == 0:
+        return None
+    return {
+        "Area": abs(area2) / 2,
+        "Centroid": (cx / (3 * area2), cy / (3 * area2)),
+        "Perimeter": perimeter,
+        "Perimeter Centroid": (px / perimeter, py / perimeter),
+        "Edges": edges,
+        "Points": points
+    }
+
+
+def _circle(radius):
+    if radius is None or radius <= 0:
+        return None
+    return {
+        "Area": math.pi * radius ** 2,
+        "Centroid": (0.0, 0.0),
+        "Perimeter": 2 * math.pi * radius,
+        "Perimeter Centroid": (0.0, 0.0),
+        "Edges": None,  # Curved outline
+        "Points": [(-radius, -radius), (radius, -radius), (radius, radius), (-radius, radius)]
+    }
+
+
+def _rectangle(x_dim, y_dim):
+    return _polygon([(-x_dim / 2, -y_dim / 2), (x_dim / 2, -y_dim / 2), (x_dim / 2, y_dim / 2), (-x_dim / 2, y_dim / 2)])
+
+
+# Subtracts inner loops (voids) from an outer profile
+def _with_voids(outer, inners):
+    if outer is None or any(inner is None for inner in inners):
+        return None
+    area = outer["Area"] - sum(inner["Area"] for inner in inners)
+    perimeter = outer["Perimeter"] + sum(inner["Perimeter"] for inner in inners)
+    if area <= 0:
+        return None
+    cx = (outer["Area"] * outer["Centroid"][0] - sum(i["Area"] * i["Centroid"][0] for i in inners)) / area
+    cy = (outer["Area"] * outer["Centroid"][1] - sum(i["Area"] * i["Centroid"][1] for i in inners)) / area
+    px = (outer["Perimeter"] * outer["Perimeter Centroid"][0] + sum(i["Perimeter"] * i["Perimeter Centroid"][0] for i in inners)) / perimeter
+    py = (outer["Perimeter"] * outer["Perimeter Centroid"][1] + sum(i["Perimeter"] * i["Perimeter Centroid"][1] for i in inners)) / perimeter
+    edges = None
+    if outer["Edges"] is not None and all(inner["Edges"] is not None for inner in inners):
+        edges = outer["Edges"] + [edge for inner in inners for edge in inner["Edges"]]
+    return {
+        "Area": area,
+        "Centroid": (cx, cy),
+        "Perimeter": perimeter,
+        "Perimeter Centroid": (px, py),
+        "Edges": edges,
+        "Points": outer["Points"]
+    }
+
+
+# Exact IFC entity name (compas_ifc wraps the ifcopenshell entity)
+def _entity_name(entity):
+    return getattr(entity, "_entity", entity).is_a()
+
+
+# Returns the 2D points of a polyline curve (None for curves with arcs or other curve types)
+def _curve_points(curve):
+    if curve.is_a("IfcPolyline"):
+        return [tuple(_point(p)[:2]) for p in curve.Points]
+    if curve.is_a("IfcIndexedPolyCurve"):
+        coordinates = [tuple(float(c) for c in point[:2]) for point in curve.Points.CoordList]
+        segments = getattr(curve, "Segments", None)
+        if not segments:
+            return coordinates
+        points = []
+        for segment in segments:
+            if not segment.is_a("IfcLineIndex"):
+                return None  # Arc segments are left to OCC
+            indices = list(segment.wrappedValue) if hasattr(segment, "wrappedValue") else list(segment[0])
+            for index in indices:
+                point = coordinates[index - 1]
+                if not points or points[-1] != point:
+                    points.append(point)
+        return points
+    return None
+
+
+# Moves a profile into its 2D position (IfcAxis2Placement2D)
+def _positioned(profile, position):
+    if profile is None or position is None:
+        return profile
+    rotation, translation = _placement_transform(position)
+
+    def move(point):
+        moved = _apply((rotation, translation), [point[0], point[1], 0.0])
+        return (moved[0], moved[1])
+
+    def turn(vector):
+        turned = _apply((rotation, [0.0, 0.0, 0.0]), [vector[0], vector[1], 0.0])
+        return (turned[0], turned[1])
+
+    positioned = dict(profile)
+    positioned["Centroid"] = move(profile["Centroid"])
+    positioned["Perimeter Centroid"] = move(profile["Perimeter Centroid"])
+    positioned["Points"] = [move(point) for point in profile["Points"]]
+    if profile["Edges"] is not None:
+        positioned["Edges"] = [turn(edge) for edge in profile["Edges"]]
+    return positioned
+
+
+# Area, perimeter, centroids, straight edges and outline points of a profile definition (model units)
+def profile_properties(profile):
+    name = _entity_name(profile)
+    if name == "IfcRectangleHollowProfileDef":
+        if getattr(profile, "InnerFilletRadius", None) or getattr(profile, "OuterFilletRadius", None):
+            return None  # Rounded corners are left to OCC
+        thickness = profile.WallThickness
+        outer = _rectangle(profile.XDim, profile.YDim)
+        inner = _rectangle(profile.XDim - 2 * thickness, profile.YDim - 2 * thickness)
+        return _positioned(_with_voids(outer, [inner]), getattr(profile, "Position", None))
+    if name == "IfcRectangleProfileDef":
+        return _positioned(_rectangle(profile.XDim, profile.YDim), getattr(profile, "Position", None))
+    if name == "IfcCircleHollowProfileDef":
+        outer = _circle(profile.Radius)
+        inner = _circle(profile.Radius - profile.WallThickness)
+        return _positioned(_with_voids(outer, [inner]), getattr(profile, "Position", None))
+    if name == "IfcCircleProfileDef":
+        return _positioned(_circle(profile.Radius), getattr(profile, "Position", None))
+    if name in ("IfcArbitraryClosedProfileDef", "IfcArbitraryProfileDefWithVoids"):
+        outer_points = _curve_points(profile.OuterCurve)
+        outer = _polygon(outer_points) if outer_points else None
+        if name == "IfcArbitraryProfileDefWithVoids":
+            inners = []
+            for curve in profile.InnerCurves:
+                inner_points = _curve_points(curve)
+                inners.append(_polygon(inner_points) if inner_points else None)
+            return _with_voids(outer, inners)
+        return outer
+    return None
+
+
+# ----------------------------------------------------------------
+# Solids (3D, in the coordinate system of the representation item)
+# ----------------------------------------------------------------
+
+# Each solid evaluator returns a dict with "Volume", "Area", "Largest Face Area" (None for curved solids)
+# and "Points" (3D points that enclose the solid)
+
+def extruded_area_solid(item):
+    profile = profile_properties(item.SweptArea)
+    if profile is None:
+        return None
+
+    direction = direction_vector(item.ExtrudedDirection, [0.0, 0.0, 1.0])
+    depth = item.Depth
+    sweep = [direction[i] * depth for i in range(3)]
+    cos_angle = abs(direction[2])
+    if depth <= 0 or cos_angle == 0:
+        return None
+
+    volume = profile["Area"] * depth * cos_angle
+    largest_face = None
+    if profile["Edges"] is not None:
+        # Side faces are parallelograms spanned by the profile edge and the sweep vector
+        side_faces = [
+            math.sqrt(
+                (ey * sweep[2]) ** 2 + (ex * sweep[2]) ** 2 + (ex * sweep[1] - ey * sweep[0]) ** 2
+            )
+            for ex, ey in profile["Edges"]
+        ]
+        area = 2 * profile["Area"] + sum(side_faces)
+        largest_face = max([profile["Area"]] + side_faces)
+    elif cos_angle > 0.999999:
+        area = 2 * profile["Area"] + profile["Perimeter"] * depth
+    else:
+        return None  # Oblique extrusion of a curved profile
+
+    points = []
+    for x, y in profile["Points"]:
+        points.append([x, y, 0.0])
+        points.append([x + sweep[0], y + sweep[1], sweep[2]])
+
+    transform = _placement_transform(getattr(item, "Position", None))
+    return {
+        "Volume": volume,
+        "Area": area,
+        "Largest Face Area": largest_face,
+        "Points": [_apply(transform, point) for point in points]
+    }
+
+
+def revolved_area_solid(item, angle_factor):
+    profile = profile_properties(item.SweptArea)
+    if profile is None:
+        return None
+
+    axis = item.Axis
+    origin = _point(axis.Location)
+    axis_direction = direction_vector(getattr(axis, "Axis", None), [0.0, 1.0, 0.0])
+    angle = item.Angle * angle_factor
+    if angle <= 0:
+        return None
+    angle = min(angle, 2 * math.pi)
+
+    # Pappus: distance of the area (and perimeter) centroid to the axis of revolution
+    def distance_to_axis(point):
+        dx, dy = point[0] - origin[0], point[1] - origin[1]
+        return abs(dx * axis_direction[1] - dy * axis_direction[0])
+
+    volume = profile["Area"] * angle * distance_to_axis(profile["Centroid"])
+    area = profile["Perimeter"] * angle * distance_to_axis(profile["Perimeter Centroid"])
+    if angle < 2 * math.pi - 1e-9:
+        area += 2 * profile["Area"]
+
+    # Sample the revolution of the outline points for the bounding box (Rodrigues rotation)
+    ux, uy, uz = axis_direction
+    points = []
+    for step in range(REVOLUTION_SAMPLES + 1):
+        theta = angle * step / REVOLUTION_SAMPLES
+        cos_t, sin_t = math.cos(theta), math.sin(theta)
+        for x, y in profile["Points"]:
+            vx, vy, vz = x - origin[0], y - origin[1], -origin[2]
+            dot = ux * vx + uy * vy + uz * vz
+            cx, cy, cz = uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+            points.append([
+                vx * cos_t + cx * sin_t + ux * dot * (1 - cos_t) + origin[0],
+                vy * cos_t + cy * sin_t + uy * dot * (1 - cos_t) + origin[1],
+                vz * cos_t + cz * sin_t + uz * dot * (1 - cos_t) + origin[2]
+            ])
+
+    transform = _placement_transform(getattr(item, "Position", None))
+    return {
+        "Volume": volume,
+        "Area": area,
+        "Largest Face Area": None,
+        "Points": [_apply(transform, point) for point in points]
+    }
+
+
+def csg_primitive(item):
+    if item.is_a("IfcBlock"):
+        x, y, z = item.XLength, item.YLength, item.ZLength
+        volume = x * y * z
+        faces = [x * y, x * z, y * z]
+        area = 2 * sum(faces)
+        largest_face = max(faces)
+        points = [[px, py, pz] for px in (0.0, x) for py in (0.0, y) for pz in (0.0, z)]
+    elif item.is_a("IfcRectangularPyramid"):
+        x, y, h = item.XLength, item.YLength, item.Height
+        volume = x * y * h / 3
+        side_x = x * math.sqrt(h ** 2 + (y / 2) ** 2) / 2
+        side_y = y * math.sqrt(h ** 2 + (x / 2) ** 2) / 2
+        area = x * y + 2 * side_x + 2 * side_y
+        largest_face = max(x * y, side_x, side_y)
+        points = [[0.0, 0.0, 0.0], [x, 0.0, 0.0], [0.0, y, 0.0], [x, y, 0.0], [x / 2, y / 2, h]]
+    elif item.is_a("IfcRightCircularCylinder"):
+        r, h = item.Radius, item.Height
+        volume = math.pi * r ** 2 * h
+        area = 2 * math.pi * r ** 2 + 2 * math.pi * r * h
+        largest_face = None
+        points = [[px, py, pz] for px in (-r, r) for py in (-r, r) for pz in (0.0, h)]
+    elif item.is_a("IfcRightCircularCone"):
+        r, h = item.BottomRadius, item.Height
+        volume = math.pi * r ** 2 * h / 3
+        area = math.pi * r ** 2 + math.pi * r * math.sqrt(r ** 2 + h ** 2)
+        largest_face = None
+        points = [[px, py, 0.0] for px in (-r, r) for py in (-r, r)] + [[0.0, 0.0, h]]
+    elif item.is_a("IfcSphere"):
+        r = item.Radius
+        volume = 4 / 3 * math.pi * r ** 3
+        area = 4 * math.pi * r ** 2
+        largest_face = None
+        points = [[px, py, pz] for px in (-r, r) for py in (-r, r) for pz in (-r, r)]
+    else:
+        return None
+
+    transform = _placement_transform(getattr(item, "Position", None))
+    return {
+        "Volume": volume,
+        "Area": area,
+        "Largest Face Area": largest_face,
+        "Points": [_apply(transform, point) for point in points]
+    }
+
+
+# Evaluates a representation item, returns a list of solids (None if the item needs OCC)
+def evaluate_item(item, angle_factor, transform=IDENTITY_TRANSFORM, scale=1.0):
+    name = _entity_name(item)
+    if name == "IfcMappedItem":
+        target = item.MappingTarget
+        scales = [getattr(target, name, None) for name in ("Scale", "Scale2", "Scale3")]
+        item_scale = scales[0] or 1.0
+        if any(value is not None and abs(value - item_scale) > 1e-9 for value in scales[1:]):
+            return None  # Non-uniform scaling changes the shape
+        zaxis = direction_vector(getattr(target, "Axis3", None), [0.0, 0.0, 1.0])
+        xref = direction_vector(getattr(target, "Axis1", None), [1.0, 0.0, 0.0])
+        origin = getattr(target, "LocalOrigin", None)
+        target_transform = (rotation_from_axes(zaxis, xref), _point(origin) if origin is not None else [0.0, 0.0, 0.0])
+        source = item.MappingSource
+        mapping = _compose(_scaled(target_transform, item_scale), _invert(_placement_transform(source.MappingOrigin)))
+        solids = []
+        for mapped_item in source.MappedRepresentation.Items:
+            evaluated = evaluate_item(mapped_item, angle_factor, _compose(transform, mapping), scale * item_scale)
+            if evaluated is None:
+                return None
+            solids.extend(evaluated)
+        return solids
+
+    if name == "IfcExtrudedAreaSolid":
+        solid = extruded_area_solid(item)
+    elif name == "IfcRevolvedAreaSolid":
+        solid = revolved_area_solid(item, angle_factor)
+    elif name == "IfcCsgSolid":
+        root = item.TreeRootExpression
+        solid = csg_primitive(root) if root.is_a("IfcCsgPrimitive3D") else None  # Boolean trees are left to OCC
+    elif item.is_a("IfcCsgPrimitive3D"):
+        solid = csg_primitive(item)
+    else:
+        solid = None
+
+    if solid is None:
+        return None
+    return [{
+        "Volume": solid["Volume"] * scale ** 3,
+        "Area": solid["Area"] * scale ** 2,
+        "Largest Face Area": solid["Largest Face Area"] * scale ** 2 if solid["Largest Face Area"] is not None else None,
+        "Points": [_apply(transform, point) for point in solid["Points"]]
+    }]
+
+
+# ----------------------------------------------------------------
+# Element level
+# ----------------------------------------------------------------
+
+# Returns geometry data in the same layout as compute_brep_geometry_data (without tessellation counts),
+# or None if the element has to be evaluated with OCC
+def compute_analytic_geometry_data(element, rel_index, lc_factor, angle_factor=1.0):
+    try:
+        # Openings are subtracted from the body by OCC
+        if related(rel_index, "voids", element):
+            return None
+
+        solids = []
+        for representation in body_representations(element):
+            for item in representation.Items or []:
+                evaluated = evaluate_item(item, angle_factor)
+                if evaluated is None:
+                    return None
+                solids.extend(evaluated)
+        if not solids:
+            return None
+
+        volume = sum(solid["Volume"] for solid in solids) * (lc_factor ** 3)
+        area = sum(solid["Area"] for solid in solids) * (lc_factor ** 2)
+        quantities = {
+            "Net Volume": round(volume, 4),
+            "Net Volume unit": "CUBIC_METRE",
+            "Entire Surface Area": round(area, 4),
+            "Entire Surface Area unit": "SQUARE_METRE"
+        }
+        # The largest planar face is only known if the element is a single solid with planar faces
+        if len(solids) == 1 and solids[0]["Largest Face Area"] is not None:
+            quantities["Largest Face Area"] = round(solids[0]["Largest Face Area"] * (lc_factor ** 2), 4)
+            quantities["Largest Face Area unit"] = "SQUARE_METRE"
+
+        # Bounding box in the object coordinate system, oriented by the object placement
+        points = [point for solid in solids for point in solid["Points"]]
+        sizes = [max(p[i] for p in points) - min(p[i] for p in points) for i in range(3)]
+        rotation = object_placement_rotation(getattr(element, "ObjectPlacement", None))
+        axes = [[rotation[row][col] for row in range(3)] for col in range(3)]
+        frame = {"Axes": axes, "Sizes": sizes}
+
+        geometry_data = {}
+        geometry_data["Quantities (Analytic)"] = quantities
+        obb_dimensions = dimensions_from_frame(frame, lc_factor)
+        geometry_data["Bounding Box Dimensions (OBB - local frame)"] = obb_dimensions
+        obb_volume = bounding_box_volume(obb_dimensions)
+        geometry_data["Bounding Box Volume"] = obb_volume
+        geometry_data["Real Volume to Bounding Box Volume Ratio"] = round(volume / obb_volume, 4) if obb_volume else None
+        geometry_data["Primary Object Axis (Cardinal Direction)"] = cardinal_direction(axes[0][0], axes[0][1])
+        return geometry_data
+    except Exception:
+        return None
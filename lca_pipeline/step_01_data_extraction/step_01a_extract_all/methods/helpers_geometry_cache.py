@@ -0,0 +1,209 @@
+import math
+from .helpers_index import entity_key, related
+from .helpers_geometry import reorient_geometry_data
+
+# ----------------------------------------------------------------
+# Geometry cache for shared (mapped) representations
+# ----------------------------------------------------------------
+
+# Doors, windows, furniture etc. usually reference the same IfcRepresentationMap through an IfcMappedItem.
+# Their tessellation, volume, area and OBB extents are identical, only the placement differs.
+# Elements are grouped by a key built from the shared representation (MappingSource) and the scale of the
+# MappingTarget. Only the first element of every group is sent to the BREP workers, the other members reuse
+# its result and only get the axis-dependent fields (OBB dimension order, cardinal direction) recomputed.
+
+IDENTITY = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]
+
+
+# Tuple of the scale factors of a cartesian transformation operator (rounded to avoid float noise)
+def operator_scale(operator):
+    if operator is None:
+        return (1.0, 1.0, 1.0)
+    scale = getattr(operator, "Scale", None) or 1.0
+    scale2 = getattr(operator, "Scale2", None) or scale
+    scale3 = getattr(operator, "Scale3", None) or scale
+    return (round(scale, 6), round(scale2, 6), round(scale3, 6))
+
+
+# Body representations of an element (falls back to all representations if none is tagged as "Body")
+def body_representations(element):
+    product_shape = getattr(element, "Representation", None)
+    if product_shape is None:
+        return []
+    representations = list(product_shape.Representations or [])
+    body = [rep for rep in representations if getattr(rep, "RepresentationIdentifier", None) == "Body"]
+    return body if body else representations
+
+
+# Returns the cache key of an element, or None if its geometry cannot be shared with other elements
+def representation_key(element, rel_index):
+    try:
+        # Openings are subtracted from the body, so voided elements have individual geometry
+        if related(rel_index, "voids", element):
+            return None
+
+        parts = []
+        has_mapped_item = False
+        for representation in body_representations(element):
+            for item in representation.Items or []:
+                if item.is_a("IfcMappedItem"):
+                    has_mapped_item = True
+                    parts.append(("Mapped", entity_key(item.MappingSource), operator_scale(item.MappingTarget)))
+                else:
+                    parts.append(("Item", entity_key(item), operator_scale(None)))
+
+        # Without a mapped item, the representation is not shared
+        if not has_mapped_item:
+            return None
+        return tuple(parts)
+    except Exception:
+        return None
+
+
+def _normalize(vector):
+    length = math.sqrt(sum(c * c for c in vector))
+    if length == 0:
+        return None
+    return [c / length for c in vector]
+
+
+def _cross(a, b):
+    return [a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0]]
+
+
+# Normalized 3D vector of an IfcDirection (2D directions get z = 0)
+def direction_vector(direction, default):
+    if direction is None:
+        return default
+    ratios = list(direction.DirectionRatios)
+    while len(ratios) < 3:
+        ratios.append(0.0)
+    return _normalize(ratios) or default
+
+
+# Rotation matrix (columns = local x, y, z axes) from a z-axis and an x reference direction
+def rotation_from_axes(zaxis, xref):
+    # Remove the z component of the reference direction
+    dot = sum(xref[i] * zaxis[i] for i in range(3))
+    xaxis = _normalize([xref[i] - dot * zaxis[i] for i in range(3)])
+    if xaxis is None:
+        xaxis = [1.0, 0.0, 0.0] if abs(zaxis[0]) < 0.9 else [0.0, 1.0, 0.0]
+        dot = sum(xaxis[i] * zaxis[i] for i in range(3))
+        xaxis = _normalize([xaxis[i] - dot * zaxis[i] for i in range(3)])
+    yaxis = _cross(zaxis, xaxis)
+    return [[xaxis[row], yaxis[row], zaxis[row]] for row in range(3)]
+
+
+def _multiply(a, b):
+    return [[sum(a[row][k] * b[k][col] for k in range(3)) for col in range(3)] for row in range(3)]
+
+
+def _transpose(a):
+    return [[a[col][row] for col in range(3)] for row in range(3)]
+
+
+# Rotation of an IfcAxis2Placement2D / IfcAxis2Placement3D
+def _axis_placement_rotation(placement):
+    if placement is None:
+        return IDENTITY
+    zaxis = direction_vector(getattr(placement, "Axis", None), [0.0, 0.0, 1.0])
+    xref = direction_vector(getattr(placement, "RefDirection", None), [1.0, 0.0, 0.0])
+    return rotation_from_axes(zaxis, xref)
+
+
+# Absolute rotation of an IfcLocalPlacement chain
+def object_placement_rotation(placement):
+    rotation = IDENTITY
+    visited = set()
+    while placement is not None and placement.is_a("IfcLocalPlacement"):
+        key = entity_key(placement)
+        if key in visited:
+            break
+        visited.add(key)
+        rotation = _multiply(_axis_placement_rotation(placement.RelativePlacement), rotation)
+        placement = getattr(placement, "PlacementRelTo", None)
+    return rotation
+
+
+# Rotation of the MappingTarget of an IfcMappedItem (scale is part of the cache key, not of the rotation)
+def _mapping_target_rotation(operator):
+    if operator is None:
+        return IDENTITY
+    zaxis = direction_vector(getattr(operator, "Axis3", None), [0.0, 0.0, 1.0])
+    xref = direction_vector(getattr(operator, "Axis1", None), [1.0, 0.0, 0.0])
+    return rotation_from_axes(zaxis, xref)
+
+
+# World rotation of the shared geometry of an element (object placement x mapping target)
+def element_rotation(element):
+    try:
+        rotation = object_placement_rotation(getattr(element, "ObjectPlacement", None))
+        for representation in body_representations(element):
+            for item in representation.Items or []:
+                if item.is_a("IfcMappedItem"):
+                    origin = _axis_placement_rotation(getattr(item.MappingSource, "MappingOrigin", None))
+                    target = _mapping_target_rotation(item.MappingTarget)
+                    return _multiply(rotation, _multiply(target, _transpose(origin)))
+        return rotation
+    except Exception:
+        return None
+
+
+# Groups the elements by representation key
+# Returns the positions that have to be computed and, for every element, the position whose result it uses
+def plan_geometry_tasks(elements, rel_index):
+    representative_of = []
+    first_position = {}
+    task_positions = []
+    uncached = 0
+
+    for position, element in enumerate(elements):
+        key = representation_key(element, rel_index)
+        if key is None:
+            uncached += 1
+            representative_of.append(position)
+            task_positions.append(position)
+        elif key in first_position:
+            representative_of.append(first_position[key])
+        else:
+            first_position[key] = position
+            representative_of.append(position)
+            task_positions.append(position)
+
+    stats = {
+        "Cache Hits": len(elements) - len(task_positions),
+        "Cache Misses": len(first_position),
+        "Elements Without Shared Representation": uncached
+    }
+    return task_positions, representative_of, stats
+
+
+# Distributes the computed results to all elements, re-orienting cached results for every instance
+def expand_geometry_results(elements, task_positions, representative_of, task_results, lc_factor):
+    computed = dict(zip(task_positions, task_results))
+    rotations = {}
+
+    def rotation_of(position):
+        if position not in rotations:
+            rotations[position] = element_rotation(elements[position])
+        return rotations[position]
+
+    results = []
+    for position, representative in enumerate(representative_of):
+        source = computed[representative]
+        if representative == position or source["Status"] != "ok":
+            results.append(source)
+            continue
+
+        cached = dict(source)
+        cached["Seconds"] = 0.0
+        cached["Tessellation"] = None  # Not tessellated again
+        own_rotation, source_rotation = rotation_of(position), rotation_of(representative)
+        if own_rotation is not None and source_rotation is not None:
+            relative = _multiply(own_rotation, _transpose(source_rotation))
+            cached["Geometry"] = reorient_geometry_data(source["Geometry"], source["Frame"], relative, lc_factor)
+            if cached["Geometry"].get("Bounding Box Dimensions (OBB - local frame)"):
+                cached["OBB"] = cached["Geometry"]["Bounding Box Dimensions (OBB - local frame)"]
+        results.append(cached)
+
+    return results
@@ -0,0 +1,308 @@
+import numpy as np
+
+# ----------------------------------------------------------------
+# Vectorized tessellation statistics (NumPy)
+# ----------------------------------------------------------------
+
+# Works directly on the vertex / face arrays of the tessellation instead of the COMPAS mesh data structure.
+# For every mesh, a few array operations give:
+#   - vertex, face and (unique) edge counts
+#   - the tessellated surface area
+#   - an oriented bounding box from the area-weighted covariance of the surface (PCA)
+#     If two or three eigenvalues of the covariance are (nearly) equal, the principal axes in their plane are arbitrary
+#     (e.g. square columns, cubes). The box is then refined: around the distinct axis (or around the dominant face
+#     normals if all three are equal), the minimum-area rectangle of the convex hull of the projected vertices is used.
+#     Of the PCA box, the refined box and the axis-aligned box, the one with the smallest volume is kept.
+#   - the dominant-axis box dimensions and the cardinal direction (same rules as helpers_geometry)
+# The batched API concatenates many meshes and computes all of them at once (one eigen-decomposition call).
+
+# Upper bounds of the cardinal direction sectors (degrees, counter-clockwise from global X = East)
+CARDINAL_BOUNDS = [22.5, 67.5, 112.5, 157.5, 202.5, 247.5, 292.5, 337.5]
+CARDINAL_NAMES = ["E", "NE", "N", "NW", "W", "SW", "S", "SE", "E"]
+
+# Relative gap below which two covariance eigenvalues are treated as equal
+EIGENVALUE_TOLERANCE = 1e-2
+# Number of dominant face normals tried as box axis if all three eigenvalues are equal
+CANDIDATE_NORMALS = 16
+# Minimum length of the horizontal component of the x-axis for a cardinal direction
+HORIZONTAL_TOLERANCE = 1e-6
+# Relative tolerance when comparing box volumes and areas
+BOX_TOLERANCE = 1e-9
+
+# Order in which the OBB sizes are written as X, Y, Z depending on the OBB axis most aligned with global Z
+DOMINANT_AXIS_ORDER = np.array([
+    [1, 0, 2],  # dominant axis X
+    [0, 2, 1],  # dominant axis Y
+    [0, 1, 2]   # dominant axis Z
+])
+
+
+# Vertex and face lists of a COMPAS mesh
+def mesh_arrays(mesh):
+    vertices, faces = mesh.to_vertices_and_faces()
+    return np.asarray(vertices, dtype=float).reshape(-1, 3), faces
+
+
+# Triangles (fan triangulation) and unique undirected edges of a face list
+def _triangles_and_edges(faces):
+    lengths = np.fromiter((len(face) for face in faces), dtype=np.int64, count=len(faces))
+    if len(faces) == 0:
+        return np.empty((0, 3), dtype=np.int64), 0
+
+    if np.all(lengths == 3):
+        triangles = np.asarray(faces, dtype=np.int64)
+        flat = triangles.ravel()
+    else:
+        flat = np.fromiter((index for face in faces for index in face), dtype=np.int64, count=int(lengths.sum()))
+        triangles = np.asarray(
+            [(face[0], face[i], face[i + 1]) for face in faces for i in range(1, len(face) - 1)],
+            dtype=np.int64
+        ).reshape(-1, 3)
+
+    # Polygon edges: every vertex connects to the next one of its face (the last one to the first)
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    following = np.arange(1, len(flat) + 1)
+    following[ends - 1] = starts
+    edges = np.sort(np.stack([flat, flat[following]], axis=1), axis=1)
+    edge_count = len(np.unique(edges, axis=0))
+    return triangles, edge_count
+
+
+# Convex hull of 2D points (monotone chain), counter-clockwise
+def _convex_hull_2d(points):
+    points = [tuple(point) for point in np.unique(points, axis=0)]
+    if len(points) < 3:
+        return np.asarray(points, dtype=float)
+
+    def half(chain_points):
+        chain = []
+        for point in chain_points:
+            while len(chain) >= 2 and (
+                (chain[-1][0] - chain[-2][0]) * (point[1] - chain[-2][1])
+                - (chain[-1][1] - chain[-2][1]) * (point[0] - chain[-2][0])
+            ) <= 0:
+                chain.pop()
+            chain.append(point)
+        return chain
+
+    lower = half(points)
+    upper = half(reversed(points))
+    return np.asarray(lower[:-1] + upper[:-1], dtype=float)
+
+
+# Direction (2D unit vector) of one side of the minimum-area rectangle around a convex hull (rotating calipers: one
+# side of the optimal rectangle lies on a hull edge)
+def _min_area_rectangle_direction(hull):
+    edges = np.roll(hull, -1, axis=0) - hull
+    lengths = np.linalg.norm(edges, axis=1)
+    if len(hull) < 2 or not np.any(lengths > 0):
+        return np.array([1.0, 0.0])
+    directions = edges[lengths > 0] / lengths[lengths > 0, None]
+    normals = np.stack([-directions[:, 1], directions[:, 0]], axis=1)
+    along = hull @ directions.T
+    across = hull @ normals.T
+    areas = (along.max(axis=0) - along.min(axis=0)) * (across.max(axis=0) - across.min(axis=0))
+    return directions[np.argmin(areas)]
+
+
+# Box axes (rows) with one axis along the given direction and the minimum-area rectangle in the plane orthogonal to it
+def _box_around_axis(points, axis):
+    axis = axis / np.linalg.norm(axis)
+    helper = np.eye(3)[np.argmin(np.abs(axis))]
+    u = np.cross(axis, helper)
+    u /= np.linalg.norm(u)
+    v = np.cross(axis, u)
+    direction = _min_area_rectangle_direction(_convex_hull_2d(points @ np.stack([u, v]).T))
+    first = direction[0] * u + direction[1] * v
+    return np.stack([first, np.cross(axis, first), axis])
+
+
+# Dominant face normals of a mesh (unique up to sign, largest total area first)
+def _dominant_normals(normals):
+    lengths = np.linalg.norm(normals, axis=1)
+    normals = normals[lengths > 0] / lengths[lengths > 0, None]
+    weights = lengths[lengths > 0]
+    if len(normals) == 0:
+        return normals
+    largest = np.take_along_axis(normals, np.argmax(np.abs(normals), axis=1)[:, None], axis=1)
+    normals = normals * np.where(largest < 0, -1.0, 1.0)
+    unique, inverse = np.unique(np.round(normals, 6), axis=0, return_inverse=True)
+    totals = np.bincount(inverse.ravel(), weights=weights, minlength=len(unique))
+    return unique[np.argsort(-totals, kind="stable")[:CANDIDATE_NORMALS]]
+
+
+# Whether box a (sizes) is smaller than box b: smaller volume, or the same volume and a smaller surface (flat meshes)
+def _smaller_box(sizes_a, sizes_b):
+    volume_a, volume_b = np.prod(sizes_a, axis=-1), np.prod(sizes_b, axis=-1)
+    area_a = sizes_a[..., 0] * sizes_a[..., 1] + sizes_a[..., 1] * sizes_a[..., 2] + sizes_a[..., 0] * sizes_a[..., 2]
+    area_b = sizes_b[..., 0] * sizes_b[..., 1] + sizes_b[..., 1] * sizes_b[..., 2] + sizes_b[..., 0] * sizes_b[..., 2]
+    return (volume_a < volume_b * (1 - BOX_TOLERANCE)) | (
+        (volume_a <= volume_b * (1 + BOX_TOLERANCE)) & (area_a < area_b * (1 - BOX_TOLERANCE))
+    )
+
+
+# Box frame with the axes sorted by extent (largest first), signs as for the PCA frame, right-handed
+def _canonical_box(axes, sizes):
+    order = np.argsort(-sizes, kind="stable")
+    axes, sizes = axes[order].copy(), sizes[order]
+    for row in range(2):
+        if axes[row, np.argmax(np.abs(axes[row]))] < 0:
+            axes[row] *= -1.0
+    axes[2] = np.cross(axes[0], axes[1])
+    return axes, sizes
+
+
+# Refines the box of a mesh whose covariance has (nearly) equal eigenvalues (eigenvalues in descending order)
+# Returns the refined (axes, sizes) or None if the current box is the smallest
+def _refine_box(points, normals, axes, eigenvalues, sizes):
+    equal_first = eigenvalues[0] - eigenvalues[1] <= EIGENVALUE_TOLERANCE * eigenvalues[0]
+    equal_second = eigenvalues[1] - eigenvalues[2] <= EIGENVALUE_TOLERANCE * eigenvalues[1]
+    if equal_first and equal_second:
+        candidate_axes = list(_dominant_normals(normals)) + list(axes)
+    elif equal_first:
+        candidate_axes = [axes[2]]
+    elif equal_second:
+        candidate_axes = [axes[0]]
+    else:
+        return None
+
+    best = None
+    for axis in candidate_axes:
+        box_axes = _box_around_axis(points, axis)
+        projected = points @ box_axes.T
+        box_sizes = projected.max(axis=0) - projected.min(axis=0)
+        if _smaller_box(box_sizes, sizes if best is None else best[1]):
+            best = (box_axes, box_sizes)
+    return None if best is None else _canonical_box(*best)
+
+
+# Statistics of many meshes at once
+# meshes: list of (vertices, faces) tuples, e.g. from mesh_arrays()
+def batch_mesh_statistics(meshes, length_conversion_factor=1.0):
+    results = [None] * len(meshes)
+
+    vertex_blocks, triangle_blocks, triangle_mesh, vertex_mesh, valid = [], [], [], [], []
+    offset = 0
+    for position, (vertices, faces) in enumerate(meshes):
+        vertices = np.asarray(vertices, dtype=float).reshape(-1, 3)
+        triangles, edge_count = _triangles_and_edges(faces)
+        if len(vertices) == 0 or len(triangles) == 0:
+            continue
+        slot = len(valid)
+        valid.append((position, len(vertices), len(faces), edge_count))
+        vertex_blocks.append(vertices)
+        triangle_blocks.append(triangles + offset)
+        triangle_mesh.append(np.full(len(triangles), slot))
+        vertex_mesh.append(np.full(len(vertices), slot))
+        offset += len(vertices)
+
+    if not valid:
+        return results
+
+    count = len(valid)
+    vertices = np.concatenate(vertex_blocks)
+    triangles = np.concatenate(triangle_blocks)
+    triangle_mesh = np.concatenate(triangle_mesh)
+    vertex_mesh = np.concatenate(vertex_mesh)
+
+    # Triangle areas and centroids
+    p, q, r = vertices[triangles[:, 0]], vertices[triangles[:, 1]], vertices[triangles[:, 2]]
+    normals = np.cross(q - p, r - p)
+    areas = 0.5 * np.linalg.norm(normals, axis=1)
+    centroids = (p + q + r) / 3.0
+    mesh_areas = np.bincount(triangle_mesh, weights=areas, minlength=count)
+
+    # Area-weighted covariance of the surface (continuous over each triangle)
+    second_moments = (
+        9.0 * np.einsum("ti,tj->tij", centroids, centroids)
+        + np.einsum("ti,tj->tij", p, p)
+        + np.einsum("ti,tj->tij", q, q)
+        + np.einsum("ti,tj->tij", r, r)
+    ) * (areas / 12.0)[:, None, None]
+    moment_sums = np.zeros((count, 3, 3))
+    np.add.at(moment_sums, triangle_mesh, second_moments)
+    center_sums = np.zeros((count, 3))
+    np.add.at(center_sums, triangle_mesh, centroids * areas[:, None])
+
+    # Meshes without area (degenerate) fall back to the plain vertex covariance
+    safe_areas = np.where(mesh_areas > 0, mesh_areas, 1.0)
+    centers = center_sums / safe_areas[:, None]
+    covariance = moment_sums / safe_areas[:, None, None] - np.einsum("mi,mj->mij", centers, centers)
+    degenerate = mesh_areas <= 0
+    if np.any(degenerate):
+        vertex_counts = np.bincount(vertex_mesh, minlength=count)
+        vertex_sums = np.zeros((count, 3))
+        np.add.at(vertex_sums, vertex_mesh, vertices)
+        vertex_centers = vertex_sums / vertex_counts[:, None]
+        centered = vertices - vertex_centers[vertex_mesh]
+        vertex_covariance = np.zeros((count, 3, 3))
+        np.add.at(vertex_covariance, vertex_mesh, np.einsum("vi,vj->vij", centered, centered))
+        covariance[degenerate] = vertex_covariance[degenerate] / vertex_counts[degenerate, None, None]
+
+    # Principal axes (largest variance first), right-handed frame
+    eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+    eigenvalues = np.maximum(eigenvalues[:, ::-1], 0.0)
+    axes = np.transpose(eigenvectors[:, :, ::-1], (0, 2, 1))  # rows = x, y, z axes
+    # Eigenvector signs are arbitrary: the largest component of the x- and y-axis is made positive
+    largest = np.take_along_axis(axes[:, :2], np.argmax(np.abs(axes[:, :2]), axis=2)[:, :, None], axis=2)
+    axes[:, :2] *= np.where(largest < 0, -1.0, 1.0)
+    axes[:, 2] = np.cross(axes[:, 0], axes[:, 1])
+
+    # Box extents along the principal axes
+    projected = np.einsum("vi,vji->vj", vertices, axes[vertex_mesh])
+    boundaries = np.concatenate([[0], np.cumsum([block[1] for block in valid])[:-1]])
+    sizes = np.maximum.reduceat(projected, boundaries, axis=0) - np.minimum.reduceat(projected, boundaries, axis=0)
+
+    # Axis-aligned box, if it is smaller than the PCA box
+    aabb_sizes = np.maximum.reduceat(vertices, boundaries, axis=0) - np.minimum.reduceat(vertices, boundaries, axis=0)
+    for slot in np.flatnonzero(_smaller_box(aabb_sizes, sizes)):
+        axes[slot], sizes[slot] = _canonical_box(np.eye(3), aabb_sizes[slot])
+
+    # Refined box for meshes with (nearly) equal eigenvalues
+    triangle_boundaries = np.concatenate([[0], np.cumsum([len(block) for block in triangle_blocks])])
+    vertex_boundaries = np.concatenate([boundaries, [len(vertices)]])
+    relative_gaps = (eigenvalues[:, :2] - eigenvalues[:, 1:]) / np.maximum(eigenvalues[:, :2], np.finfo(float).tiny)
+    for slot in np.flatnonzero(np.any(relative_gaps <= EIGENVALUE_TOLERANCE, axis=1) & (eigenvalues[:, 0] > 0)):
+        refined = _refine_box(
+            vertices[vertex_boundaries[slot]:vertex_boundaries[slot + 1]],
+            normals[triangle_boundaries[slot]:triangle_boundaries[slot + 1]],
+            axes[slot], eigenvalues[slot], sizes[slot]
+        )
+        if refined is not None:
+            axes[slot], sizes[slot] = refined
+
+    # Dominant axis (most aligned with global Z) and box dimensions
+    dominant = np.argmax(np.abs(axes[:, :, 2]), axis=1)
+    dimensions = np.take_along_axis(sizes, DOMINANT_AXIS_ORDER[dominant], axis=1) * length_conversion_factor
+
+    # Cardinal direction of the x-axis
+    angles = (np.degrees(np.arctan2(axes[:, 0, 1], axes[:, 0, 0])) + 360) % 360
+    sectors = np.searchsorted(CARDINAL_BOUNDS, angles, side="left")
+    horizontal = np.hypot(axes[:, 0, 0], axes[:, 0, 1]) > HORIZONTAL_TOLERANCE
+
+    area_factor = length_conversion_factor ** 2
+    for slot, (position, vertex_count, face_count, edge_count) in enumerate(valid):
+        results[position] = {
+            "Vertex Count": int(vertex_count),
+            "Face Count": int(face_count),
+            "Edge Count": int(edge_count),
+            "Surface Area": round(float(mesh_areas[slot]) * area_factor, 4),
+            "Frame": {
+                "Axes": axes[slot].tolist(),
+                "Sizes": sizes[slot].tolist()
+            },
+            "Bounding Box Dimensions": {
+                "X": round(float(dimensions[slot, 0]), 2),
+                "Y": round(float(dimensions[slot, 1]), 2),
+                "Z": round(float(dimensions[slot, 2]), 2),
+                "Bounding Box Dimensions Unit": "METRE"
+            },
+            "Cardinal Direction": CARDINAL_NAMES[sectors[slot]] if horizontal[slot] else "Undefined"
+        }
+    return results
+
+
+# Statistics of a single mesh (None if the mesh has no faces)
+def mesh_statistics(vertices, faces, length_conversion_factor=1.0):
+    return batch_mesh_statistics([(vertices, faces)], length_conversion_factor)[0]
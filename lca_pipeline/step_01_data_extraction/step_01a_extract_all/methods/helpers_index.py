@@ -0,0 +1,67 @@
+# ----------------------------------------------------------------
+# Inverse relationship index (built once per model)
+# ----------------------------------------------------------------
+
+# Every helper used to scan all relationship entities of a kind for each element (O(elements x relationships)).
+# The index is built in a single pass over each relationship type right after the model is loaded,
+# and maps the id of the indexed object to the list of relationships it takes part in.
+# Relationships are appended in model order, so helpers iterating the index see the same order as before.
+
+# (index key, IFC relationship entity, attribute holding the indexed object(s))
+RELATIONSHIP_INDEX_SPEC = [
+    ("property_definitions", "IfcRelDefinesByProperties", "RelatedObjects"),
+    ("types", "IfcRelDefinesByType", "RelatedObjects"),
+    ("materials", "IfcRelAssociatesMaterial", "RelatedObjects"),
+    ("classifications", "IfcRelAssociatesClassification", "RelatedObjects"),
+    ("containers", "IfcRelContainedInSpatialStructure", "RelatedElements"),
+    ("decomposes", "IfcRelAggregates", "RelatedObjects"),
+    ("is_decomposed_by", "IfcRelAggregates", "RelatingObject"),
+    ("nests", "IfcRelNests", "RelatingObject"),
+    ("is_nested_by", "IfcRelNests", "RelatedObjects"),
+    ("covers", "IfcRelCoversBldgElements", "RelatedCoverings"),
+    ("is_covered_by", "IfcRelCoversBldgElements", "RelatingBuildingElement"),
+    ("voids", "IfcRelVoidsElement", "RelatingBuildingElement"),
+    ("groups", "IfcRelAssignsToGroup", "RelatedObjects"),
+]
+
+
+# Returns the key under which an entity is stored in the index (its STEP id)
+def entity_key(entity):
+    try:
+        return entity.id()
+    except Exception:
+        return None
+
+
+# Builds the relationship index for the whole model
+def build_relationship_index(model):
+    rel_index = {key: {} for key, _, _ in RELATIONSHIP_INDEX_SPEC}
+
+    # Some relationship types feed several index keys, so only fetch them once
+    relationships_by_type = {}
+
+    for key, ifc_type, attribute in RELATIONSHIP_INDEX_SPEC:
+        if ifc_type not in relationships_by_type:
+            relationships_by_type[ifc_type] = model.get_entities_by_type(ifc_type) or []
+
+        lookup = rel_index[key]
+        for rel in relationships_by_type[ifc_type]:
+            try:
+                indexed = getattr(rel, attribute, None)
+            except Exception:
+                continue
+            if indexed is None:
+                continue
+            if not isinstance(indexed, (list, tuple)):
+                indexed = [indexed]
+            for obj in indexed:
+                obj_key = entity_key(obj)
+                if obj_key is not None:
+                    lookup.setdefault(obj_key, []).append(rel)
+
+    return rel_index
+
+
+# Returns all relationships of the given index key that reference the element (empty list if none)
+def related(rel_index, key, element):
+    return rel_index[key].get(entity_key(element), [])
@@ -1,16 +1,17 @@
 from compas_ifc.model import Model
 import os
 import re
-import json
 import yaml
 from pathlib import Path
+from .json_io import write_json
 
 # Function to load an IFC file using COMPAS-IFC
-def load_ifc_file(filepath):
+# Without BREP geometry (use_occ=False), the OCC machinery is not started
+def load_ifc_file(filepath, use_occ=True):
     if not os.path.exists(filepath):
         raise FileNotFoundError(f"The file '{filepath}' does not exist.")
     try:
-        model = Model(filepath, use_occ=True)  # COMPAS-IFC Model class
+        model = Model(filepath, use_occ=use_occ)  # COMPAS-IFC Model class
         return model
     except Exception as e:
         raise RuntimeError(f"Failed to load IFC file: {e}")
@@ -37,8 +38,21 @@ def save_individual_json(element_data, output_directory, element_name):
     filename = f"{sanitized_name}.json"
     filepath = os.path.join(output_directory, filename)
     # Write JSON file
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(element_data, f, indent=4, ensure_ascii=False)
+    write_json(element_data, filepath)
+    return filepath
+
+# Model-wide data (storeys, spatial hierarchy, units) is stored once in a sidecar file next to the BoQ.
+# Element data sheets only hold a reference ({"Model Context": <key>}), which is resolved by the filter / prompt builders.
+MODEL_CONTEXT_FILENAME = "model_context.json"
+
+def model_context_reference(key):
+    return {"Model Context": key}
+
+def save_model_context(model_context, output_directory):
+    os.makedirs(output_directory, exist_ok=True)
+    filepath = os.path.join(output_directory, MODEL_CONTEXT_FILENAME)
+    write_json(model_context, filepath)
+    return filepath
 
 # Recursively cleans dictionary data by removing unwanted values
 # At the top/root level, certain keys are preserved even if empty
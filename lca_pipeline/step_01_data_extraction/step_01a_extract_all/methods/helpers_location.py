@@ -1,3 +1,5 @@
+from .helpers_index import related
+
 # ----------------------------------------------------------------
 # Location determination methods (helpful for reinforcment ratio)
 # ----------------------------------------------------------------
@@ -32,7 +34,11 @@ def sorted_storey_map(model, lc_factor=1):
 
 
 
-def element_storey_name(element):
+def element_storey_name(element, rel_index=None, spatial_index=None):
+    # Precomputed lookup (see build_spatial_index)
+    if spatial_index is not None:
+        return element_spatial_entry(element, rel_index, spatial_index)["Storey"]
+
     ancestor = element.parent
     while ancestor:
         if ancestor.is_a("IfcBuildingStorey"):
@@ -42,10 +48,19 @@ def element_storey_name(element):
 
 
 
+# Returns the spatial parent of an IfcSpatialStructureElement (via IfcRelAggregates), or None
+def _aggregation_parent(entity, rel_index):
+    for rel in related(rel_index, "decomposes", entity):
+        return rel.RelatingObject
+    return None
+
+
 # This is a helper function to display the entire spatial hierarchy later for the IfcElements
 # Extracts the full spatial hierarchy and also returns a lookup dictionary
 # Maps each entity (storeys, buildings, sites, etc.) to its parent.
-def extract_spatial_hierarchy(model, lc_factor=1):
+# Parents are taken from the IfcRelAggregates decomposition, so multi-site / multi-building projects
+# are nested correctly (each entity type is only visited once).
+def extract_spatial_hierarchy(model, rel_index, lc_factor=1):
     hierarchy_tree = {}
     parent_lookup = {}  # Stores GlobalId -> Parent GlobalId
 
@@ -63,6 +78,13 @@ def extract_spatial_hierarchy(model, lc_factor=1):
     }
     parent_lookup[project.GlobalId] = None  # Root has no parent
 
+    # Parent GlobalId from the decomposition, with a fallback for models without aggregation relationships
+    def parent_id(entity, fallback):
+        parent = _aggregation_parent(entity, rel_index)
+        if parent is not None and getattr(parent, "GlobalId", None):
+            return parent.GlobalId
+        return fallback
+
     # Extract Sites
     sites = model.get_entities_by_type("IfcSite")
     for site in sites:
@@ -72,78 +94,123 @@ def extract_spatial_hierarchy(model, lc_factor=1):
             "GlobalId": getattr(site, "GlobalId", "Unknown"),
             "Children": []
         }
-        parent_lookup[site.GlobalId] = project.GlobalId
-
-        # Extract Buildings under Site
-        buildings = model.get_entities_by_type("IfcBuilding")
-        for building in buildings:
-            hierarchy_tree[building.GlobalId] = {
-                "IfcEntity": "IfcBuilding",
-                "Name": getattr(building, "Name", "Unnamed"),
-                "GlobalId": getattr(building, "GlobalId", "Unknown"),
-                "Children": []
+        parent_lookup[site.GlobalId] = parent_id(site, project.GlobalId)
+
+    # Extract Buildings under Site
+    default_site = sites[0].GlobalId if sites else project.GlobalId
+    buildings = model.get_entities_by_type("IfcBuilding")
+    for building in buildings:
+        hierarchy_tree[building.GlobalId] = {
+            "IfcEntity": "IfcBuilding",
+            "Name": getattr(building, "Name", "Unnamed"),
+            "GlobalId": getattr(building, "GlobalId", "Unknown"),
+            "Children": []
+        }
+        parent_lookup[building.GlobalId] = parent_id(building, default_site)
+
+    # Extract Storeys under Building
+    default_building = buildings[0].GlobalId if buildings else default_site
+    for storey in model.get_entities_by_type("IfcBuildingStorey"):
+        hierarchy_tree[storey.GlobalId] = {
+            "IfcEntity": "IfcBuildingStorey",
+            "Name": getattr(storey, "Name", "Unnamed"),
+            "GlobalId": getattr(storey, "GlobalId", "Unknown"),
+            "Elevation": get_storey_elevation(storey, lc_factor),
+            "Children": []  # Stores IfcSpaces (NEW)
+        }
+        parent_lookup[storey.GlobalId] = parent_id(storey, default_building)
+
+    # Extract Spaces under Storeys
+    spaces = model.get_entities_by_type("IfcSpace")
+    for space in spaces:
+        parent_storey = _aggregation_parent(space, rel_index)  # Get the parent structure
+        if parent_storey and parent_storey.is_a("IfcBuildingStorey"):
+            hierarchy_tree[space.GlobalId] = {
+                "IfcEntity": "IfcSpace",
+                "Name": getattr(space, "Name", "Unnamed"),
+                "GlobalId": getattr(space, "GlobalId", "Unknown"),
+                "CompositionType": getattr(space, "CompositionType", "Unknown"),
             }
-            parent_lookup[building.GlobalId] = site.GlobalId
-
-            # Extract Storeys under Building
-            if hasattr(building, "storeys") and building.storeys:
-                for storey in building.storeys:
-                    hierarchy_tree[storey.GlobalId] = {
-                        "IfcEntity": "IfcBuildingStorey",
-                        "Name": getattr(storey, "Name", "Unnamed"),
-                        "GlobalId": getattr(storey, "GlobalId", "Unknown"),
-                        "Elevation": get_storey_elevation(storey, lc_factor),
-                        "Children": []  # Stores IfcSpaces (NEW)
-                    }
-                    parent_lookup[storey.GlobalId] = building.GlobalId
-
-            # Extract Spaces under Storeys
-            spaces = model.get_entities_by_type("IfcSpace")
-            for space in spaces:
-                if hasattr(space, "Decomposes") and space.Decomposes:
-                    parent_storey = space.Decomposes()[0].RelatingObject  # Get the parent structure
-                    if parent_storey and parent_storey.is_a("IfcBuildingStorey"):
-                        hierarchy_tree[space.GlobalId] = {
-                            "IfcEntity": "IfcSpace",
-                            "Name": getattr(space, "Name", "Unnamed"),
-                            "GlobalId": getattr(space, "GlobalId", "Unknown"),
-                            "CompositionType": getattr(space, "CompositionType", "Unknown"),
-                        }
-                        parent_lookup[space.GlobalId] = parent_storey.GlobalId
-                        
-                        # Append IfcSpace under the correct IfcBuildingStorey
-                        if parent_storey.GlobalId in hierarchy_tree:
-                            hierarchy_tree[parent_storey.GlobalId]["Children"].append(hierarchy_tree[space.GlobalId])
+            parent_lookup[space.GlobalId] = parent_storey.GlobalId
+                
+            # Append IfcSpace under the correct IfcBuildingStorey
+            if parent_storey.GlobalId in hierarchy_tree:
+                hierarchy_tree[parent_storey.GlobalId]["Children"].append(hierarchy_tree[space.GlobalId])
 
     return hierarchy_tree, parent_lookup
 
 
+# ----------------------------------------------------------------
+# Spatial index (built once per model)
+# ----------------------------------------------------------------
+
+# Maps every spatial structure (by GlobalId) to its ancestor path and storey. Paths are computed once per
+# spatial structure and shared by all elements contained in it. Elements are resolved through their
+# IfcRelContainedInSpatialStructure container, or the container of the element they decompose.
+def build_spatial_index(hierarchy_tree, parent_lookup):
+    return {
+        "Hierarchy Tree": hierarchy_tree if isinstance(hierarchy_tree, dict) else {},
+        "Parent Lookup": parent_lookup,
+        "Paths": {},     # Spatial structure GlobalId -> ancestor path + storey
+        "Elements": {}   # Element id -> entry (container, storey, path)
+    }
+
+
+# Ancestor path (project -> ... -> structure) and storey name of a spatial structure (memoized)
+def _structure_entry(structure_id, spatial_index):
+    paths = spatial_index["Paths"]
+    if structure_id in paths:
+        return paths[structure_id]
+
+    hierarchy_tree = spatial_index["Hierarchy Tree"]
+    entity_data = hierarchy_tree.get(structure_id)
+    parent_id = spatial_index["Parent Lookup"].get(structure_id)
+    if parent_id and parent_id != structure_id:
+        parent_entry = _structure_entry(parent_id, spatial_index)
+        path, storey = list(parent_entry["Path"]), parent_entry["Storey"]
+    else:
+        path, storey = [], "Unknown"
+
+    if entity_data:
+        path.append({"name": entity_data["Name"], "type": entity_data["IfcEntity"]})
+        if entity_data["IfcEntity"] == "IfcBuildingStorey":
+            storey = entity_data["Name"]
+
+    paths[structure_id] = {"Path": path, "Storey": storey}
+    return paths[structure_id]
+
+
+# Container, storey and full ancestor path of an element (memoized per element)
+def element_spatial_entry(element, rel_index, spatial_index, _depth=0):
+    elements = spatial_index["Elements"]
+    element_key = element.id()
+    if element_key in elements:
+        return elements[element_key]
+
+    entry = {"Container": None, "Storey": "Unknown", "Path": []}
+    for rel in related(rel_index, "containers", element):
+        container = rel.RelatingStructure
+        structure_entry = _structure_entry(container.GlobalId, spatial_index)
+        entry = {"Container": container.GlobalId, "Storey": structure_entry["Storey"], "Path": structure_entry["Path"]}
+        break  # Assume one primary spatial containment
+    else:
+        # Parts of an assembly are usually not contained themselves, use the container of the assembly
+        for rel in related(rel_index, "decomposes", element):
+            if _depth < 20:
+                entry = element_spatial_entry(rel.RelatingObject, rel_index, spatial_index, _depth + 1)
+            break
+
+    elements[element_key] = entry
+    return entry
+
+
 # Function to extract spatial containment relationships using IfcRelContainedInSpatialStructure
 # IfcRelContainedInSpatialStructure defines the relationship where IfcElements are contained within spatial structures
 # like buildings, storeys, or spaces, establishing their physical location and organization.
-def extract_full_spatial_hierarchy(element, spatial_relationships, parent_lookup, hierarchy_tree):
+def extract_full_spatial_hierarchy(element, rel_index, spatial_index):
     """
     Traces the full spatial hierarchy from an IfcElement up to the IfcProject level
-    using the precomputed parent lookup dictionary.
+    using the precomputed spatial index.
     """
-    spatial_hierarchy = []
-
-    # Find the parent (e.g., a storey, building, etc.)
-    parent_id = None
-
-    for rel in spatial_relationships:
-        if element in rel.RelatedElements:
-            parent_id = rel.RelatingStructure.GlobalId  # Store GlobalId of parent
-            break  # Assume one primary spatial containment
-
-    # Traverse upwards using parent_lookup
-    while parent_id:
-        if parent_id in hierarchy_tree:
-            entity_data = hierarchy_tree[parent_id]
-            spatial_hierarchy.insert(0, {  # Insert at the beginning to maintain order
-                "name": entity_data["Name"],
-                "type": entity_data["IfcEntity"]
-            })
-        parent_id = parent_lookup.get(parent_id)  # Move to the next parent
-
-    return spatial_hierarchy if spatial_hierarchy else [{"name": "Unknown", "type": "Unknown"}]
\ No newline at end of file
+    spatial_hierarchy = element_spatial_entry(element, rel_index, spatial_index)["Path"]
+    return list(spatial_hierarchy) if spatial_hierarchy else [{"name": "Unknown", "type": "Unknown"}]
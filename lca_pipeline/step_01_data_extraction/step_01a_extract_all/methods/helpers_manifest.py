@@ -0,0 +1,220 @@
+import os
+import json
+import hashlib
+from .helpers_index import related
+from .json_io import read_json, write_json
+
+# ----------------------------------------------------------------
+# Extraction manifest for incremental re-extraction
+# ----------------------------------------------------------------
+
+# The manifest stores a content hash for each element (keyed by GlobalId) together with the file it was written to.
+# The hash covers the element attributes, its representation and placement, and every related entity the extractor reads
+# (see RELATED_ENTITY_SPEC): materials, property sets, type, classifications, container, aggregates, nests, coverings,
+# openings (including their representation and placement) and groups.
+# On a re-run with a new IFC revision, only new or changed elements are extracted again, removed elements
+# are deleted from the output directories, and the changed set is written to changed_elements.json.
+# If the model context or the extractor code changes, all elements are extracted again.
+# Hashing walks the whole element graph, so the manifest is only built in incremental mode and for the model snapshot.
+
+MANIFEST_FILENAME = "extraction_manifest.json"
+CHANGED_ELEMENTS_FILENAME = "changed_elements.json"
+
+# Attributes that change with every export without changing the element itself
+IGNORED_ATTRIBUTES = {"OwnerHistory"}
+
+
+# compas_ifc wraps the ifcopenshell entity, the hash works on the underlying instance
+def _raw(entity):
+    return getattr(entity, "_entity", entity)
+
+
+def _is_entity(value):
+    return hasattr(value, "is_a") and hasattr(value, "id")
+
+
+# Hash of an entity and everything it references (STEP ids are not part of the hash)
+# Shared sub-graphs (profiles, contexts, materials, ...) are only hashed once per run via the memo
+def _entity_hash(entity, memo):
+    entity = _raw(entity)
+    key = entity.id()
+    if key and key in memo:
+        return memo[key]
+    if key:
+        memo[key] = "cycle"  # Guards against (invalid) reference cycles
+
+    try:
+        info = entity.get_info(include_identifier=False, recursive=False)
+    except AttributeError:
+        info = {"type": entity.is_a(), "value": str(entity).split("=", 1)[-1]}
+
+    canonical = {
+        name: _value_hash(value, memo)
+        for name, value in info.items()
+        if name not in IGNORED_ATTRIBUTES
+    }
+    digest = hashlib.sha256(json.dumps(canonical, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    if key:
+        memo[key] = digest
+    return digest
+
+
+def _value_hash(value, memo):
+    if _is_entity(value):
+        return _entity_hash(value, memo)
+    if isinstance(value, (list, tuple)):
+        return [_value_hash(item, memo) for item in value]
+    if isinstance(value, float):
+        return round(value, 9)
+    return value
+
+
+# (hash key, relationship index key, attribute of the relationship holding the related entity or entities)
+# One entry per relationship the data sheet is built from (see helpers_index.RELATIONSHIP_INDEX_SPEC)
+RELATED_ENTITY_SPEC = [
+    ("Materials", "materials", "RelatingMaterial"),
+    ("Property Sets", "property_definitions", "RelatingPropertyDefinition"),
+    ("Type", "types", "RelatingType"),
+    ("Classifications", "classifications", "RelatingClassification"),
+    ("Container", "containers", "RelatingStructure"),
+    ("Decomposes", "decomposes", "RelatingObject"),
+    ("Is Decomposed By", "is_decomposed_by", "RelatedObjects"),
+    ("Nests", "nests", "RelatedObjects"),
+    ("Is Nested By", "is_nested_by", "RelatingObject"),
+    ("Covers", "covers", "RelatingBuildingElement"),
+    ("Is Covered By", "is_covered_by", "RelatedCoverings"),
+    ("Openings", "voids", "RelatedOpeningElement"),
+    ("Groups", "groups", "RelatingGroup"),
+]
+
+# Relationships of the type object that end up in the data sheet (type materials and type classifications)
+TYPE_ENTITY_SPEC = [
+    ("Materials", "materials", "RelatingMaterial"),
+    ("Classifications", "classifications", "RelatingClassification"),
+]
+
+
+def _related_hashes(entity, rel_index, spec, memo):
+    parts = {}
+    for name, index_key, attribute in spec:
+        hashes = []
+        for rel in related(rel_index, index_key, entity):
+            value = getattr(rel, attribute, None)
+            if value is not None:
+                hashes.append(_value_hash(value, memo))
+        parts[name] = hashes
+    return parts
+
+
+# Content hash of an element (attributes, representation, placement and all related entities of RELATED_ENTITY_SPEC)
+def element_content_hash(element, rel_index, memo):
+    parts = {"Element": _entity_hash(element, memo)}
+    parts.update(_related_hashes(element, rel_index, RELATED_ENTITY_SPEC, memo))
+    parts["Type Relationships"] = [
+        _related_hashes(rel.RelatingType, rel_index, TYPE_ENTITY_SPEC, memo)
+        for rel in related(rel_index, "types", element)
+    ]
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+# Hash of the model-wide data that is written into every data sheet (storeys, spatial hierarchy, units)
+# If it changes, all elements have to be extracted again
+def model_context_hash(*context):
+    return hashlib.sha256(json.dumps(context, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+# Hash of the source code of the extraction modules (all modules of this package)
+# Data sheets written by another version of the extractor are outdated, even if the element itself did not change
+def extractor_code_hash():
+    digest = hashlib.sha256()
+    package_directory = os.path.dirname(os.path.abspath(__file__))
+    for filename in sorted(os.listdir(package_directory)):
+        if filename.endswith(".py"):
+            digest.update(filename.encode("utf-8"))
+            with open(os.path.join(package_directory, filename), "rb") as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def load_manifest(out_directory_boq):
+    manifest_path = os.path.join(out_directory_boq, MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        return read_json(manifest_path)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def save_manifest(out_directory_boq, manifest):
+    os.makedirs(out_directory_boq, exist_ok=True)
+    manifest_path = os.path.join(out_directory_boq, MANIFEST_FILENAME)
+    write_json(manifest, manifest_path, "internal")
+
+
+# Removes the manifest and the changed set of an earlier run (if they exist)
+def remove_manifest(out_directory_boq):
+    for filename in (MANIFEST_FILENAME, CHANGED_ELEMENTS_FILENAME):
+        path = os.path.join(out_directory_boq, filename)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+# Compares the current hashes with the previous manifest
+# Returns the GlobalIds of new, changed, unchanged and removed elements
+def compare_manifest(element_hashes, previous_manifest, context_hash, out_directory_boq):
+    previous_elements = previous_manifest.get("Elements", {}) if previous_manifest else {}
+
+    # With a changed model context, every element from the previous run is outdated
+    context_matches = bool(previous_manifest) and previous_manifest.get("Model Context Hash") == context_hash
+
+    new, changed, unchanged = [], [], []
+    for global_id, content_hash in element_hashes.items():
+        previous = previous_elements.get(global_id)
+        if previous is None:
+            new.append(global_id)
+        elif (
+            not context_matches
+            or previous.get("Hash") != content_hash
+            or not os.path.exists(os.path.join(out_directory_boq, previous.get("File", "")))
+        ):
+            changed.append(global_id)
+        else:
+            unchanged.append(global_id)
+
+    removed = [global_id for global_id in previous_elements if global_id not in element_hashes]
+    return new, changed, unchanged, removed
+
+
+# Loads the data sheet of a manifest entry (None if the file is missing or unreadable)
+def load_element_file(out_directory_boq, entry):
+    if not entry or not entry.get("File"):
+        return None
+    path = os.path.join(out_directory_boq, entry["File"])
+    try:
+        return read_json(path)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+# Deletes the output file of a manifest entry (if it still exists)
+def delete_element_file(out_directory_boq, entry):
+    if not entry or not entry.get("File"):
+        return
+    path = os.path.join(out_directory_boq, entry["File"])
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def save_changed_elements(out_directory_boq, new, changed, removed, unchanged_count, manifest_elements):
+    def describe(global_ids):
+        return [{"GlobalId": global_id, "File": manifest_elements.get(global_id, {}).get("File")} for global_id in global_ids]
+
+    changed_elements = {
+        "New": describe(new),
+        "Changed": describe(changed),
+        "Removed": [{"GlobalId": global_id} for global_id in removed],
+        "Unchanged": unchanged_count
+    }
+    path = os.path.join(out_directory_boq, CHANGED_ELEMENTS_FILENAME)
+    write_json(changed_elements, path, "report")
@@ -1,3 +1,6 @@
+from .helpers_index import related
+from .helpers_type_cache import type_objects, cached_type_value
+
 # This function filters the data dictionary to only include fields specified in the allowed_fields dictionary.
 def filter_fields(data_dict, allowed_fields):
     return {k: v for k, v in data_dict.items() if allowed_fields.get(k, False)}
@@ -50,19 +53,21 @@ def extract_material_layer_set_usage(layer_usage, length_conversion_factor):
 
 
 # Method to extract material assigned to the IfcTypeObject (e.g., IfcWallType) if the element itself has no material.
-def extract_material_from_type(element, material_relationships, type_relationships, length_conversion_factor):
+# The material of a type object is extracted once and then served from the type cache.
+def extract_material_from_type(element, rel_index, length_conversion_factor, type_cache=None):
     try:
 
-        for rel in type_relationships:
-            if element in rel.RelatedObjects:
-                type_object = rel.RelatingType  # This is IfcWallType, IfcSlabType, etc.
+        for type_object in type_objects(element, rel_index):  # IfcWallType, IfcSlabType, etc.
+
+            # check if the IfcTypeObject has a material assigned
+            type_materials = cached_type_value(
+                type_cache, type_object, "Materials",
+                lambda obj: extract_material_associations(obj, rel_index, length_conversion_factor)
+            )
 
-                # check if the IfcTypeObject has a material assigned
-                type_materials = extract_material_associations(type_object, material_relationships, type_relationships, length_conversion_factor)
-                
-                # If type has material, return it
-                if type_materials and type_materials != "Not defined":
-                    return type_materials
+            # If type has material, return it
+            if type_materials and type_materials != "Not defined":
+                return type_materials
 
         return "Not defined"  # No type-based materials found
 
@@ -72,39 +77,38 @@ def extract_material_from_type(element, material_relationships, type_relationshi
 
 
 # Extract full material data
-def extract_material_associations(element, material_relationships, type_relationships, length_conversion_factor):
+def extract_material_associations(element, rel_index, length_conversion_factor, type_cache=None):
     try:
         materials = []
 
-        for rel in material_relationships:
-            if element in rel.RelatedObjects:
-                relating_material = rel.RelatingMaterial
-
-                if relating_material.is_a("IfcMaterialLayerSetUsage"):
-                    material_entry = extract_material_layer_set_usage(relating_material, length_conversion_factor)
-                    material_entry["IfcEntity"] = "IfcMaterialLayerSetUsage"
-                    materials.append(material_entry)
-
-                elif relating_material.is_a("IfcMaterialLayerSet"):
-                    material_entry = {
-                        "IfcEntity": "IfcMaterialLayerSet",
-                        "Layers": extract_material_layers(relating_material, length_conversion_factor)
-                    }
-                    materials.append(material_entry)
-
-                elif relating_material.is_a("IfcMaterial"):
-                    material_entry = {
-                        "IfcEntity": "IfcMaterial",
-                        "Material Name": getattr(relating_material, "Name", "Unknown"),
-                        "Material Description": getattr(relating_material, "Description", "Unknown"),
-                        "Material Category": getattr(relating_material, "Category", "Unknown"),
-                        "Thickness": "Unknown",
-                        "Thickness unit": "Unknown"
-                    }
-                    materials.append(material_entry)
+        for rel in related(rel_index, "materials", element):
+            relating_material = rel.RelatingMaterial
+
+            if relating_material.is_a("IfcMaterialLayerSetUsage"):
+                material_entry = extract_material_layer_set_usage(relating_material, length_conversion_factor)
+                material_entry["IfcEntity"] = "IfcMaterialLayerSetUsage"
+                materials.append(material_entry)
+
+            elif relating_material.is_a("IfcMaterialLayerSet"):
+                material_entry = {
+                    "IfcEntity": "IfcMaterialLayerSet",
+                    "Layers": extract_material_layers(relating_material, length_conversion_factor)
+                }
+                materials.append(material_entry)
+
+            elif relating_material.is_a("IfcMaterial"):
+                material_entry = {
+                    "IfcEntity": "IfcMaterial",
+                    "Material Name": getattr(relating_material, "Name", "Unknown"),
+                    "Material Description": getattr(relating_material, "Description", "Unknown"),
+                    "Material Category": getattr(relating_material, "Category", "Unknown"),
+                    "Thickness": "Unknown",
+                    "Thickness unit": "Unknown"
+                }
+                materials.append(material_entry)
 
         if not materials:
-            return extract_material_from_type(element, material_relationships, type_relationships, length_conversion_factor)
+            return extract_material_from_type(element, rel_index, length_conversion_factor, type_cache)
 
         return materials if materials else "Not defined"
 
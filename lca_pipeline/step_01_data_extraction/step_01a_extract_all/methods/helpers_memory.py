@@ -0,0 +1,109 @@
+import gc
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ----------------------------------------------------------------
+# Memory monitoring for the memory-bounded extraction mode
+# ----------------------------------------------------------------
+
+# Resident set size (RSS) is read from /proc on Linux. Elsewhere psutil is used if it is installed.
+# max_rss_mb is a soft limit: the parsed model, the relationship index and the manifest stay in memory for the whole
+# run, so the RSS cannot be capped. The RSS is checked after each chunk; above the limit, the type object cache is
+# cleared and the chunk size is halved for the following chunks (BREP workers above the limit are recycled).
+# The peak RSS of a phase combines the RSS sampled at its start and end with the process high-water mark
+# (getrusage), which also catches short peaks inside the phase.
+
+
+# Current RSS of a process in MB (None if it cannot be determined)
+def rss_mb(pid=None):
+    status_path = f"/proc/{pid or 'self'}/status"
+    if os.path.exists(status_path):
+        try:
+            with open(status_path, "r") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            return None
+    try:
+        import psutil
+        return psutil.Process(pid or os.getpid()).memory_info().rss / (1024 * 1024)
+    except Exception:
+        return None
+
+
+# High-water mark of the RSS of this process in MB
+def peak_rss_mb():
+    if resource is None:
+        return rss_mb()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class MemoryMonitor:
+    """
+    Records the RSS per extraction phase and checks it against the configured soft limit (max_rss_mb = 0: no limit).
+    Phases that run several times (once per chunk) are merged.
+    """
+
+    def __init__(self, max_rss_mb=0):
+        self.max_rss_mb = max_rss_mb if max_rss_mb and max_rss_mb > 0 else None
+        self.phases = {}
+        self.limit_exceeded = 0
+
+    @contextmanager
+    def phase(self, name):
+        start_rss = rss_mb()
+        start_peak = peak_rss_mb()
+        start_time = time.time()
+        try:
+            yield
+        finally:
+            end_rss = rss_mb()
+            end_peak = peak_rss_mb()
+            sampled = [value for value in (start_rss, end_rss) if value is not None]
+            phase_peak = end_peak if end_peak is not None and start_peak is not None and end_peak > start_peak else None
+            if phase_peak is None and sampled:
+                phase_peak = max(sampled)
+
+            entry = self.phases.setdefault(name, {"Runs": 0, "Seconds": 0.0, "Peak RSS (MB)": None})
+            entry["Runs"] += 1
+            entry["Seconds"] += time.time() - start_time
+            if phase_peak is not None:
+                entry["Peak RSS (MB)"] = max(entry["Peak RSS (MB)"] or 0.0, phase_peak)
+
+    # True if the current RSS is above the limit (garbage is collected first)
+    def over_limit(self):
+        if self.max_rss_mb is None:
+            return False
+        gc.collect()
+        current = rss_mb()
+        if current is not None and current > self.max_rss_mb:
+            self.limit_exceeded += 1
+            return True
+        return False
+
+    def report(self, chunk_size=None, worker_peak_rss_mb=None, final_chunk_size=None):
+        return {
+            "Soft RSS Limit (MB)": self.max_rss_mb,
+            "Chunk Size": chunk_size,
+            "Final Chunk Size": final_chunk_size if final_chunk_size is not None else chunk_size,
+            "Limit Exceeded (chunks)": self.limit_exceeded,
+            "Peak RSS BREP Workers (MB)": round(worker_peak_rss_mb, 1) if worker_peak_rss_mb else None,
+            "Phases": {
+                name: {
+                    "Runs": entry["Runs"],
+                    "Seconds": round(entry["Seconds"], 2),
+                    "Peak RSS (MB)": round(entry["Peak RSS (MB)"], 1) if entry["Peak RSS (MB)"] is not None else None
+                }
+                for name, entry in self.phases.items()
+            }
+        }
@@ -1,3 +1,6 @@
+from .helpers_index import related
+from .helpers_type_cache import type_objects, cached_type_value
+
 def name(element):
     try:
         return element.Name
@@ -35,41 +38,59 @@ def description(element):
 # The relationship is used to assign a classification notation or a classification reference to objects.
 # If provided within the file, IfcRelAssociatesClassification links the IfcElement to standards like OmniClass.
 # Very useful for downstream applications, but is usually not provided in IFC files.
-def extract_classification_info(element, rel_classifications):
-    classifications = []
-    for rel in rel_classifications:
-        if element in rel.RelatedObjects:
-            classification_ref = rel.RelatingClassification
-            classification_data = {
-                "IfcEntity": type(classification_ref).__name__,
-                "Identification": getattr(classification_ref, "Identification", "Unknown"),
-                "System Name": getattr(getattr(classification_ref, "ReferencedSource", None), "Name", "Unknown"),
-                "Name": getattr(classification_ref, "Name", "Unknown")
-            }
-            classifications.append(classification_data)
+def extract_classification_info(element, rel_index, type_cache=None):
+    classifications = classification_references(element, rel_index)
+
+    # Classifications of the type object apply to all occurrences, unless the occurrence overrides the classification system
+    instance_systems = {classification["System Name"] for classification in classifications}
+    for type_object in type_objects(element, rel_index):
+        for classification in cached_type_value(type_cache, type_object, "Classification", lambda obj: classification_references(obj, rel_index)):
+            if classification["System Name"] not in instance_systems:
+                classifications.append(classification)
+
     if not classifications:
         return "Not defined"
     return classifications
 
 
+# Classification references directly associated with an element or type object
+def classification_references(obj, rel_index):
+    classifications = []
+    for rel in related(rel_index, "classifications", obj):
+        classification_ref = rel.RelatingClassification
+        classification_data = {
+            "IfcEntity": type(classification_ref).__name__,
+            "Identification": getattr(classification_ref, "Identification", "Unknown"),
+            "System Name": getattr(getattr(classification_ref, "ReferencedSource", None), "Name", "Unknown"),
+            "Name": getattr(classification_ref, "Name", "Unknown")
+        }
+        classifications.append(classification_data)
+    return classifications
+
+
 # Extracts the "IsDecomposedBy" relationship: which smaller objects are part of the element
-def extract_hierarchy(element, aggregates):
+def extract_hierarchy(element, rel_index):
     decomposes = {}
     is_decomposed_by = []
-    for rel in aggregates:
-        if element in rel.RelatedObjects:
-            decomposes = {
-                "Name": rel.RelatingObject.Name if hasattr(rel.RelatingObject, "Name") and rel.RelatingObject.Name else "Unnamed",
-                "IfcEntity": type(rel.RelatingObject).__name__,
-                "GlobalId": rel.RelatingObject.GlobalId if hasattr(rel.RelatingObject, "GlobalId") else "Unknown"
+    for rel in related(rel_index, "decomposes", element):
+        decomposes = {
+            "Name": rel.RelatingObject.Name if hasattr(rel.RelatingObject, "Name") and rel.RelatingObject.Name else "Unnamed",
+            "IfcEntity": type(rel.RelatingObject).__name__,
+            "GlobalId": rel.RelatingObject.GlobalId if hasattr(rel.RelatingObject, "GlobalId") else "Unknown"
+        }
+    for rel in related(rel_index, "is_decomposed_by", element):
+        is_decomposed_by.extend([
+            {
+                "Name": obj.Name if hasattr(obj, "Name") and obj.Name else "Unnamed",
+                "IfcEntity": type(obj).__name__,
+                "GlobalId": obj.GlobalId if hasattr(obj, "GlobalId") else "Unknown"
             }
-        if element == rel.RelatingObject:
-            is_decomposed_by.extend([
-                {
-                    "Name": obj.Name if hasattr(obj, "Name") and obj.Name else "Unnamed",
-                    "IfcEntity": type(obj).__name__,
-                    "GlobalId": obj.GlobalId if hasattr(obj, "GlobalId") else "Unknown"
-                }
-                for obj in rel.RelatedObjects
-            ])
+            for obj in rel.RelatedObjects
+        ])
     return decomposes, is_decomposed_by
+
+
+# True if the element is decomposed into parts (IfcRelAggregates), e.g. a curtain wall or a stair
+# Only looks up the relationship index, so it can be checked before any expensive extraction
+def is_composition(element, rel_index):
+    return any(rel.RelatedObjects for rel in related(rel_index, "is_decomposed_by", element))
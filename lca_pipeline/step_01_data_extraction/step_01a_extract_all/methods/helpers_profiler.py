@@ -0,0 +1,187 @@
+import os
+import io
+import time
+import math
+from .json_io import write_json
+
+# ----------------------------------------------------------------
+# Extraction profiler (per-phase and per-element timings)
+# ----------------------------------------------------------------
+
+# Times the model-level phases (IFC parsing, relationship index, hashes, geometry, data sheets, ...) and, for every
+# element, each helper family (metadata, materials, psets, relationships, location, IFC quantities, analytic geometry,
+# BREP, tessellation, output). The report lists percentiles per family and the slowest elements by GlobalId and is
+# written to profile_step_01a.json next to metadata_step_01a.json.
+# Optionally, the whole extraction runs under cProfile (profile_step_01a.prof + text summary) or under the
+# pyinstrument sampling profiler (profile_step_01a.html, only if pyinstrument is installed).
+# A disabled profiler does nothing, so the instrumentation can stay in place.
+
+PROFILE_FILENAME = "profile_step_01a.json"
+CPROFILE_FILENAME = "profile_step_01a.prof"
+CPROFILE_SUMMARY_FILENAME = "profile_step_01a_cprofile.txt"
+PYINSTRUMENT_FILENAME = "profile_step_01a.html"
+
+PERCENTILES = (50, 90, 99)
+
+
+class _Timer:
+    """Adds the elapsed time of a with-block to a profiler entry."""
+
+    __slots__ = ("profiler", "global_id", "family", "start")
+
+    def __init__(self, profiler, global_id, family):
+        self.profiler = profiler
+        self.global_id = global_id
+        self.family = family
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        seconds = time.perf_counter() - self.start
+        if self.global_id is None:
+            self.profiler.phases[self.family] = self.profiler.phases.get(self.family, 0.0) + seconds
+        else:
+            self.profiler.record(self.global_id, self.family, seconds)
+
+
+class _NoTimer:
+    """Timer of a disabled profiler."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NO_TIMER = _NoTimer()
+
+
+# Nearest-rank percentile of a sorted list
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class ExtractionProfiler:
+
+    def __init__(self, enabled=False, top_n=20, python_profiler="none"):
+        self.enabled = enabled
+        self.top_n = top_n
+        self.python_profiler = (python_profiler or "none").lower() if enabled else "none"
+        self.phases = {}
+        self.elements = {}
+        self._python_profiler = None
+
+    # Times a model-level phase
+    def phase(self, name):
+        return _Timer(self, None, name) if self.enabled else NO_TIMER
+
+    # Times a helper family of one element
+    def family(self, global_id, name):
+        return _Timer(self, global_id, name) if self.enabled else NO_TIMER
+
+    # Registers the name and entity of an element (for the slowest elements list)
+    def element(self, global_id, name, entity):
+        if self.enabled:
+            entry = self.elements.setdefault(global_id, {"Families": {}})
+            entry["Name"] = name
+            entry["Type"] = entity
+
+    # Adds a time measured elsewhere (e.g. BREP seconds reported by the geometry pool)
+    def record(self, global_id, family, seconds):
+        if self.enabled and seconds is not None:
+            families = self.elements.setdefault(global_id, {"Families": {}})["Families"]
+            families[family] = families.get(family, 0.0) + seconds
+
+    # --- Optional Python-level profilers ---
+
+    def start(self):
+        if self.python_profiler == "cprofile":
+            import cProfile
+            self._python_profiler = cProfile.Profile()
+            self._python_profiler.enable()
+        elif self.python_profiler == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                print("[PROFILER] pyinstrument is not installed, sampling profile skipped.")
+                self.python_profiler = "none"
+                return
+            self._python_profiler = Profiler()
+            self._python_profiler.start()
+
+    def stop(self, output_directory):
+        if self._python_profiler is None:
+            return
+        if self.python_profiler == "cprofile":
+            import pstats
+            self._python_profiler.disable()
+            self._python_profiler.dump_stats(os.path.join(output_directory, CPROFILE_FILENAME))
+            summary = io.StringIO()
+            pstats.Stats(self._python_profiler, stream=summary).sort_stats("cumulative").print_stats(50)
+            with open(os.path.join(output_directory, CPROFILE_SUMMARY_FILENAME), "w", encoding="utf-8") as f:
+                f.write(summary.getvalue())
+        elif self.python_profiler == "pyinstrument":
+            self._python_profiler.stop()
+            with open(os.path.join(output_directory, PYINSTRUMENT_FILENAME), "w", encoding="utf-8") as f:
+                f.write(self._python_profiler.output_html())
+        self._python_profiler = None
+
+    # --- Report ---
+
+    def report(self):
+        by_family = {}
+        totals = []
+        for global_id, entry in self.elements.items():
+            total = 0.0
+            for family, seconds in entry["Families"].items():
+                by_family.setdefault(family, []).append(seconds)
+                total += seconds
+            totals.append((total, global_id))
+
+        families = {}
+        for family, values in sorted(by_family.items(), key=lambda item: -sum(item[1])):
+            values.sort()
+            summary = {
+                "Elements": len(values),
+                "Total [s]": round(sum(values), 3),
+                "Mean [ms]": round(1000 * sum(values) / len(values), 3)
+            }
+            for p in PERCENTILES:
+                summary[f"P{p} [ms]"] = round(1000 * percentile(values, p), 3)
+            summary["Max [ms]"] = round(1000 * values[-1], 3)
+            families[family] = summary
+
+        totals.sort(reverse=True)
+        slowest = []
+        for total, global_id in totals[:self.top_n]:
+            entry = self.elements[global_id]
+            slowest.append({
+                "GlobalId": global_id,
+                "Name": entry.get("Name"),
+                "Type": entry.get("Type"),
+                "Total [ms]": round(1000 * total, 3),
+                "Families [ms]": {family: round(1000 * seconds, 3) for family, seconds in entry["Families"].items()}
+            })
+
+        return {
+            "Phases [s]": {name: round(seconds, 3) for name, seconds in self.phases.items()},
+            "Helper Families": families,
+            f"Top {self.top_n} Slowest Elements": slowest,
+            "Python Profiler": self.python_profiler
+        }
+
+    def save(self, output_directory):
+        if not self.enabled:
+            return
+        os.makedirs(output_directory, exist_ok=True)
+        write_json(self.report(), os.path.join(output_directory, PROFILE_FILENAME), "report")
+
+
+# Default profiler of the helpers (disabled)
+NO_PROFILER = ExtractionProfiler(enabled=False)
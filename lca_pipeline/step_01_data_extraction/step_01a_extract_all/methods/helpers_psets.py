@@ -1,3 +1,6 @@
+from .helpers_index import related
+from .helpers_type_cache import type_objects, cached_type_value
+
 # Function to extract the clean value from IFC representations (e.g., '<IfcLabel 99>' → '99')
 def clean_ifc_value(value):
     if isinstance(value, str):
@@ -9,40 +12,62 @@ def clean_ifc_value(value):
 
 
 # Function to extract Psets from the element directly
-def extract_element_psets(element, property_relationships):
+def extract_element_psets(element, rel_index):
     try:
         properties = {}
 
-        for relationship in property_relationships:
-            if element in relationship.RelatedObjects:
-                property_set = getattr(relationship, "RelatingPropertyDefinition", None)
+        for relationship in related(rel_index, "property_definitions", element):
+            property_set = getattr(relationship, "RelatingPropertyDefinition", None)
 
-                if property_set and property_set.is_a("IfcPropertySet"):
-                    for prop in getattr(property_set, "HasProperties", []) or []:
-                        if hasattr(prop, "Name") and hasattr(prop, "NominalValue"):
-                            raw_value = prop.NominalValue
-                            properties[prop.Name] = clean_ifc_value(str(raw_value))
+            if property_set and property_set.is_a("IfcPropertySet"):
+                for prop in getattr(property_set, "HasProperties", []) or []:
+                    if hasattr(prop, "Name") and hasattr(prop, "NominalValue"):
+                        raw_value = prop.NominalValue
+                        properties[prop.Name] = clean_ifc_value(str(raw_value))
 
         return properties if properties else {}
     
     except Exception as e:
         return {}
 
+# Property sets of a type object, keyed by "<Pset>.<Property>"
+def type_object_psets(type_object):
+    properties = {}
+    for pset in getattr(type_object, "HasPropertySets", None) or []:
+        if pset.is_a("IfcPropertySet"):
+            for prop in getattr(pset, "HasProperties", []) or []:
+                if hasattr(prop, "Name") and hasattr(prop, "NominalValue"):
+                    raw_value = prop.NominalValue
+                    properties[f"{pset.Name}.{prop.Name}"] = clean_ifc_value(str(raw_value))
+    return properties
+
+
+# Keys ("<Pset>.<Property>") of the properties the element defines itself
+# A property set on the occurrence overrides the property of the same name in the type's property set
+def instance_pset_keys(element, rel_index):
+    keys = set()
+    for relationship in related(rel_index, "property_definitions", element):
+        property_set = getattr(relationship, "RelatingPropertyDefinition", None)
+        if property_set and property_set.is_a("IfcPropertySet"):
+            for prop in getattr(property_set, "HasProperties", []) or []:
+                if hasattr(prop, "Name"):
+                    keys.add(f"{property_set.Name}.{prop.Name}")
+    return keys
+
+
 # Function to extract ObjectTypePsets (if the element has an ObjectType)
-def extract_type_psets(element, type_relationships):
+# The type psets are read from the type cache, only the instance-level overrides are removed per element
+def extract_type_psets(element, rel_index, type_cache=None):
     try:
         properties = {}
 
-        for rel in type_relationships:
-            if element in rel.RelatedObjects:
-                object_type = rel.RelatingType
-                if object_type and hasattr(object_type, "HasPropertySets"):
-                    for pset in object_type.HasPropertySets:
-                        if pset.is_a("IfcPropertySet"):
-                            for prop in getattr(pset, "HasProperties", []) or []:
-                                if hasattr(prop, "Name") and hasattr(prop, "NominalValue"):
-                                    raw_value = prop.NominalValue
-                                    properties[f"{pset.Name}.{prop.Name}"] = clean_ifc_value(str(raw_value))
+        for object_type in type_objects(element, rel_index):
+            properties.update(cached_type_value(type_cache, object_type, "Psets", type_object_psets))
+
+        if properties:
+            overrides = instance_pset_keys(element, rel_index)
+            if overrides:
+                properties = {key: value for key, value in properties.items() if key not in overrides}
 
         return properties if properties else {}
     except Exception as e:
@@ -0,0 +1,159 @@
+import os
+import pickle
+import hashlib
+from .helpers_manifest import extractor_code_hash
+
+# ----------------------------------------------------------------
+# On-disk snapshot of a parsed IFC model (keyed by the IFC file hash)
+# ----------------------------------------------------------------
+
+# The ifcopenshell entity graph itself cannot be serialized, so the snapshot stores what the extraction derives from it:
+#   - the model-level data (schema, units, storeys, spatial hierarchy, file metadata)
+#   - the catalogue of all building elements (GlobalId -> IFC entity) in model order
+#   - the finished data sheet, content hash and composition flag of every element extracted so far
+# If a repeated extraction of the same file (e.g. with another entity filter) only needs elements that are already
+# in the snapshot, the IFC file is not parsed at all. Otherwise the model is loaded, only the missing elements are
+# extracted and the snapshot is extended.
+# A snapshot is only reused with the same geometry settings and the same extractor code (see extractor_code_hash),
+# because both change the data sheets. SNAPSHOT_VERSION is bumped when the layout of the snapshot itself changes.
+# The data sheets are not kept in memory: they are appended to <file hash>.sheets as they are extracted, and the
+# snapshot (<file hash>.pkl) only holds their index (file offset, content hash and composition flag).
+
+SNAPSHOT_VERSION = 2
+
+# Read buffer for hashing the IFC file (bytes)
+HASH_BUFFER_SIZE = 8 * 1024 * 1024
+
+
+# SHA-256 of the IFC file content
+def file_sha256(filepath):
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BUFFER_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def snapshot_path(snapshot_directory, file_hash):
+    return os.path.join(snapshot_directory, f"{file_hash}.pkl")
+
+
+def sheets_path(snapshot_directory, file_hash):
+    return os.path.join(snapshot_directory, f"{file_hash}.sheets")
+
+
+class SnapshotSheets:
+    """
+    Data sheets of a snapshot, appended to a file and read on demand.
+    Only the index (GlobalId -> offset, length, content hash, composition flag) is kept in memory.
+    Without an index, the sheet file is started from scratch.
+    """
+
+    def __init__(self, path, index=None):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.index = index if index is not None else {}
+        self.file = open(path, "a+b" if index is not None else "w+b")
+
+    def __contains__(self, global_id):
+        return global_id in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def content_hash(self, global_id):
+        return self.index[global_id]["Hash"]
+
+    def composition(self, global_id):
+        return self.index[global_id]["Composition"]
+
+    def data(self, global_id):
+        entry = self.index[global_id]
+        self.file.flush()
+        self.file.seek(entry["Offset"])
+        return pickle.loads(self.file.read(entry["Length"]))
+
+    def add(self, global_id, element_data, content_hash, composition):
+        record = pickle.dumps(element_data, protocol=pickle.HIGHEST_PROTOCOL)
+        self.file.seek(0, os.SEEK_END)
+        offset = self.file.tell()
+        self.file.write(record)
+        self.index[global_id] = {"Offset": offset, "Length": len(record), "Hash": content_hash, "Composition": composition}
+
+    # True if every indexed data sheet is in the file (e.g. not after an interrupted first run)
+    def complete(self):
+        self.file.seek(0, os.SEEK_END)
+        size = self.file.tell()
+        return all(entry["Offset"] + entry["Length"] <= size for entry in self.index.values())
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+
+# Starts an empty snapshot (an outdated index is removed first, as the sheet file is started from scratch)
+def new_snapshot(snapshot_directory, file_hash, settings, code_hash):
+    if os.path.exists(snapshot_path(snapshot_directory, file_hash)):
+        os.remove(snapshot_path(snapshot_directory, file_hash))
+    return {
+        "Version": SNAPSHOT_VERSION,
+        "File Hash": file_hash,
+        "Settings": settings,
+        "Extractor Code": code_hash,
+        "Model": None,
+        "Sheets": SnapshotSheets(sheets_path(snapshot_directory, file_hash))
+    }
+
+
+# Loads the snapshot of an IFC file, or starts a new one if there is none (or it was made with other settings or
+# another version of the extractor)
+def load_snapshot(snapshot_directory, file_hash, settings):
+    code_hash = extractor_code_hash()
+    path = snapshot_path(snapshot_directory, file_hash)
+    if os.path.exists(path) and os.path.exists(sheets_path(snapshot_directory, file_hash)):
+        try:
+            with open(path, "rb") as f:
+                snapshot = pickle.load(f)
+            if (
+                snapshot.get("Version") == SNAPSHOT_VERSION
+                and snapshot.get("File Hash") == file_hash
+                and snapshot.get("Settings") == settings
+                and snapshot.get("Extractor Code") == code_hash
+            ):
+                sheets = SnapshotSheets(sheets_path(snapshot_directory, file_hash), snapshot["Sheet Index"])
+                if sheets.complete():
+                    snapshot["Sheets"] = sheets
+                    del snapshot["Sheet Index"]
+                    return snapshot
+                sheets.close()
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError):
+            pass
+    return new_snapshot(snapshot_directory, file_hash, settings, code_hash)
+
+
+# Saves the snapshot index (the data sheets are already in the sheet file) and closes the sheet file
+def save_snapshot(snapshot_directory, snapshot):
+    os.makedirs(snapshot_directory, exist_ok=True)
+    sheets = snapshot["Sheets"]
+    sheets.file.flush()
+    os.fsync(sheets.file.fileno())
+    stored = {key: value for key, value in snapshot.items() if key != "Sheets"}
+    stored["Sheet Index"] = sheets.index
+    path = snapshot_path(snapshot_directory, snapshot["File Hash"])
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as f:
+        pickle.dump(stored, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_path, path)
+    sheets.close()
+
+
+# True if all elements selected by the entity configuration are in the snapshot (the IFC file does not need to be loaded)
+def snapshot_covers_selection(snapshot, entity_config, entity_bool=True):
+    if not snapshot or not snapshot.get("Model"):
+        return False
+    sheets = snapshot["Sheets"]
+    for global_id, entry in snapshot["Model"]["Elements"].items():
+        if entity_bool or entity_config.get(entry["Type"], False):
+            if global_id not in sheets:
+                return False
+    return True
@@ -0,0 +1,110 @@
+import os
+import json
+from .helpers_io import save_individual_json
+from .json_io import encode_json
+
+# ----------------------------------------------------------------
+# Append-only JSONL store for extracted element data
+# ----------------------------------------------------------------
+
+# Instead of one pretty-printed JSON file per element, all element records are streamed into a single
+# JSONL file (one compact JSON object per line). This avoids the per-file overhead on network filesystems.
+# Each record holds the GlobalId, the (deduplicated) element name, whether the element is a composition,
+# and the element data sheet. Later records of the same GlobalId replace earlier ones, and removed elements
+# are marked with a tombstone record ({"GlobalId": ..., "Deleted": true}).
+
+STORE_FILENAME = "elements.jsonl"
+
+# Write buffer of the store file (bytes)
+STORE_BUFFER_SIZE = 1024 * 1024
+
+
+def store_path(out_directory_boq):
+    return os.path.join(out_directory_boq, STORE_FILENAME)
+
+
+class ElementStore:
+    """
+    Buffered, append-only writer for element records.
+    With truncate=True, the store is started from scratch (full extraction run).
+    """
+
+    def __init__(self, path, truncate=False):
+        self.path = str(path)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.file = open(self.path, "w" if truncate else "a", encoding="utf-8", buffering=STORE_BUFFER_SIZE)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _append(self, record):
+        self.file.write(encode_json(record, "internal").decode("utf-8"))
+        self.file.write("\n")
+
+    def write(self, global_id, name, composition, element_data):
+        self._append({"GlobalId": global_id, "Name": name, "Composition": composition, "Data": element_data})
+
+    def delete(self, global_id):
+        self._append({"GlobalId": global_id, "Deleted": True})
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+
+# Reads the store and returns the current record per GlobalId (in order of first appearance)
+# Also returns the number of stale lines (superseded records and tombstones)
+def read_store(path):
+    records = {}
+    lines = 0
+    if not os.path.exists(path):
+        return records, 0
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            lines += 1
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Incomplete last line of an interrupted run
+            global_id = record.get("GlobalId")
+            if record.get("Deleted"):
+                records.pop(global_id, None)
+            else:
+                records[global_id] = record
+    return records, lines - len(records)
+
+
+# Rewrites the store with only the current records
+def compact_store(path):
+    records, stale = read_store(path)
+    if stale == 0:
+        return
+    temporary_path = f"{path}.tmp"
+    with ElementStore(temporary_path, truncate=True) as store:
+        for record in records.values():
+            store.write(record["GlobalId"], record["Name"], record["Composition"], record["Data"])
+    os.replace(temporary_path, path)
+
+
+# Compatibility exporter: writes the per-element JSON tree (Elements/ and Compositions/) from the store
+def export_json_tree(path, out_directory_elements, out_directory_compositions):
+    records, _ = read_store(path)
+
+    # The tree is fully generated from the store, so outdated files of removed elements are cleared first
+    for output_directory in (out_directory_elements, out_directory_compositions):
+        if os.path.isdir(output_directory):
+            for filename in os.listdir(output_directory):
+                if filename.endswith(".json"):
+                    os.remove(os.path.join(output_directory, filename))
+
+    for record in records.values():
+        output_directory = out_directory_compositions if record.get("Composition") else out_directory_elements
+        save_individual_json(record["Data"], output_directory, record["Name"])
+    return len(records)
@@ -0,0 +1,50 @@
+from .helpers_index import entity_key, related
+
+# ----------------------------------------------------------------
+# Type object cache (filled on first access)
+# ----------------------------------------------------------------
+
+# Typical exports (e.g. Revit) have tens of thousands of occurrences sharing a handful of IfcTypeObjects.
+# The type property sets, type material associations and type classification references are therefore
+# extracted once per type object (keyed by its STEP id) and reused for every occurrence of that type.
+# The occurrence only merges its own (instance-level) data on top of the cached type data.
+# Cached values are shared between the data sheets of all occurrences, so they must not be mutated.
+
+
+def new_type_cache():
+    return {"Types": {}, "Hits": 0, "Misses": 0}
+
+
+# Type objects assigned to an element (IfcRelDefinesByType)
+def type_objects(element, rel_index):
+    objects = []
+    for rel in related(rel_index, "types", element):
+        type_object = getattr(rel, "RelatingType", None)
+        if type_object is not None:
+            objects.append(type_object)
+    return objects
+
+
+# Returns the cached value of a type object, computing it on first access
+# Without a cache (type_cache=None), the value is computed every time
+def cached_type_value(type_cache, type_object, field, compute):
+    if type_cache is None:
+        return compute(type_object)
+
+    key = entity_key(type_object)
+    entry = type_cache["Types"].setdefault(key, {})
+    if field in entry:
+        type_cache["Hits"] += 1
+    else:
+        type_cache["Misses"] += 1
+        entry[field] = compute(type_object)
+    return entry[field]
+
+
+# Summary for the step metadata
+def type_cache_stats(type_cache):
+    return {
+        "Type Objects": len(type_cache["Types"]),
+        "Cache Hits": type_cache["Hits"],
+        "Cache Misses": type_cache["Misses"]
+    }
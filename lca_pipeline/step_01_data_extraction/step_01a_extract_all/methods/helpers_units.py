@@ -1,3 +1,5 @@
+import math
+
 # Extracts the length conversion factor from the model's unit assignments.
 # Returns a float representing the multiplier to convert to meters.
 
@@ -54,4 +56,25 @@ def model_units(model):
             "PLANEANGLEUNIT": "DEGREE",
             "MASSUNIT": "KILOGRAM",
             "MASSDENSITYUNIT": "KILOGRAM_PER_CUBIC_METRE"
-        }, 1.0  # Default to reasonable unit values if extraction fails
\ No newline at end of file
+        }, 1.0  # Default to reasonable unit values if extraction fails
+
+# Extracts the factor that converts plane angle values of the model into radians.
+# IFC defaults to RADIAN, but many exporters assign a conversion based unit (DEGREE).
+def plane_angle_factor(model):
+    try:
+        for assignment in model.get_entities_by_type("IfcUnitAssignment"):
+            for unit in getattr(assignment, "Units", []):
+                if getattr(unit, "UnitType", None) != "PLANEANGLEUNIT":
+                    continue
+                if unit.is_a("IfcConversionBasedUnit"):
+                    conversion = getattr(unit, "ConversionFactor", None)
+                    value = getattr(conversion, "ValueComponent", None) if conversion else None
+                    value = getattr(value, "wrappedValue", value)
+                    if isinstance(value, (int, float)) and value > 0:
+                        return float(value)
+                    if str(getattr(unit, "Name", "")).upper() == "DEGREE":
+                        return math.pi / 180
+                return 1.0
+    except Exception as e:
+        print(f"Error extracting plane angle unit: {e}")
+    return 1.0
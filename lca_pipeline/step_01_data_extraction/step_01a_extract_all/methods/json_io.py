@@ -0,0 +1,87 @@
+import os
+import json
+import math
+import codecs
+
+# JSON serialization of the pipeline artifacts
+# All JSON files are written once, as UTF-8 without unicode escapes, so no step has to rewrite files afterwards.
+# The layout is chosen per artifact class:
+#   - "data_sheet": indented by 2 spaces (element and layer data sheets, inference results, LCA results)
+#   - "report":     indented by 2 spaces (metadata, overviews, summaries and reports)
+#   - "internal":   compact, without whitespace (manifests and records only read by the pipeline)
+# orjson is used if it is installed (much faster, in particular for indented output), the json module otherwise.
+# Both produce the same layout and write NaN and Infinity as null (the json module would write invalid JSON).
+# The files are not byte-identical: float notation differs between the two (e.g. orjson 0.00001 and 1e20, json 1e-05 and 1e+20).
+# JSON files are written without a byte order mark; a mark left by earlier runs is skipped when reading.
+# write_json() never writes through an existing file: the data goes to a temporary file that replaces it (a new inode),
+# so hard links to the previous file (data sheets staged by later steps, see staging.py) keep their content.
+# The module is identical in all steps, as each step runs as a standalone script.
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+PRETTY = "pretty"
+COMPACT = "compact"
+
+ARTIFACT_FORMATS = {
+    "data_sheet": PRETTY,
+    "report": PRETTY,
+    "internal": COMPACT
+}
+
+
+def _layout(artifact):
+    if artifact not in ARTIFACT_FORMATS:
+        raise ValueError(f"Invalid JSON artifact class: {artifact}. Must be one of {', '.join(ARTIFACT_FORMATS)}.")
+    return ARTIFACT_FORMATS[artifact]
+
+
+# NaN and Infinity replaced by None, as orjson writes them
+def _finite(data):
+    if isinstance(data, float):
+        return data if math.isfinite(data) else None
+    if isinstance(data, dict):
+        return {key: _finite(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [_finite(value) for value in data]
+    return data
+
+
+# Serializes data to UTF-8 encoded JSON bytes in the layout of the artifact class
+def encode_json(data, artifact="data_sheet"):
+    layout = _layout(artifact)
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if layout == PRETTY:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(data, option=option)
+        except TypeError:
+            pass  # Type unknown to orjson, the json module decides
+    data = _finite(data)
+    if layout == PRETTY:
+        return json.dumps(data, indent=2, ensure_ascii=False, allow_nan=False).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
+
+def write_json(data, path, artifact="data_sheet"):
+    encoded = encode_json(data, artifact)
+    temporary_path = f"{os.fspath(path)}.tmp"
+    with open(temporary_path, "wb") as f:
+        f.write(encoded)
+    os.replace(temporary_path, path)
+
+
+def read_json(path):
+    with open(path, "rb") as f:
+        raw = f.read()
+    if raw.startswith(codecs.BOM_UTF8):
+        raw = raw[len(codecs.BOM_UTF8):]
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass  # e.g. NaN or integers beyond 64 bit, the json module decides
+    return json.loads(raw.decode("utf-8"))
@@ -0,0 +1,21 @@
+# Rebuilds BoQ_step_01a.csv from the element data sheets in Elements/
+# The extraction (run.py) writes the BoQ itself. Use this after editing the data sheets or if the BoQ was lost.
+import time
+from pathlib import Path
+from methods.extractor_boq import extractor_boq
+
+out_directory_boq = Path("data/pipeline/step_01_data_extraction/step_01a_extract_all")
+out_directory_elements = out_directory_boq / "Elements"
+
+def rebuild_boq():
+
+    start_time = time.time()
+
+    rows, failed_files = extractor_boq(out_directory_elements, out_directory_boq)
+
+    print(f"BoQ rebuilt with {rows} elements in {time.time() - start_time:.2f} seconds.")
+    if failed_files:
+        print(f"{len(failed_files)} data sheets could not be read: {', '.join(failed_files)}")
+
+if __name__ == "__main__":
+    rebuild_boq()
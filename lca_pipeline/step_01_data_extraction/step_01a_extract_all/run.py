@@ -1,19 +1,14 @@
 import time
 from pathlib import Path
-from methods.extractor import extractor
-from methods.extractor_boq import extractor_boq
-from methods.helpers_io import load_ifc_file, load_yaml_config, get_single_ifc_file
+from methods.extract_model import extract_model
+from methods.batch import run_batch
+from methods.helpers_io import load_yaml_config, get_single_ifc_file
 
 def extract_all():
 
     start_time = time.time()
 
-    brep_toggle = True
-
-    # Input, output and config paths
-    ifc_input_file = str(get_single_ifc_file())
-    out_directory_compositions = Path("data/pipeline/step_01_data_extraction/step_01a_extract_all/Compositions")
-    out_directory_elements = Path("data/pipeline/step_01_data_extraction/step_01a_extract_all/Elements")
+    # Output and config paths
     out_directory_boq = Path("data/pipeline/step_01_data_extraction/step_01a_extract_all")
     entity_config_path = Path("config/data_filters/entity_selection.yaml")
     master_config_path = Path("config/master_config.yaml")
@@ -22,26 +17,21 @@ def extract_all():
     entity_config = load_yaml_config(entity_config_path)
     master_config = load_yaml_config(master_config_path)
 
-    # Read geometry settings
-    extraction_config = master_config.get("extraction_config", {})
-    brep_toggle = extraction_config.get("brep_enabled", True)
-    brep_timeout = extraction_config.get("brep_timeout", 30)
-    entity_bool = extraction_config.get("include_all_entities", True)
+    # Batch mode: extract a whole portfolio of IFC models in parallel
+    batch_config = master_config.get("extraction_config", {}).get("batch", {}) or {}
+    if batch_config.get("enabled", False):
+        run_batch(
+            batch_config.get("source", "data/input/IFC_models"),
+            Path(batch_config.get("output_directory", "data/pipeline/batch")),
+            master_config, entity_config,
+            batch_config.get("workers", 0)
+            )
+        return
 
     try:
-        # Load the IFC file
-        model = load_ifc_file(ifc_input_file)
-
         # Extract element data and save each IfcBuildingElement separately
-        extractor(
-            brep_toggle, brep_timeout, ifc_input_file, 
-            model, out_directory_elements, out_directory_compositions, 
-            out_directory_boq, entity_config, entity_bool
-            )
-
-
-        # Append elements to to BoQ
-        extractor_boq(out_directory_elements, out_directory_boq)
+        ifc_input_file = str(get_single_ifc_file())
+        extract_model(ifc_input_file, out_directory_boq, master_config, entity_config)
 
         # Stop measuring time
         end_time = time.time()
@@ -53,4 +43,4 @@ def extract_all():
         print(f"Error: {error}")
 
 if __name__ == "__main__":
-    extract_all()
\ No newline at end of file
+    extract_all()
@@ -1,19 +1,27 @@
 import os
 import json
-import hashlib
-import shutil
 import csv
-from collections import defaultdict
+from collections import defaultdict, Counter
+from .staging import StagingArea
+from .json_io import read_json, write_json
+from .signature import signature_config, element_signature, signature_id, llm_calls, EXACT_SIGNATURE_CONFIG
 
 # The compiler compiles IFC elements by grouping identical elements based on type, object type, material data, and material layers
 # Copies elements that require unique material inference separately. Saves a compiled overview.
 # The motivation to compile elements like this is to reduce the number of required LLM inference calls.
 # This is important for the LCA pipeline, as it reduces the number of API calls and speeds up the process.
-def aggregator_element(source_folder, elements_unique_folder, data_folder):
+# The grouping key is built by the signature engine (see signature.py), which can group near-duplicates
+# (canonical material names, thickness tolerance, ObjectType ignored). The LLM calls saved compared to exact grouping are reported.
+def aggregator_element(source_folder, elements_unique_folder, data_folder, signature_settings=None, staging_mode="hardlink"):
     # Ensure the destination folders exist
-    os.makedirs(elements_unique_folder, exist_ok=True)
     os.makedirs(data_folder, exist_ok=True)
 
+    # Unique elements are passed on unchanged, they are staged instead of copied (see staging.py)
+    elements_unique = StagingArea(elements_unique_folder, staging_mode)
+
+    # Signature settings (defaults to exact grouping)
+    config = signature_config(signature_settings)
+
     # Filename list
     source_files = os.listdir(source_folder)
 
@@ -23,6 +31,8 @@ def aggregator_element(source_folder, elements_unique_folder, data_folder):
     compiled_overview = {}
     total_compiled_elements = 0
     total_unique_elements = 0
+    exact_signatures = []
+    configured_signatures = []
 
     # Iterate over source files
     for filename in source_files:
@@ -30,66 +40,21 @@ def aggregator_element(source_folder, elements_unique_folder, data_folder):
             source_path = os.path.join(source_folder, filename)
 
             try:
-                with open(source_path, "r", encoding="utf-8") as file:
-                    data = json.load(file)
+                data = read_json(source_path)
 
                 element_metadata = data.get("Element Metadata", {})
-                material_data = data.get("Element Material Data", [])
                 property_sets = data.get("Element Property Sets", {})
 
-                type_value = element_metadata.get("Type")
-                object_type = element_metadata.get("ObjectType")
-                material_relationship_type = "Not defined"
-                material_identifier = "Not defined"
-                material_layers = []
-
-                if isinstance(material_data, list):
-                    for material in material_data:
-                        if "IfcEntity" in material:
-                            material_relationship_type = material.get("IfcEntity")
-
-                            if material_relationship_type == "IfcMaterial":
-                                material_identifier = material.get("Material Name")
-
-                            elif material_relationship_type == "IfcMaterialLayerSet":
-                                material_identifier = " | ".join(
-                                    f'{layer.get("Material Name", "Unknown")} ({layer.get("Thickness", 0)} {layer.get("Thickness unit", "N/A")})'
-                                    for layer in material.get("Layers", [])
-                                    if isinstance(layer, dict)
-                                )
-                                material_layers = [
-                                    {
-                                        "Material Name": layer.get("Material Name", "Unknown"),
-                                        "Thickness": layer.get("Thickness", 0),
-                                        "Thickness Unit": layer.get("Thickness unit", "N/A")
-                                    }
-                                    for layer in material.get("Layers", []) if isinstance(layer, dict)
-                                ]
-
-                            elif material_relationship_type == "IfcMaterialLayerSetUsage":
-                                material_identifier = material.get("Layer Set Name")
-                                material_layers = [
-                                    {
-                                        "Material Name": layer.get("Material Name", "Unknown"),
-                                        "Thickness": layer.get("Thickness", 0),
-                                        "Thickness Unit": layer.get("Thickness unit", "N/A")
-                                    }
-                                    for layer in material.get("Layers", []) if isinstance(layer, dict)
-                                ]
-
-                if type_value and object_type:
-                    grouping_key = (
-                        type_value,
-                        object_type,
-                        material_relationship_type,
-                        material_identifier,
-                        json.dumps(material_layers, sort_keys=True)
-                    )
+                grouping_key = element_signature(data, config)
+                exact_signatures.append(element_signature(data, EXACT_SIGNATURE_CONFIG))
+                configured_signatures.append(grouping_key)
 
+                if grouping_key:
                     grouped_elements[grouping_key].append({
                         "UID": element_metadata.get("UID"),
                         "GlobalID": element_metadata.get("GlobalId"),
                         "Name": element_metadata.get("Name"),
+                        "ObjectType": element_metadata.get("ObjectType"),
                         "Property Sets": property_sets,
                         "OriginalFile": filename
                     })
@@ -100,14 +65,20 @@ def aggregator_element(source_folder, elements_unique_folder, data_folder):
                 print(f"Error processing {filename}: {e}")
 
     # Create compiled overview
-    for (type_value, object_type, material_relationship_type, material_identifier, material_layers_json), elements in grouped_elements.items():
+    for grouping_key, elements in grouped_elements.items():
+        type_value = grouping_key[0]
         num_elements = len(elements)
 
         if num_elements >= 2:
             total_compiled_elements += num_elements
 
-            group_key_string = f"{type_value}_{object_type}_{material_relationship_type}"
-            unique_filename = hashlib.md5(group_key_string.encode()).hexdigest()[:10]
+            # The group ID is derived from the full signature, so groups that only differ in their materials get different IDs
+            unique_filename = signature_id(grouping_key)
+
+            # If the ObjectType is ignored, the group is named after the most frequent ObjectType of its elements
+            object_type = grouping_key[1]
+            if object_type is None:
+                object_type = Counter(elem["ObjectType"] or type_value for elem in elements).most_common(1)[0][0]
 
             compiled_overview[unique_filename] = {
                 "Compiled Type": type_value,
@@ -124,36 +95,42 @@ def aggregator_element(source_folder, elements_unique_folder, data_folder):
         elif num_elements == 1:
             single_element = elements[0]
             original_file = single_element["OriginalFile"]
-            source_path = os.path.join(source_folder, original_file)
-            destination_path = os.path.join(elements_unique_folder, original_file)
-            shutil.copy2(source_path, destination_path)
+            elements_unique.stage(original_file, os.path.join(source_folder, original_file))
             total_unique_elements += 1
 
     # Save the compiled overview
     overview_path = os.path.join(data_folder, "aggregation_overview.json")
-    with open(overview_path, "w", encoding="utf-8") as overview_file:
-        json.dump(compiled_overview, overview_file, indent=4, ensure_ascii=False)
+    write_json(compiled_overview, overview_path, "report")
 
     
 
     # Copy files not processed into single folder
     for filename in os.listdir(source_folder):
         if filename.endswith(".json") and filename not in processed_files:
-            source_path = os.path.join(source_folder, filename)
-            destination_path = os.path.join(elements_unique_folder, filename)
-            shutil.copy2(source_path, destination_path)
+            elements_unique.stage(filename, os.path.join(source_folder, filename))
             total_unique_elements += 1  # increment counter
+    elements_unique.close()
 
     groups_count = len(compiled_overview)
 
-    return overview_path, groups_count, total_compiled_elements, total_unique_elements
+    # LLM inferences needed with exact grouping and with the configured signature
+    exact_calls = llm_calls(exact_signatures)
+    signature_calls = llm_calls(configured_signatures)
+    signature_report = {
+        "Settings": config,
+        "LLM Calls (Exact Grouping)": exact_calls,
+        "LLM Calls (Signature Grouping)": signature_calls,
+        "LLM Calls Saved": exact_calls - signature_calls
+    }
+    print(f"Signature grouping: {signature_calls} LLM calls instead of {exact_calls} ({exact_calls - signature_calls} saved)")
+
+    return overview_path, groups_count, total_compiled_elements, total_unique_elements, signature_report, elements_unique.report()
 
 
 # Update BOQ
 def aggregator_boq(boq_path, overview_path, data_folder):
     # Load JSON file
-    with open(overview_path, "r", encoding="utf-8-sig") as jf:
-        group_data = json.load(jf)
+    group_data = read_json(overview_path)
 
     # Build a lookup: (GlobalId, Name) --> GroupID
     element_to_group = {}
@@ -262,10 +239,9 @@ def aggregator_boq(boq_path, overview_path, data_folder):
 
 
 # Update metadata
-def aggregator_metadata(metadata_path, groups_count, total_compiled_elements, total_unique_elements, data_folder):
+def aggregator_metadata(metadata_path, groups_count, total_compiled_elements, total_unique_elements, data_folder, signature_report=None, staging_report=None):
     # Load the existing metadata
-    with open(metadata_path, "r", encoding="utf-8") as f:
-        metadata = json.load(f)
+    metadata = read_json(metadata_path)
 
     # Ensure the base structure exists
     if "Module 01: Data Extraction" not in metadata:
@@ -275,12 +251,13 @@ def aggregator_metadata(metadata_path, groups_count, total_compiled_elements, to
     metadata["Module 01: Data Extraction"]["Module 01b: Aggregate Elements"] = {
         "Total individual elements aggregated (due to shared ObjectType and IfcMaterials)": total_compiled_elements,
         "Total aggregation groups generated (and representative elements for inference)": groups_count,
-        "Total individual elements identified as unique": total_unique_elements
+        "Total individual elements identified as unique": total_unique_elements,
+        "Signature Engine": signature_report,
+        "Staging of Unique Elements": staging_report
     }
 
     # Construct a new file path
     new_metadata_path = os.path.join(data_folder, "metadata_step_01b.json")
 
     # Save the updated metadata to the new file
-    with open(new_metadata_path, "w", encoding="utf-8") as f:
-        json.dump(metadata, f, indent=4)
\ No newline at end of file
+    write_json(metadata, new_metadata_path, "report")
\ No newline at end of file
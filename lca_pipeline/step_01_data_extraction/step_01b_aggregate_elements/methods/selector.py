@@ -1,5 +1,6 @@
 import os
 import json
+from .json_io import read_json, write_json
 
 # Function that selects one representative element per compilation ID from overview and copies it to the compiled folder
 def selector(source_folder, overview_path, elements_compiled_folder):
@@ -7,8 +8,7 @@ def selector(source_folder, overview_path, elements_compiled_folder):
     os.makedirs(elements_compiled_folder, exist_ok=True)
 
     # Load compiled overview
-    with open(overview_path, "r", encoding="utf-8") as file:
-        compiled_overview = json.load(file)
+    compiled_overview = read_json(overview_path)
 
     copied_count = 0  # Counter for number of representative elements copied
 
@@ -23,21 +23,19 @@ def selector(source_folder, overview_path, elements_compiled_folder):
                 if filename.endswith(".json"):
                     source_path = os.path.join(source_folder, filename)
                     try:
-                        with open(source_path, "r", encoding="utf-8") as f:
-                            data = json.load(f)
-                            element_metadata = data.get("Element Metadata", {})
+                        data = read_json(source_path)
+                        element_metadata = data.get("Element Metadata", {})
 
-                            if element_metadata.get("Name") == name:
-                                # Inject CompilationGroupID into the data
-                                data["CompilationGroupID"] = compilation_id
+                        if element_metadata.get("Name") == name:
+                            # Inject CompilationGroupID into the data
+                            data["CompilationGroupID"] = compilation_id
 
-                                # Save the modified JSON to compiled folder under the ORIGINAL filename
-                                destination_path = os.path.join(elements_compiled_folder, filename)
-                                with open(destination_path, "w", encoding="utf-8") as out_file:
-                                    json.dump(data, out_file, indent=4, ensure_ascii=False)
+                            # Save the modified JSON to compiled folder under the ORIGINAL filename
+                            destination_path = os.path.join(elements_compiled_folder, filename)
+                            write_json(data, destination_path)
 
-                                copied_count += 1  # Increment counter
-                                break  # Once found and saved, break inner loop
+                            copied_count += 1  # Increment counter
+                            break  # Once found and saved, break inner loop
                     except (json.JSONDecodeError, KeyError):
                         continue  # Skip bad files
 
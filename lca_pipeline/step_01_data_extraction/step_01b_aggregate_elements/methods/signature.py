@@ -0,0 +1,119 @@
+import re
+import json
+import hashlib
+
+# The signature engine builds the grouping key of an element for the aggregator.
+# Elements with the same signature are aggregated and share one LLM inference.
+# Exact grouping (the default) compares type, object type, material relationship type,
+# material identifier and the layers as they are. The engine can additionally:
+#   - canonicalize material and layer set names (case, separators, whitespace)
+#   - bucket layer thicknesses by a tolerance (0.2 and 0.2000001 m end up in the same group)
+#   - ignore the ObjectType (elements of the same entity with the same materials are grouped)
+
+DEFAULT_SIGNATURE_CONFIG = {
+    "canonicalize_material_names": False,
+    "thickness_tolerance": 0,
+    "ignore_object_type": False
+}
+
+# Signature settings that reproduce the exact grouping
+EXACT_SIGNATURE_CONFIG = dict(DEFAULT_SIGNATURE_CONFIG)
+
+
+# Merges the configured signature settings with the defaults
+def signature_config(config=None):
+    merged = dict(DEFAULT_SIGNATURE_CONFIG)
+    merged.update({key: value for key, value in (config or {}).items() if key in DEFAULT_SIGNATURE_CONFIG})
+    return merged
+
+
+# Canonical form of a material name: "Concrete_C30-37 " and "concrete c30 37" are the same material
+def canonical_name(name, config):
+    if not config["canonicalize_material_names"] or not isinstance(name, str):
+        return name
+    name = re.sub(r"[_\-/]+", " ", name.casefold())
+    return re.sub(r"\s+", " ", name).strip()
+
+
+# Thickness bucket: thicknesses within the tolerance share a bucket (tolerance 0 = exact value)
+def thickness_bucket(thickness, config):
+    tolerance = config["thickness_tolerance"]
+    if not tolerance or not isinstance(thickness, (int, float)):
+        return thickness
+    return round(round(thickness / tolerance) * tolerance, 9)
+
+
+def _layers(material, config):
+    return [
+        {
+            "Material Name": canonical_name(layer.get("Material Name", "Unknown"), config),
+            "Thickness": thickness_bucket(layer.get("Thickness", 0), config),
+            "Thickness Unit": layer.get("Thickness unit", "N/A")
+        }
+        for layer in material.get("Layers", []) if isinstance(layer, dict)
+    ]
+
+
+# Material relationship type, material identifier and material layers of an element data sheet
+def material_signature(material_data, config):
+    material_relationship_type = "Not defined"
+    material_identifier = "Not defined"
+    material_layers = []
+
+    if isinstance(material_data, list):
+        for material in material_data:
+            if "IfcEntity" in material:
+                material_relationship_type = material.get("IfcEntity")
+
+                if material_relationship_type == "IfcMaterial":
+                    material_identifier = canonical_name(material.get("Material Name"), config)
+
+                elif material_relationship_type == "IfcMaterialLayerSet":
+                    material_layers = _layers(material, config)
+                    material_identifier = " | ".join(
+                        f'{layer["Material Name"]} ({layer["Thickness"]} {layer["Thickness Unit"]})'
+                        for layer in material_layers
+                    )
+
+                elif material_relationship_type == "IfcMaterialLayerSetUsage":
+                    material_identifier = canonical_name(material.get("Layer Set Name"), config)
+                    material_layers = _layers(material, config)
+
+    return material_relationship_type, material_identifier, material_layers
+
+
+# Grouping key of an element data sheet (None if the element cannot be aggregated)
+def element_signature(data, config):
+    element_metadata = data.get("Element Metadata", {})
+    type_value = element_metadata.get("Type")
+    object_type = element_metadata.get("ObjectType")
+
+    if not type_value or not (object_type or config["ignore_object_type"]):
+        return None
+
+    material_relationship_type, material_identifier, material_layers = material_signature(data.get("Element Material Data", []), config)
+    return (
+        type_value,
+        None if config["ignore_object_type"] else object_type,
+        material_relationship_type,
+        material_identifier,
+        json.dumps(material_layers, sort_keys=True)
+    )
+
+
+# Short, stable group ID derived from the signature
+def signature_id(signature):
+    return hashlib.md5(json.dumps(signature, default=str).encode()).hexdigest()[:10]
+
+
+# Number of LLM inferences needed for the given signatures: one per group and one per unique element
+# (elements without signature are always inferred individually)
+def llm_calls(signatures):
+    groups = set()
+    calls = 0
+    for signature in signatures:
+        if signature is None:
+            calls += 1
+        else:
+            groups.add(signature)
+    return calls + len(groups)
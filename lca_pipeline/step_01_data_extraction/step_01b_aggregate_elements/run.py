@@ -1,9 +1,18 @@
+import yaml
 from pathlib import Path
 from methods.aggregator import aggregator_element, aggregator_boq, aggregator_metadata
 from methods.selector import selector
 
 def aggregate_elements():
 
+    # Signature settings of the aggregation (see methods/signature.py)
+    with open(Path("config/master_config.yaml"), "r", encoding="utf-8") as f:
+        master_config = yaml.safe_load(f)
+    signature_settings = master_config.get("aggregation_config", {}) or {}
+
+    # Unchanged data sheets are hard-linked or referenced instead of copied (see methods/staging.py)
+    staging_mode = (master_config.get("staging_config", {}) or {}).get("mode", "hardlink")
+
     # Source folder of all extracted elements
     source_folder = Path("data/pipeline/step_01_data_extraction/step_01a_extract_all/Elements")
 
@@ -25,7 +34,7 @@ def aggregate_elements():
     # Run the compiler (compiles elemenets into groups based on type, object type, material data, and material layers)
     # Copies elements that do not fulfill the compilement criteria separately
     # It also returns the overview path of the compiled elements for the selector
-    overview_path, groups_count, total_compiled_elements, total_unique_elements = aggregator_element(source_folder, elements_unique_folder, data_folder)
+    overview_path, groups_count, total_compiled_elements, total_unique_elements, signature_report, staging_report = aggregator_element(source_folder, elements_unique_folder, data_folder, signature_settings, staging_mode)
 
     # Run the selector (selects one representative element per compilation ID from overview and copies it to the compiled folder)
     # This element is then used for LLM inference, and its results are then assigned to all elements in the group
@@ -35,7 +44,7 @@ def aggregate_elements():
     aggregator_boq(boq_path, overview_path, data_folder)
 
     # Update the metadata sheet
-    aggregator_metadata(metadata_path, groups_count, total_compiled_elements, total_unique_elements, data_folder)
+    aggregator_metadata(metadata_path, groups_count, total_compiled_elements, total_unique_elements, data_folder, signature_report, staging_report)
 
 if __name__ == "__main__":
     aggregate_elements()
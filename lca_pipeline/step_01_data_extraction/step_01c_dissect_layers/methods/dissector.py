@@ -1,29 +1,33 @@
 import os
 import json
-import copy
 import csv
+from .staging import StagingArea, staged_files
+from .layer_context import layer_context_reference, LayerContextLoader
+from .json_io import read_json, write_json
 
 # Method to spot multi-layer elements and dissect them into new JSON files with target layer emphasis
-def dissector_element(source_dirs, elements_directory, target_layer_directory, metadata_path, output_folder):
+# Elements that pass unchanged are staged instead of rewritten (see staging.py)
+def dissector_element(source_dirs, elements_directory, target_layer_directory, layer_context_directory, metadata_path, output_folder, staging_mode="hardlink"):
 
     # Initialize counters
     single_counter = 0
     multi_counter = 0
     target_layer_counter = 0
+    layer_context_counter = 0
 
-    # Process all files in source directory
+    # Output folders
+    elements = StagingArea(elements_directory, staging_mode)
+    os.makedirs(target_layer_directory, exist_ok=True)
+    os.makedirs(layer_context_directory, exist_ok=True)
+
+    # Process all files in source directory (resolving the staging manifest of step 01b)
     for source_dir in source_dirs:
-        for filename in os.listdir(source_dir):
-            if not filename.endswith(".json"):
+        for filename, source_path in staged_files(source_dir):
+            try:
+                data = read_json(source_path)
+            except json.JSONDecodeError:
                 continue
 
-            source_path = os.path.join(source_dir, filename)
-            with open(source_path, "r", encoding="utf-8") as f:
-                try:
-                    data = json.load(f)
-                except json.JSONDecodeError:
-                    continue
-
             # Find material layers and store full metadata
             material_data = data.get("Element Material Data", [])
             layers = []
@@ -40,54 +44,59 @@ def dissector_element(source_dirs, elements_directory, target_layer_directory, m
 
             if not layers or len(layers) == 1:
                 # Remove the key from the original file data
+                changed = False
                 for mat in material_data:
                     if isinstance(mat, dict) and "Layer Direction and Growth description" in mat:
                         mat.pop("Layer Direction and Growth description", None)
+                        changed = True
 
-                target_path = os.path.join(elements_directory, filename)
-                with open(target_path, "w", encoding="utf-8") as out_file:
-                    json.dump(data, out_file, indent=4, ensure_ascii=False)
+                # Only changed data sheets are written, unchanged ones are staged
+                if changed:
+                    elements.write_json(filename, data)
+                else:
+                    elements.stage(filename, source_path)
                 single_counter += 1
                 continue
 
-            # If an element has more than 2 layers, it is dissected into multiple "Target Layer" files
+            # If an element has more than 2 layers, it is dissected into multiple "Target Layer" records
+            # The element context is written once to Layer_Contexts, each record references it (see layer_context.py)
             elif len(layers) > 1:
                 base_filename = filename[:-5]  # strip ".json"
+                context_filename = f"{base_filename}.json"
                 multi_counter += 1
 
+                # Shared context of all layers
+                building_element_context = {}
+                if "Element Metadata" in data:
+                    building_element_context["Element Metadata"] = data["Element Metadata"]
+                building_element_context["Material Layers"] = [
+                    {
+                        "Material Name": layer.get("Material Name", "Unknown"),
+                        "Thickness": layer.get("Thickness", 0),
+                        "Thickness Unit": layer.get("Thickness unit", "N/A"),
+                        "Layer Number": i + 1
+                    }
+                    for i, layer in enumerate(layers)
+                ]
+                if material_metadata:
+                    building_element_context["Layer Set Metadata"] = {key: value for key, value in material_metadata.items() if key != "Layers"}
+                if "Element Geometry Data" in data:
+                    building_element_context["Element Geometry Data"] = data["Element Geometry Data"]
+                if "Element Property Sets" in data:
+                    building_element_context["Element Property Sets"] = data["Element Property Sets"]
+                if "Element Location" in data:
+                    building_element_context["Element Location"] = data["Element Location"]
+
+                write_json(building_element_context, os.path.join(layer_context_directory, context_filename))
+                layer_context_counter += 1
+
                 for idx, target_layer in enumerate(layers):
-                    # Collect all other layers except the target one
-                    other_layers = []
-                    for i, layer in enumerate(layers):
-                        if i == idx:
-                            continue
-                        other_layers.append({
-                            "Material Name": layer.get("Material Name", "Unknown"),
-                            "Thickness": layer.get("Thickness", 0),
-                            "Thickness Unit": layer.get("Thickness unit", "N/A"),
-                            "Layer Number": i + 1
-                        })
-
-                    # Append material metadata at the end of other layers list
-
-
-
-                    # Build Building Element Context conditionally
-                    building_element_context = {}
-
-                    if "Element Metadata" in data:
-                        building_element_context["Element Metadata"] = copy.deepcopy(data["Element Metadata"])
-                    building_element_context["Other Material Layers"] = other_layers
-                    if material_metadata:
-                        material_metadata_cleaned = copy.deepcopy(material_metadata)
-                        material_metadata_cleaned.pop("Layers", None)
-                        building_element_context["Layer Set Metadata"] = material_metadata_cleaned
-                    if "Element Geometry Data" in data:
-                        building_element_context["Element Geometry Data"] = copy.deepcopy(data["Element Geometry Data"])
-                    if "Element Property Sets" in data:
-                        building_element_context["Element Property Sets"] = copy.deepcopy(data["Element Property Sets"])
-                    if "Element Location" in data:
-                        building_element_context["Element Location"] = copy.deepcopy(data["Element Location"])
+                    layer_number = idx + 1
+
+                    # Without compilation group, each layer gets its own GlobalId
+                    metadata_overrides = None
+                    if "CompilationGroupID" not in data and "Element Metadata" in data and "GlobalId" in data["Element Metadata"]:
+                        metadata_overrides = {"GlobalId": f"{data['Element Metadata']['GlobalId']}_L{layer_number}"}
 
                     # Create output structure
                     output_data = {
@@ -95,42 +104,38 @@ def dissector_element(source_dirs, elements_directory, target_layer_directory, m
                             "Material Name": target_layer.get("Material Name", "Unknown"),
                             "Thickness": target_layer.get("Thickness", 0),
                             "Thickness Unit": target_layer.get("Thickness unit", "N/A"),
-                            "Layer Number": idx + 1
+                            "Layer Number": layer_number
                         },
-                        "Building Element Context": building_element_context
+                        "Building Element Context": layer_context_reference(context_filename, layer_number, metadata_overrides)
                     }
 
-                    layer_number = idx + 1
                     if "CompilationGroupID" in data:
                         output_data["CompilationGroupID"] = f"{data['CompilationGroupID']}_L{layer_number}"
-                    elif "Element Metadata" in data and "GlobalId" in data["Element Metadata"]:
-                        # Inject modified GlobalId inside nested metadata
-                        output_data.setdefault("Building Element Context", {}).setdefault("Element Metadata", {})
-                        output_data["Building Element Context"]["Element Metadata"]["GlobalId"] = f"{data['Element Metadata']['GlobalId']}_L{layer_number}"
 
                     output_filename = f"{base_filename}_L{layer_number}.json"
                     output_path = os.path.join(target_layer_directory, output_filename)
 
-                    with open(output_path, "w", encoding="utf-8") as out_file:
-                        json.dump(output_data, out_file, indent=4, ensure_ascii=False)
+                    write_json(output_data, output_path)
 
                     target_layer_counter += 1
 
+    elements.close()
+
     # Update metadata JSON
-    with open(metadata_path, "r", encoding="utf-8") as meta_file:
-        metadata = json.load(meta_file)
+    metadata = read_json(metadata_path)
 
     metadata["Module 01: Data Extraction"]["Module 01c: Dissect Layers"] = {
         "Total multilayer elements": multi_counter,
         "Total Target Layer JSON files created": target_layer_counter,
-        "Total single-layer or non-layer elements": single_counter
+        "Total shared layer contexts created": layer_context_counter,
+        "Total single-layer or non-layer elements": single_counter,
+        "Staging of Elements": elements.report()
     }
 
     metadata["Module 01: Data Extraction"]["Required Inferences"] = target_layer_counter + single_counter
 
     new_metadata_path = os.path.join(output_folder, "metadata_step_01c.json")
-    with open(new_metadata_path, "w", encoding="utf-8") as f:
-        json.dump(metadata, f, indent=4)
+    write_json(metadata, new_metadata_path, "report")
 
 
 
@@ -139,15 +144,9 @@ def dissector_element(source_dirs, elements_directory, target_layer_directory, m
 def load_material_descriptors(elements_directory):
     mapping = {}
 
-    for filename in os.listdir(elements_directory):
-        if not filename.endswith(".json"):
-            continue
-
-        path = os.path.join(elements_directory, filename)
-
+    for filename, path in staged_files(elements_directory):
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = read_json(path)
         except json.JSONDecodeError:
             continue
 
@@ -191,8 +190,10 @@ def load_material_descriptors(elements_directory):
 # Mapping key is either CompilationGroupID (preferred) or GlobalId (fallback)
 # Each entry contains: list of layer dicts with thickness, layer number and total thickness.
 # The mapping shall be used to determine thickness ratios with which the BOQ volume is dissected
-def load_dissected_layers(target_layer_directory):
+# Layer records are materialized with their shared context (see layer_context.py)
+def load_dissected_layers(target_layer_directory, layer_context_directory):
     mapping = {}
+    layer_contexts = LayerContextLoader(layer_context_directory)
 
     for filename in os.listdir(target_layer_directory):
         if not filename.endswith(".json"):
@@ -201,10 +202,10 @@ def load_dissected_layers(target_layer_directory):
         path = os.path.join(target_layer_directory, filename)
 
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = read_json(path)
         except json.JSONDecodeError:
             continue
+        data = layer_contexts.materialize(data)
 
         group_id = data.get("CompilationGroupID")
         if not group_id:
@@ -314,10 +315,10 @@ def split_row_by_layers(row, layers_info):
 
 # Method to dissect the compiled BoQ from step 1b on dissected layers
 # Creates an updated BoQ with the dissected layers accounted for
-def dissector_boq(compiled_boq_path, target_layer_directory, elements_directory, output_folder):
+def dissector_boq(compiled_boq_path, target_layer_directory, layer_context_directory, elements_directory, output_folder):
 
     # Load dissected layers mapping
-    dissected_layers = load_dissected_layers(target_layer_directory)
+    dissected_layers = load_dissected_layers(target_layer_directory, layer_context_directory)
     non_dissected_elements = load_material_descriptors(elements_directory)
 
     # Load compiled BoQ
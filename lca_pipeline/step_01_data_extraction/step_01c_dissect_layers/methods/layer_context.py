@@ -0,0 +1,67 @@
+import os
+import json
+from .json_io import read_json
+
+# Shared element context of dissected layers
+# A multi-layer element is dissected into one small record per target layer. The element context (metadata, all material
+# layers, layer set metadata, geometry, psets, location) is stored once per element in the Layer_Contexts folder,
+# and the "Building Element Context" of each record references it:
+#   {"Layer Context": "<element>.json", "Target Layer Number": 2, "Element Metadata": {<per-layer overrides>}}
+# materialize_layer_record() rebuilds the full target layer data sheet (with the "Other Material Layers" of the record)
+# only when it is needed, e.g. when rendering the prompt.
+
+LAYER_CONTEXT_DIRECTORY_NAME = "Layer_Contexts"
+
+
+# Reference to the shared context of an element, stored in the "Building Element Context" of a layer record
+def layer_context_reference(context_filename, layer_number, metadata_overrides=None):
+    reference = {"Layer Context": context_filename, "Target Layer Number": layer_number}
+    if metadata_overrides:
+        reference["Element Metadata"] = metadata_overrides
+    return reference
+
+
+def is_layer_record(data):
+    return isinstance(data, dict) and isinstance(data.get("Building Element Context"), dict) and "Layer Context" in data["Building Element Context"]
+
+
+# Full target layer data sheet of a layer record (records in the inline format are returned unchanged)
+# The context holds all layers under "Material Layers", the record gets all but its target layer as "Other Material Layers"
+def materialize_layer_record(data, context):
+    if not is_layer_record(data) or context is None:
+        return data
+    reference = data["Building Element Context"]
+    target_position = (reference.get("Target Layer Number") or 0) - 1
+
+    building_element_context = {}
+    for key, value in context.items():
+        if key == "Material Layers":
+            building_element_context["Other Material Layers"] = [layer for position, layer in enumerate(value) if position != target_position]
+        elif key == "Element Metadata" and isinstance(reference.get("Element Metadata"), dict):
+            building_element_context[key] = {**value, **reference["Element Metadata"]}
+        else:
+            building_element_context[key] = value
+
+    return {key: (building_element_context if key == "Building Element Context" else value) for key, value in data.items()}
+
+
+class LayerContextLoader:
+    """Loads the shared layer contexts of a folder (each context is parsed once)."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.contexts = {}
+
+    def load(self, context_filename):
+        if context_filename not in self.contexts:
+            path = os.path.join(self.directory, context_filename)
+            try:
+                self.contexts[context_filename] = read_json(path)
+            except (OSError, json.JSONDecodeError):
+                self.contexts[context_filename] = None
+        return self.contexts[context_filename]
+
+    def materialize(self, data):
+        if not is_layer_record(data):
+            return data
+        return materialize_layer_record(data, self.load(data["Building Element Context"]["Layer Context"]))
@@ -1,8 +1,14 @@
+import yaml
 from pathlib import Path
 from methods.dissector import dissector_element, dissector_boq
 
 def dissect_layers():
 
+    # Unchanged data sheets are hard-linked or referenced instead of rewritten (see methods/staging.py)
+    with open(Path("config/master_config.yaml"), "r", encoding="utf-8") as f:
+        master_config = yaml.safe_load(f)
+    staging_mode = (master_config.get("staging_config", {}) or {}).get("mode", "hardlink")
+
     # Config (iterate over all source directories)
     # Source elements
     source_dirs = [
@@ -22,14 +28,17 @@ def dissect_layers():
     # Target Layer directory, for new JSON format of split multi-layer elements
     target_layer_directory = Path("data/pipeline/step_01_data_extraction/step_01c_dissect_layers/Target_Layers")
 
+    # Shared element context of the target layers of each multi-layer element (referenced by the target layer records)
+    layer_context_directory = Path("data/pipeline/step_01_data_extraction/step_01c_dissect_layers/Layer_Contexts")
+
     # Directory for updated BoQ
     output_folder = Path("data/pipeline/step_01_data_extraction/step_01c_dissect_layers")
 
     # Run the dissector for elements
-    dissector_element(source_dirs, elements_directory, target_layer_directory, metadata_path, output_folder)
+    dissector_element(source_dirs, elements_directory, target_layer_directory, layer_context_directory, metadata_path, output_folder, staging_mode)
 
     # Run the dissector for BoQ and update
-    dissector_boq(compiled_boq_path, target_layer_directory, elements_directory, output_folder)
+    dissector_boq(compiled_boq_path, target_layer_directory, layer_context_directory, elements_directory, output_folder)
 
 if __name__ == "__main__":
     dissect_layers()
\ No newline at end of file
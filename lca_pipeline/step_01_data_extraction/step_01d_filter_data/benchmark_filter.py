@@ -0,0 +1,187 @@
+# Benchmarks the filter engine of step 01d on the data sheets of the HiLo demo (data/input/HiLo_Demo)
+# The demo elements are dissected with step 01c first, so element sheets, target layer records and shared layer contexts
+# are all filtered. Compares the interpreting filter (filter.py), the compiled filter plan (filter_plan.py) and the
+# compiled plan in the process pool, and checks that all three write byte-identical data sheets.
+# Uses the filter preset and the pset filter of config/master_config.yaml (without token budget). Run from the repository root:
+#   python lca_pipeline/step_01_data_extraction/step_01d_filter_data/benchmark_filter.py [rounds] [workers]
+import os
+import sys
+import time
+import tempfile
+import importlib.util
+from pathlib import Path
+from methods.filter import (
+    load_yaml_config, load_json, save_json, filter_element_json, filter_target_layer_json, filter_layer_context,
+    layer_record_filter_config, reorder_keys, reorder_keys_target_layer, apply_pset_filter, load_selected_keys,
+    load_model_context
+)
+from methods.filter_plan import FilterPlan, filter_files
+from methods.layer_context import is_layer_record
+
+demo_directory = Path("data/input/HiLo_Demo/step_01a_extract_all")
+dissect_layers_directory = Path("lca_pipeline/step_01_data_extraction/step_01c_dissect_layers/methods")
+
+# Output folder of each kind of data sheet
+KIND_FOLDERS = {"element": "Elements", "target_layer": "Target_Layers", "layer_context": "Layer_Contexts"}
+
+
+# Dissects the demo elements with step 01c (its methods package is loaded under another name, both steps call it "methods")
+def dissect_demo(input_dir):
+    spec = importlib.util.spec_from_file_location(
+        "step_01c_methods", dissect_layers_directory / "__init__.py", submodule_search_locations=[str(dissect_layers_directory)]
+    )
+    package = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = package
+    spec.loader.exec_module(package)
+    dissector = importlib.import_module("step_01c_methods.dissector")
+
+    dissector.dissector_element(
+        [demo_directory / "Elements", demo_directory / "Compositions"],
+        os.path.join(input_dir, "Elements"), os.path.join(input_dir, "Target_Layers"), os.path.join(input_dir, "Layer_Contexts"),
+        demo_directory / "metadata_step_01a.json", input_dir, "copy"
+    )
+    return {kind: sorted(Path(input_dir, folder).glob("*.json")) for kind, folder in KIND_FOLDERS.items()}
+
+
+# Filters one data sheet with the interpreting filter, as step 01d did before the compiled plans
+def filter_interpreting(kind, data, plan_arguments):
+    model_context = plan_arguments["model_context"]
+    remove_empty = plan_arguments["remove_empty"]
+    selected_keys = plan_arguments["selected_keys"]
+    nested_order = plan_arguments["building_element_context_key_order"]
+
+    if kind == "element":
+        filtered = filter_element_json(data, plan_arguments["config_element"], remove_empty, model_context)
+        if selected_keys:
+            filtered = apply_pset_filter(filtered, selected_keys)
+        if plan_arguments["element_key_order"]:
+            filtered = reorder_keys(filtered, plan_arguments["element_key_order"])
+        return filtered
+
+    if kind == "layer_context":
+        filtered = filter_layer_context(data, plan_arguments["config_target_layer"], remove_empty, model_context)
+        if filtered is None:
+            return None
+        if selected_keys:
+            filtered = apply_pset_filter(filtered, selected_keys)
+        context_order = ["Material Layers" if key == "Other Material Layers" else key for key in nested_order]
+        if context_order:
+            filtered = reorder_keys_target_layer(filtered, context_order)
+        return filtered
+
+    layer_config = plan_arguments["config_target_layer"]
+    if is_layer_record(data):
+        layer_config = layer_record_filter_config(layer_config)
+    filtered = filter_target_layer_json(data, layer_config, remove_empty, model_context)
+    if selected_keys:
+        filtered = apply_pset_filter(filtered, selected_keys)
+    if plan_arguments["target_layer_key_order"]:
+        filtered = reorder_keys_target_layer(filtered, plan_arguments["target_layer_key_order"])
+    if "Building Element Context" in filtered and nested_order:
+        filtered["Building Element Context"] = reorder_keys_target_layer(filtered["Building Element Context"], nested_order)
+    return filtered
+
+
+def output_tasks(files, output_dir):
+    return [
+        (kind, str(file_path), os.path.join(output_dir, KIND_FOLDERS[kind], file_path.name))
+        for kind, kind_files in files.items()
+        for file_path in kind_files
+    ]
+
+
+def run_interpreting(files, output_dir, plan_arguments):
+    for kind, input_path, output_path in output_tasks(files, output_dir):
+        try:
+            filtered = filter_interpreting(kind, load_json(input_path), plan_arguments)
+            if filtered is not None:
+                save_json(filtered, output_path)
+        except Exception:
+            continue
+
+
+def run_compiled(files, output_dir, plan_arguments, workers):
+    filter_files(output_tasks(files, output_dir), plan_arguments, workers)
+
+
+def read_outputs(output_dir):
+    outputs = {}
+    for folder in KIND_FOLDERS.values():
+        for filename in sorted(os.listdir(os.path.join(output_dir, folder))):
+            with open(os.path.join(output_dir, folder, filename), "rb") as f:
+                outputs[f"{folder}/{filename}"] = f.read()
+    return outputs
+
+
+def benchmark_filter(rounds=5, workers=0):
+    master_config = load_yaml_config(Path("config/master_config.yaml"))
+    filter_config = master_config.get("filter_config", {})
+    if filter_config.get("mode") == "custom":
+        config_dir = Path(filter_config.get("custom_path", ""))
+    else:
+        config_dir = Path(f"config/data_filters/filter_presets/{filter_config.get('preset', '')}")
+
+    selected_keys = None
+    if filter_config.get("use_pset_filter", False) and filter_config.get("pset_key_file"):
+        selected_keys = load_selected_keys(filter_config["pset_key_file"])
+
+    plan_arguments = {
+        "config_element": load_yaml_config(config_dir / "filter_element.yaml"),
+        "config_target_layer": load_yaml_config(config_dir / "filter_target_layer.yaml"),
+        "remove_empty": filter_config.get("remove_empty_values", False),
+        "model_context": load_model_context(demo_directory / "model_context.json"),
+        "selected_keys": selected_keys,
+        "element_key_order": filter_config.get("element_key_order", []),
+        "target_layer_key_order": filter_config.get("target_layer_key_order", []),
+        "building_element_context_key_order": filter_config.get("building_element_context_key_order", [])
+    }
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        files = dissect_demo(os.path.join(temp_dir, "input"))
+        count = sum(len(kind_files) for kind_files in files.values())
+        workers = workers if workers > 0 else (os.cpu_count() or 1)
+        print(f"Filter preset: {config_dir}, {rounds} rounds, {workers} workers")
+        print(", ".join(f"{len(files[kind])} {folder}" for kind, folder in KIND_FOLDERS.items()))
+
+        # In-memory filtering only (filter, model context, clean, pset filter and reorder, without reading and writing files)
+        sheets = [(kind, load_json(file_path)) for kind, kind_files in files.items() for file_path in kind_files]
+        plan = FilterPlan(**plan_arguments)
+        start_time = time.perf_counter()
+        for _ in range(rounds):
+            for kind, data in sheets:
+                filter_interpreting(kind, data, plan_arguments)
+        interpreting_time = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        for _ in range(rounds):
+            for kind, data in sheets:
+                getattr(plan, kind)(data)
+        compiled_time = time.perf_counter() - start_time
+        print(f"{'Filter only, interpreting':<32} {count * rounds / interpreting_time:>10.0f} sheets/s")
+        print(f"{'Filter only, compiled':<32} {count * rounds / compiled_time:>10.0f} sheets/s")
+
+        # Whole step (read, filter, clean, pset filter, reorder, write)
+        runs = {
+            "Step, interpreting": lambda output_dir: run_interpreting(files, output_dir, plan_arguments),
+            "Step, compiled": lambda output_dir: run_compiled(files, output_dir, plan_arguments, 1),
+            f"Step, compiled, {workers} workers": lambda output_dir: run_compiled(files, output_dir, plan_arguments, workers)
+        }
+        reference = None
+        for index, (label, run) in enumerate(runs.items()):
+            output_dir = os.path.join(temp_dir, str(index))
+            for folder in KIND_FOLDERS.values():
+                os.makedirs(os.path.join(output_dir, folder))
+            start_time = time.perf_counter()
+            for _ in range(rounds):
+                run(output_dir)
+            elapsed = time.perf_counter() - start_time
+
+            outputs = read_outputs(output_dir)
+            if reference is None:
+                reference = outputs
+            identical = "byte-identical" if outputs == reference else "DIFFERENT OUTPUT"
+            print(f"{label:<32} {count * rounds / elapsed:>10.0f} sheets/s   {identical}")
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    benchmark_filter(rounds, workers)
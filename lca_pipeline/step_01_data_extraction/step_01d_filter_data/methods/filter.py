@@ -1,7 +1,7 @@
 import yaml
-import json
 import os
 import importlib.util
+from .json_io import read_json, write_json
 
 
 
@@ -10,12 +10,28 @@ def load_yaml_config(path):
         return yaml.safe_load(f)
 
 def load_json(path):
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return read_json(path)
+
+# artifact: "data_sheet" or "report" (see json_io.py)
+def save_json(data, path, artifact="data_sheet"):
+    write_json(data, path, artifact)
 
-def save_json(data, path):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
+# Loads the model context sidecar written by step 01a (empty if it does not exist)
+def load_model_context(path):
+    if not os.path.exists(path):
+        return {}
+    return load_json(path)
+
+# Replaces model context references ({"Model Context": <key>}) that survived the filter by the referenced data
+def resolve_model_context(data, model_context):
+    if isinstance(data, dict):
+        if len(data) == 1 and "Model Context" in data:
+            return model_context.get(data["Model Context"], data) if model_context else data
+        return {k: resolve_model_context(v, model_context) for k, v in data.items()}
+    elif isinstance(data, list):
+        return [resolve_model_context(item, model_context) for item in data]
+    else:
+        return data
 
 def clean_dict(data, preserve_keys_at_root=None, empty_values=None, level=0):
     if empty_values is None:
@@ -39,22 +55,6 @@ def clean_dict(data, preserve_keys_at_root=None, empty_values=None, level=0):
         return data
 
 
-def decode_unicode(directory_path, recursive=False):
-    for root, dirs, files in os.walk(directory_path):
-        for file in files:
-            if file.endswith(".json"):
-                file_path = os.path.join(root, file)
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        json.dump(data, f, indent=2, ensure_ascii=False)
-                except Exception as e:
-                    pass
-        if not recursive:
-            break
-
-
 def reorder_keys(data: dict, preferred_order: list) -> dict:
     ordered = {}
     for key in preferred_order:
@@ -120,7 +120,7 @@ def apply_element_filter(data, config):
     return result
 
 
-def filter_element_json(data, config, remove_empty=False):
+def filter_element_json(data, config, remove_empty=False, model_context=None):
 
     # hard-code keys to preserve (since some prompt variable specify these) & empty values 
     preserve_keys = [
@@ -134,6 +134,9 @@ def filter_element_json(data, config, remove_empty=False):
     # Apply filtering
     filtered = apply_element_filter(data, {k: v for k, v in config.items() if not k.startswith("_")})
 
+    # Inline only the model context parts that the filter kept
+    filtered = resolve_model_context(filtered, model_context)
+
     # Clean result if requested
     if remove_empty:
         filtered = clean_dict(filtered, preserve_keys_at_root=preserve_keys, empty_values=empty_values)
@@ -141,7 +144,7 @@ def filter_element_json(data, config, remove_empty=False):
     return filtered
 
 
-def filter_target_layer_json(data, config, remove_empty=False):
+def filter_target_layer_json(data, config, remove_empty=False, model_context=None):
 
     # hard-code keys to preserve (since some prompt variable specify these) & empty values 
     preserve_keys = [
@@ -155,6 +158,9 @@ def filter_target_layer_json(data, config, remove_empty=False):
     # Apply filtering
     filtered = apply_element_filter(data, {k: v for k, v in config.items() if not k.startswith("_")})
 
+    # Inline only the model context parts that the filter kept
+    filtered = resolve_model_context(filtered, model_context)
+
     # Clean result if requested
     if remove_empty:
         filtered = clean_dict(filtered, preserve_keys_at_root=preserve_keys, empty_values=empty_values)
@@ -162,6 +168,41 @@ def filter_target_layer_json(data, config, remove_empty=False):
     return filtered
 
 
+# Filters the shared context of a multi-layer element (see layer_context.py) once for all of its layer records
+# The "Building Element Context" rule of the target layer filter applies, "Material Layers" (all layers of the element)
+# are filtered with the "Other Material Layers" rule. Returns None if the filter drops the element context.
+def filter_layer_context(context, config, remove_empty=False, model_context=None):
+    rule = config.get("Building Element Context")
+    if rule is True:
+        return resolve_model_context(context, model_context)
+    if not isinstance(rule, dict) or not rule.get("_include", True):
+        return None
+
+    context_rule = {
+        ("Material Layers" if key == "Other Material Layers" else key): value
+        for key, value in rule.items() if not key.startswith("_")
+    }
+    filtered = apply_element_filter(context, context_rule)
+    filtered = resolve_model_context(filtered, model_context)
+
+    if remove_empty:
+        filtered = clean_dict(filtered, empty_values=["Not defined", "Unknown", [], {}, None])
+
+    return filtered
+
+
+# Target layer filter for layer records: the context reference is kept, per-layer metadata overrides are filtered
+# with the "Element Metadata" rule (the shared context itself is filtered by filter_layer_context)
+def layer_record_filter_config(config):
+    rule = config.get("Building Element Context")
+    if not isinstance(rule, dict):
+        return config
+    record_rule = {"_include": rule.get("_include", True), "Layer Context": True, "Target Layer Number": True}
+    if "Element Metadata" in rule:
+        record_rule["Element Metadata"] = rule["Element Metadata"]
+    return {**config, "Building Element Context": record_rule}
+
+
 def reorder_keys_target_layer(data, preferred_order):
     if not isinstance(data, dict):
         return data
@@ -174,10 +215,14 @@ def reorder_keys_target_layer(data, preferred_order):
 
 # Methods for filtering of selected property sets
 def load_selected_keys(py_file_path: str) -> set:
+    return set(load_selected_key_order(py_file_path))
+
+# Selected pset keys in the order of the file (the token budget trims keys at the end of the list first)
+def load_selected_key_order(py_file_path: str) -> list:
     spec = importlib.util.spec_from_file_location("pset_module", py_file_path)
     module = importlib.util.module_from_spec(spec)
     spec.loader.exec_module(module)
-    return set(module.selected_keys)
+    return list(module.selected_keys)
 
 def filter_psets(psets: dict, selected_keys: set) -> dict:
     def try_round(value):
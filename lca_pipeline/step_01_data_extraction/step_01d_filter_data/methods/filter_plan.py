@@ -0,0 +1,302 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from .filter import (
+    load_json, save_json, resolve_model_context, reorder_keys, reorder_keys_target_layer,
+    apply_pset_filter, layer_record_filter_config
+)
+from .layer_context import is_layer_record
+from .token_budget import TokenBudget
+
+# Compiled filter plans
+# apply_element_filter() and clean_dict() interpret the nested YAML rules for every file and every nested item.
+# compile_filter() and compile_cleaner() turn the rules into a tree of closures once: the keys to keep, the nested
+# plans and the per-IfcEntity item plans are resolved at compile time, and a data sheet is only walked along the
+# rules. The compiled plans produce exactly the same output as the interpreting functions (the filter.py functions
+# are kept as the reference, see benchmark_filter.py).
+# FilterPlan bundles the plans of a run of step 01d (and trims data sheets above the token budget, see token_budget.py),
+# filter_files() processes data sheets in a process pool.
+
+
+# Node that fails like the interpreting filter would, e.g. an item rule that is not a mapping ("IfcMaterial: true")
+def _raising_plan(error):
+    def plan(data):
+        raise error
+    return plan
+
+
+def _rule_get(rule, key, default):
+    try:
+        return rule.get(key, default)
+    except AttributeError as e:
+        return _raising_plan(e)
+
+
+# Compiles a (nested) filter rule. Plans are memoized by rule, since the default item rule of a list is the rule itself.
+def _compile_rule(rule, memo):
+    if id(rule) in memo:
+        return memo[id(rule)]
+
+    fields = []
+
+    def plan(data):
+        if not isinstance(data, dict):
+            return data
+        result = {}
+        for key, kind, include, nested, item_plans, default_item in fields:
+            if key not in data:
+                continue
+            value = data[key]
+            if kind is True:
+                result[key] = value
+            elif isinstance(value, dict):
+                if include:
+                    result[key] = nested(value)
+            elif isinstance(value, list):
+                filtered_items = []
+                for item in value:
+                    if not isinstance(item, dict):
+                        continue
+                    entity = item.get("IfcEntity", _MISSING)
+                    item_include, item_plan = default_item if entity is _MISSING else item_plans.get(entity, default_item)
+                    if callable(item_include):
+                        item_include(item)  # Raises like the interpreting filter
+                    if not item_include:
+                        continue
+                    filtered_items.append(item_plan(item))
+                if filtered_items or include:
+                    result[key] = filtered_items
+            elif include:
+                result[key] = value
+        return result
+
+    memo[id(rule)] = plan
+
+    try:
+        for key, sub_rule in rule.items():
+            if key.startswith("_"):
+                continue
+            if isinstance(sub_rule, dict):
+                item_plans = {entity: _compile_item_rule(entity_rule, memo) for entity, entity_rule in sub_rule.items()}
+                default_item = _compile_item_rule(sub_rule.get("item", sub_rule), memo)
+                fields.append((key, dict, sub_rule.get("_include", True), _compile_rule(sub_rule, memo), item_plans, default_item))
+            elif sub_rule is True:
+                fields.append((key, True, True, None, None, None))
+    except AttributeError as e:
+        # Rule keys that are not strings fail on every dict, like the interpreting filter
+        memo[id(rule)] = _raising_dict_plan(e)
+
+    return memo[id(rule)]
+
+
+def _raising_dict_plan(error):
+    def plan(data):
+        if not isinstance(data, dict):
+            return data
+        raise error
+    return plan
+
+
+# (include, plan) of a list item rule; rules that are not mappings raise when an item uses them
+def _compile_item_rule(item_rule, memo):
+    include = _rule_get(item_rule, "_include", True)
+    if callable(include):
+        return include, include
+    return include, _compile_rule(item_rule, memo)
+
+
+_MISSING = object()
+
+
+# Compiled apply_element_filter() for the rule set of a YAML preset (root keys starting with "_" are ignored)
+def compile_filter(config):
+    try:
+        rule = {k: v for k, v in config.items() if not k.startswith("_")}
+    except AttributeError as e:
+        return _raising_plan(e)
+    return _compile_rule(rule, {})
+
+
+# Compiled clean_dict() for the given root keys to preserve and "empty" values
+def compile_cleaner(preserve_keys_at_root=None, empty_values=None):
+    if empty_values is None:
+        empty_values = ["Not defined", "Unknown", [], {}]
+
+    empty_scalars = set()
+    empty_containers = []
+    for value in empty_values:
+        if isinstance(value, (dict, list)):
+            if value:
+                empty_containers.append(value)
+        else:
+            empty_scalars.add(value)
+
+    def is_empty(value):
+        if isinstance(value, (dict, list)):
+            return not value or value in empty_containers
+        return value in empty_scalars
+
+    def clean(data, root=False):
+        if isinstance(data, dict):
+            cleaned = {}
+            for k, v in data.items():
+                v_clean = clean(v)
+                if root and preserve_keys_at_root and k in preserve_keys_at_root:
+                    cleaned[k] = v_clean  # Preserve even if empty
+                elif not is_empty(v_clean):
+                    cleaned[k] = v_clean
+            return cleaned
+        elif isinstance(data, list):
+            cleaned_list = [clean(item) for item in data]
+            return [item for item in cleaned_list if not is_empty(item)]
+        else:
+            return data
+
+    return lambda data: clean(data, root=True)
+
+
+# Hard-coded keys to preserve (since some prompt variable specify these) & empty values, as in filter.py
+PRESERVE_KEYS = [
+    "Element Metadata",
+    "Element Material Data",
+    "Element Geometry Data",
+    "Element Property Sets"
+]
+EMPTY_VALUES = ["Not defined", "Unknown", [], {}, None]
+
+
+class FilterPlan:
+    """Compiled filters of a step 01d run for element sheets, target layer sheets and shared layer contexts."""
+
+    def __init__(self, config_element, config_target_layer, remove_empty=False, model_context=None, selected_keys=None,
+                 element_key_order=None, target_layer_key_order=None, building_element_context_key_order=None,
+                 token_budget=None, trim_filters=None, selected_key_order=None):
+        self.model_context = model_context
+        self.selected_keys = selected_keys
+        self.element_key_order = element_key_order or []
+        self.target_layer_key_order = target_layer_key_order or []
+        self.nested_key_order = building_element_context_key_order or []
+        self.context_key_order = ["Material Layers" if key == "Other Material Layers" else key for key in self.nested_key_order]
+
+        self.element_filter = compile_filter(config_element)
+        self.target_layer_filter = compile_filter(config_target_layer)
+        self.layer_record_filter = compile_filter(layer_record_filter_config(config_target_layer))
+        self.cleaner = compile_cleaner(PRESERVE_KEYS, EMPTY_VALUES) if remove_empty else None
+        self.context_cleaner = compile_cleaner(None, EMPTY_VALUES) if remove_empty else None
+
+        # Shared layer contexts (see filter_layer_context)
+        context_rule = config_target_layer.get("Building Element Context")
+        self.context_mode = "keep" if context_rule is True else "filter"
+        self.context_filter = None
+        if context_rule is not True:
+            if not isinstance(context_rule, dict) or not context_rule.get("_include", True):
+                self.context_mode = "drop"
+            else:
+                self.context_filter = compile_filter({
+                    ("Material Layers" if key == "Other Material Layers" else key): value
+                    for key, value in context_rule.items() if not key.startswith("_")
+                })
+
+        # Token budget: data sheets above the budget are reduced with the plans of the lower presets
+        # (trim_filters: [(preset name, element filter, target layer filter)], applied to already filtered data)
+        self.token_budget = None
+        if token_budget and token_budget.get("enabled", False):
+            lower_plans = [
+                (preset_name, FilterPlan(
+                    lower_element, lower_target_layer, remove_empty,
+                    element_key_order=element_key_order, target_layer_key_order=target_layer_key_order,
+                    building_element_context_key_order=building_element_context_key_order
+                ))
+                for preset_name, lower_element, lower_target_layer in (trim_filters or [])
+            ]
+            self.token_budget = TokenBudget(token_budget, selected_key_order, lower_plans)
+
+    def _finish(self, filtered, cleaner):
+        filtered = resolve_model_context(filtered, self.model_context)
+        if cleaner is not None:
+            filtered = cleaner(filtered)
+        if self.selected_keys:
+            filtered = apply_pset_filter(filtered, self.selected_keys)
+        return filtered
+
+    def element(self, data):
+        filtered = self._finish(self.element_filter(data), self.cleaner)
+        if self.element_key_order:
+            filtered = reorder_keys(filtered, self.element_key_order)
+        return filtered
+
+    def target_layer(self, data):
+        layer_filter = self.layer_record_filter if is_layer_record(data) else self.target_layer_filter
+        filtered = self._finish(layer_filter(data), self.cleaner)
+        if self.target_layer_key_order:
+            filtered = reorder_keys_target_layer(filtered, self.target_layer_key_order)
+        if "Building Element Context" in filtered and self.nested_key_order:
+            filtered["Building Element Context"] = reorder_keys_target_layer(
+                filtered["Building Element Context"], self.nested_key_order
+            )
+        return filtered
+
+    # Returns None if the filter drops the element context
+    def layer_context(self, data):
+        if self.context_mode == "drop":
+            return None
+        if self.context_mode == "keep":
+            filtered = resolve_model_context(data, self.model_context)
+            if self.selected_keys:
+                filtered = apply_pset_filter(filtered, self.selected_keys)
+        else:
+            filtered = self._finish(self.context_filter(data), self.context_cleaner)
+        if self.context_key_order:
+            filtered = reorder_keys_target_layer(filtered, self.context_key_order)
+        return filtered
+
+    # Filters one data sheet file ("element", "target_layer" or "layer_context")
+    # references: the filtered layer records of a shared layer context, budgeted together with it (see token_budget.py)
+    # Returns whether the data sheet was written and the token budget record (None if it was not trimmed)
+    def filter_file(self, kind, input_path, output_path, references=None):
+        try:
+            filtered = getattr(self, kind)(load_json(input_path))
+            if filtered is None:
+                return False, None
+            record = None
+            if self.token_budget is not None:
+                filtered, record = self.token_budget.trim(kind, filtered, references)
+            save_json(filtered, output_path)
+            return True, record
+        except Exception:
+            return False, None
+
+
+# Plan of a pool worker (compiled once per process)
+_worker_plan = None
+
+
+def _init_worker(plan_arguments):
+    global _worker_plan
+    _worker_plan = FilterPlan(**plan_arguments)
+
+
+def _filter_task(task):
+    return _worker_plan.filter_file(*task)
+
+
+# Filters the data sheets of the tasks ((kind, input path, output path[, references])) with the compiled plan
+# workers: number of processes (0 = one per CPU core, 1 = sequentially in this process)
+# Returns whether each data sheet was written (in the order of the tasks) and the token budget records
+# ({"<folder>/<filename>": record})
+def filter_files(tasks, plan_arguments, workers=0):
+    workers = workers if workers and workers > 0 else (os.cpu_count() or 1)
+    workers = min(workers, len(tasks)) if tasks else 1
+    if workers <= 1:
+        plan = FilterPlan(**plan_arguments)
+        results = [plan.filter_file(*task) for task in tasks]
+    else:
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(plan_arguments,)) as executor:
+            results = list(executor.map(_filter_task, tasks, chunksize=chunksize))
+
+    records = {}
+    for task, (written, record) in zip(tasks, results):
+        output_path = task[2]
+        if record is not None:
+            records[os.path.join(os.path.basename(os.path.dirname(output_path)), os.path.basename(output_path))] = record
+    return [written for written, record in results], records
@@ -0,0 +1,111 @@
+import os
+import re
+import json
+from .json_io import write_json
+
+# Deduplication of target layers across elements before material inference
+# The same layer (e.g. "Beton 200 mm") appears in many multi-layer elements. Target layers with the same layer signature
+# (canonical material name, thickness within a tolerance and, optionally, the IFC entity of the parent element) are
+# grouped, only one representative per group is passed to the inference (step 02a), and its result is fanned out to
+# all members of the group. The groups are saved to layer_dedup_overview.json:
+#   {"<representative>": {"Signature": {...}, "Members": ["<member>", ...]}}
+# Layers without a known material name are never grouped.
+# Groups are only formed from target layers whose filtered data sheet was written, so a layer that fails to filter is
+# never a representative (the next layer of the group takes its place).
+
+LAYER_DEDUP_OVERVIEW_FILENAME = "layer_dedup_overview.json"
+
+DEFAULT_LAYER_DEDUP_CONFIG = {
+    "enabled": False,
+    "thickness_tolerance": 0.001,
+    "include_parent_entity": True
+}
+
+UNKNOWN_MATERIAL_NAMES = {"", "unknown", "not defined", "none"}
+
+
+def layer_dedup_config(config=None):
+    merged = dict(DEFAULT_LAYER_DEDUP_CONFIG)
+    merged.update({key: value for key, value in (config or {}).items() if key in DEFAULT_LAYER_DEDUP_CONFIG})
+    return merged
+
+
+# Canonical material name: case, separators ("_", "-", "/") and whitespace are ignored
+def canonical_material_name(name):
+    if not isinstance(name, str):
+        return None
+    name = re.sub(r"\s+", " ", re.sub(r"[_\-/]+", " ", name.casefold())).strip()
+    return None if name in UNKNOWN_MATERIAL_NAMES else name
+
+
+def _thickness_bucket(thickness, tolerance):
+    if not isinstance(thickness, (int, float)):
+        return thickness
+    if not tolerance:
+        return thickness
+    return round(round(thickness / tolerance) * tolerance, 9)
+
+
+# Layer signature of a (materialized) target layer data sheet, None if the layer cannot be deduplicated
+def layer_signature(data, config):
+    target_layer = data.get("Target Layer of Material Inference", {})
+    material_name = canonical_material_name(target_layer.get("Material Name"))
+    if material_name is None:
+        return None
+
+    signature = {
+        "Material Name": material_name,
+        "Thickness": _thickness_bucket(target_layer.get("Thickness"), config["thickness_tolerance"]),
+        "Thickness Unit": target_layer.get("Thickness Unit")
+    }
+    if config["include_parent_entity"]:
+        signature["Parent Entity"] = data.get("Building Element Context", {}).get("Element Metadata", {}).get("Type")
+    return signature
+
+
+class LayerDeduplicator:
+    """Assigns target layers to groups of identical layer signatures (the first layer of a group is its representative)."""
+
+    def __init__(self, config=None):
+        self.config = layer_dedup_config(config)
+        self.enabled = bool(self.config["enabled"])
+        self.representatives = {}  # signature key -> representative name
+        self.overview = {}
+        self.layers = 0
+
+    # Layer signature of a (materialized, unfiltered) target layer, None if the layer is not deduplicated
+    def signature(self, data):
+        if not self.enabled:
+            return None
+        return layer_signature(data, self.config)
+
+    # Returns the representative of the layer (None if the layer is a representative itself or is not deduplicated)
+    # Layers are assigned in a fixed order, once their filtered data sheet is written
+    def assign(self, name, signature):
+        self.layers += 1
+        if signature is None:
+            return None
+        key = json.dumps(signature, sort_keys=True)
+        representative = self.representatives.get(key)
+        if representative is None:
+            self.representatives[key] = name
+            self.overview[name] = {"Signature": signature, "Members": []}
+            return None
+        self.overview[representative]["Members"].append(name)
+        return representative
+
+    def save(self, output_folder):
+        overview = {name: group for name, group in self.overview.items() if group["Members"]}
+        write_json(overview, os.path.join(output_folder, LAYER_DEDUP_OVERVIEW_FILENAME), "report")
+
+    def report(self):
+        members = sum(len(group["Members"]) for group in self.overview.values())
+        inferred = self.layers - members
+        return {
+            "Settings": self.config,
+            "Target Layers": self.layers,
+            "Groups with Several Layers": sum(1 for group in self.overview.values() if group["Members"]),
+            "Target Layers Inferred": inferred,
+            "Target Layers Reusing a Representative": members,
+            "Dedup Ratio": round(self.layers / inferred, 3) if inferred else None
+        }
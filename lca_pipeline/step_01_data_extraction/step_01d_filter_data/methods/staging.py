@@ -0,0 +1,118 @@
+import os
+import json
+import shutil
+from .json_io import read_json, write_json
+
+# Staging of unchanged data sheets between pipeline steps
+# A step that passes an element on without changing it does not copy the file into its output folder:
+#   - "hardlink": the output file is a hard link to the upstream file (falls back to a copy across file systems)
+#   - "manifest": no file is written, the output folder gets an entry in staging_manifest.json pointing at the upstream file
+#   - "copy":     the file is copied (previous behaviour)
+# Readers of a staged folder use staged_files(), which lists the real files and resolves the manifest entries.
+# Files in a staged folder may be hard links to upstream files, so they are never rewritten in place:
+# StagingArea.write_json() removes an existing file before writing a new one, and write_json() of json_io.py (used by
+# all steps) replaces a file instead of writing through it, so a re-run of an upstream step does not change the data
+# sheets staged by later steps. In "manifest" mode, later steps read the current upstream files.
+
+STAGING_MANIFEST_FILENAME = "staging_manifest.json"
+STAGING_MODES = ("hardlink", "manifest", "copy")
+
+
+def _staging_manifest_path(directory):
+    return os.path.join(directory, STAGING_MANIFEST_FILENAME)
+
+
+def _remove(path):
+    if os.path.lexists(path):
+        os.remove(path)
+
+
+def _load_staging_manifest(directory):
+    path = _staging_manifest_path(directory)
+    if not os.path.exists(path):
+        return {}
+    try:
+        return read_json(path)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+# (filename, path) of all JSON data sheets of a staged folder, sorted by filename
+# Manifest entries point at the upstream file (relative to the folder), real files take precedence
+def staged_files(directory):
+    files = {}
+    for filename, source in _load_staging_manifest(directory).items():
+        path = os.path.normpath(os.path.join(directory, source))
+        if os.path.exists(path):
+            files[filename] = path
+    if os.path.isdir(directory):
+        for filename in os.listdir(directory):
+            if filename.endswith(".json") and filename != STAGING_MANIFEST_FILENAME:
+                files[filename] = os.path.join(directory, filename)
+    return sorted(files.items())
+
+
+class StagingArea:
+    """Output folder of a step, in which unchanged data sheets are staged instead of copied."""
+
+    def __init__(self, directory, mode="hardlink"):
+        if mode not in STAGING_MODES:
+            raise ValueError(f"Invalid staging mode: {mode}. Must be one of {', '.join(STAGING_MODES)}.")
+        self.directory = str(directory)
+        self.mode = mode
+        self.manifest = {}
+        self.linked = 0
+        self.referenced = 0
+        self.copied = 0
+        self.written = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    # Passes an unchanged data sheet on (source may itself be resolved from an upstream staging manifest)
+    def stage(self, filename, source_path):
+        destination = os.path.join(self.directory, filename)
+        source_path = os.path.abspath(source_path)
+        if os.path.abspath(destination) == source_path:
+            return destination
+        _remove(destination)
+        self.manifest.pop(filename, None)
+
+        if self.mode == "manifest":
+            self.manifest[filename] = os.path.relpath(source_path, self.directory)
+            self.referenced += 1
+            return source_path
+        if self.mode == "hardlink":
+            try:
+                os.link(source_path, destination)
+                self.linked += 1
+                return destination
+            except OSError:
+                pass  # Other file system or no hard link support, copy instead
+        shutil.copy2(source_path, destination)
+        self.copied += 1
+        return destination
+
+    # Writes a changed data sheet (never through an existing hard link)
+    def write_json(self, filename, data):
+        destination = os.path.join(self.directory, filename)
+        _remove(destination)
+        self.manifest.pop(filename, None)
+        write_json(data, destination)
+        self.written += 1
+        return destination
+
+    # Writes the staging manifest (an empty manifest removes the one of a previous run)
+    def close(self):
+        path = _staging_manifest_path(self.directory)
+        if self.manifest:
+            write_json(self.manifest, path, "internal")
+        else:
+            _remove(path)
+
+    def report(self):
+        return {
+            "Mode": self.mode,
+            "Unchanged Data Sheets Hard-Linked": self.linked,
+            "Unchanged Data Sheets Referenced in Manifest": self.referenced,
+            "Unchanged Data Sheets Copied": self.copied,
+            "Changed Data Sheets Written": self.written
+        }
@@ -0,0 +1,148 @@
+import json
+import math
+from .layer_context import materialize_layer_record
+
+# Token budget per data sheet
+# The filter preset sets the level of information (LOI) for all elements, but a few elements with huge pset dumps still
+# produce very large prompts. The token budget estimates the prompt tokens of each filtered data sheet offline (the
+# data sheet is passed to the prompt as indented JSON) and trims data sheets above the budget, lowest priority first:
+#   1. Pset keys that are not in pset_selection.py (only present if the pset filter is off)
+#   2. Reduction to the next lower filter preset (e.g. high_LOI -> medium_LOI -> low_LOI) for this data sheet only
+#   3. Pset keys of pset_selection.py, from the end of the list to the beginning ("Psets Object Type" before "Psets Element")
+# Element metadata and material data kept by the lowest preset are never trimmed, so a data sheet may stay above the budget.
+# A shared layer context is never prompted on its own, but inside each layer record that references it. Its budget is
+# checked on the largest of these records after materialization (see layer_context.py), so the layer records are
+# filtered and trimmed before the contexts.
+
+DEFAULT_TOKEN_BUDGET_CONFIG = {
+    "enabled": False,
+    "max_tokens": 2000,
+    "tokenizer": "estimate"
+}
+
+# Order of the LOI presets, from the highest to the lowest level of information
+LOI_PRESET_ORDER = ["high_LOI", "medium_LOI", "low_LOI"]
+
+PSET_GROUPS = ["Psets Object Type", "Psets Element"]
+
+CHARS_PER_TOKEN = 4
+
+
+def token_budget_config(config=None):
+    merged = dict(DEFAULT_TOKEN_BUDGET_CONFIG)
+    merged.update({key: value for key, value in (config or {}).items() if key in DEFAULT_TOKEN_BUDGET_CONFIG})
+    return merged
+
+
+# Lower presets to reduce a data sheet to (a custom filter is reduced through all presets)
+def trim_presets(filter_mode, preset_name):
+    if filter_mode == "preset" and preset_name in LOI_PRESET_ORDER:
+        return LOI_PRESET_ORDER[LOI_PRESET_ORDER.index(preset_name) + 1:]
+    return list(LOI_PRESET_ORDER)
+
+
+# Token counter: "tiktoken" counts the tokens of OpenAI models (if tiktoken is installed), "estimate" assumes
+# about 4 characters per token
+def token_counter(tokenizer="estimate"):
+    if tokenizer == "tiktoken":
+        try:
+            import tiktoken
+            encoding = tiktoken.get_encoding("o200k_base")
+            return lambda text: len(encoding.encode(text))
+        except ImportError:
+            print("[TOKEN BUDGET] tiktoken is not installed, tokens are estimated from the number of characters.")
+    return lambda text: math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+# Pset dictionaries of a data sheet (element, shared layer context or target layer with inline context)
+def _pset_groups(data):
+    containers = [data.get("Element Property Sets")]
+    building_element_context = data.get("Building Element Context")
+    if isinstance(building_element_context, dict):
+        containers.append(building_element_context.get("Element Property Sets"))
+    groups = []
+    for container in containers:
+        if isinstance(container, dict):
+            groups += [container[name] for name in PSET_GROUPS if isinstance(container.get(name), dict)]
+    return groups
+
+
+class TokenBudget:
+    """Trims filtered data sheets above the token budget (see above)."""
+
+    def __init__(self, config, selected_key_order=None, lower_plans=None):
+        self.config = token_budget_config(config)
+        self.max_tokens = self.config["max_tokens"]
+        self.count = token_counter(self.config["tokenizer"])
+        self.selected_key_order = list(selected_key_order or [])
+        self.selected_keys = set(self.selected_key_order)
+        self.lower_plans = lower_plans or []  # [(preset name, FilterPlan)]
+
+    # references: the filtered layer records of a shared layer context (the largest materialized record counts)
+    def estimate(self, data, references=None):
+        if references:
+            return max(self.estimate(materialize_layer_record(record, data)) for record in references)
+        return self.count(json.dumps(data, indent=2, ensure_ascii=False))
+
+    # Removes pset keys (in the given order) until the estimate is within the budget, returns the new estimate
+    def _drop_pset_keys(self, data, keys, tokens, trimmed, references=None):
+        for group, key in keys:
+            if tokens <= self.max_tokens:
+                break
+            if key not in group:
+                continue
+            tokens -= self.count(json.dumps({key: group.pop(key)}, indent=2, ensure_ascii=False)) - 1
+            trimmed.append(key)
+        return self.estimate(data, references) if trimmed else tokens
+
+    # Returns the (trimmed) data sheet and the record of what was trimmed (None if the data sheet is within the budget)
+    def trim(self, kind, data, references=None):
+        tokens = self.estimate(data, references)
+        if tokens <= self.max_tokens:
+            return data, None
+
+        record = {"Estimated Tokens": tokens}
+
+        # 1. Pset keys outside of the pset selection (last keys first)
+        groups = _pset_groups(data)
+        unselected = [(group, key) for group in groups for key in reversed(list(group)) if key not in self.selected_keys]
+        trimmed = []
+        tokens = self._drop_pset_keys(data, unselected, tokens, trimmed, references)
+        if trimmed:
+            record["Unselected Pset Keys Removed"] = trimmed
+
+        # 2. Lower filter presets
+        for preset_name, plan in self.lower_plans:
+            if tokens <= self.max_tokens:
+                break
+            reduced = getattr(plan, kind)(data)
+            if reduced is None:
+                break  # The lower preset drops the whole data sheet, keep it at this level
+            data = reduced
+            tokens = self.estimate(data, references)
+            record.setdefault("Reduced to Filter Presets", []).append(preset_name)
+
+        # 3. Selected pset keys, lowest priority (end of pset_selection.py) first
+        groups = _pset_groups(data)
+        selected = [(group, key) for key in reversed(self.selected_key_order) for group in groups]
+        trimmed = []
+        tokens = self._drop_pset_keys(data, selected, tokens, trimmed, references)
+        if trimmed:
+            record["Selected Pset Keys Removed"] = trimmed
+
+        record["Estimated Tokens after Trimming"] = tokens
+        record["Within Budget"] = tokens <= self.max_tokens
+        return data, record
+
+
+# Summary of the trimming records of a run ({filename: record})
+def token_budget_report(config, records):
+    config = token_budget_config(config)
+    return {
+        "Settings": config,
+        "Data Sheets Trimmed": len(records),
+        "Data Sheets above Budget after Trimming": sum(1 for record in records.values() if not record.get("Within Budget", True)),
+        "Estimated Tokens Removed": sum(
+            record["Estimated Tokens"] - record.get("Estimated Tokens after Trimming", 0) for record in records.values()
+        )
+    }
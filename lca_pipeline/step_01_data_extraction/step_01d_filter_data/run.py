@@ -1,10 +1,10 @@
 from pathlib import Path
-from methods.filter import (
-    load_yaml_config, load_json, save_json,
-    filter_element_json, reorder_keys,
-    filter_target_layer_json, reorder_keys_target_layer,
-    decode_unicode, apply_pset_filter, load_selected_keys
-)
+from methods.filter import load_yaml_config, load_json, save_json, load_selected_key_order, load_model_context
+from methods.filter_plan import filter_files
+from methods.token_budget import trim_presets, token_budget_report
+from methods.layer_context import LayerContextLoader, is_layer_record
+from methods.layer_dedup import LayerDeduplicator
+from methods.staging import staged_files
 
 
 
@@ -35,9 +35,20 @@ def filter_data_sheets():
     target_layer_input_dir = Path("data/pipeline/step_01_data_extraction/step_01c_dissect_layers/Target_Layers")
     target_layer_output_dir = Path("data/pipeline/step_01_data_extraction/step_01d_filter_data/Target_Layers")
 
-    # Decode any weird strings (especially in Psets)
-    decode_unicode(str(element_input_dir))
-    decode_unicode(str(target_layer_input_dir))
+    # Shared element contexts of the target layer records (filtered once per multi-layer element)
+    layer_context_input_dir = Path("data/pipeline/step_01_data_extraction/step_01c_dissect_layers/Layer_Contexts")
+    layer_context_output_dir = Path("data/pipeline/step_01_data_extraction/step_01d_filter_data/Layer_Contexts")
+
+    # Metadata of step 01c, extended by the layer deduplication of this step
+    metadata_input_path = Path("data/pipeline/step_01_data_extraction/step_01c_dissect_layers/metadata_step_01c.json")
+    output_folder = Path("data/pipeline/step_01_data_extraction/step_01d_filter_data")
+
+    # Model context sidecar (storeys, spatial hierarchy, units) written by step 01a
+    model_context_path = Path("data/pipeline/step_01_data_extraction/step_01a_extract_all/model_context.json")
+    model_context = load_model_context(model_context_path)
+
+    # Data sheets are written once as UTF-8 without unicode escapes by save_json (see json_io.py)
+    # The inputs are not rewritten in place, as step 01c may have staged them as hard links to upstream files
 
     # Load YAML filters
     config_element = load_yaml_config(yaml_path_element)
@@ -46,46 +57,115 @@ def filter_data_sheets():
     # Get "empty value" boolean from master config
     remove_empty = master_config.get("filter_config", {}).get("remove_empty_values", False)
 
-    # Load optional Pset filter configuration (with selected keys)
+    # Load optional Pset filter configuration (with selected keys, their order sets their priority for the token budget)
     use_pset_filter = master_config.get("filter_config", {}).get("use_pset_filter", False)
     pset_key_file = master_config.get("filter_config", {}).get("pset_key_file", "")
-    selected_keys = set()
-    if use_pset_filter and pset_key_file:
-        selected_keys = load_selected_keys(pset_key_file)
-
-
-    # Process element files
-    for file_path in element_input_dir.glob("*.json"):
+    selected_key_order = []
+    if pset_key_file and (use_pset_filter or Path(pset_key_file).exists()):
+        selected_key_order = load_selected_key_order(pset_key_file)
+    selected_keys = set(selected_key_order) if use_pset_filter else set()
+
+
+    # Token budget per data sheet: data sheets above the budget are reduced to the lower presets (see token_budget.py)
+    filter_config = master_config.get("filter_config", {})
+    token_budget = filter_config.get("token_budget", {})
+    trim_filters = []
+    if token_budget.get("enabled", False):
+        for lower_preset in trim_presets(filter_mode, preset_name):
+            lower_dir = Path(f"config/data_filters/filter_presets/{lower_preset}")
+            trim_filters.append((
+                lower_preset,
+                load_yaml_config(lower_dir / "filter_element.yaml"),
+                load_yaml_config(lower_dir / "filter_target_layer.yaml")
+            ))
+
+    # Compiled filter plans (see filter_plan.py), built once per worker process
+    plan_arguments = {
+        "config_element": config_element,
+        "config_target_layer": config_target_layer,
+        "remove_empty": remove_empty,
+        "model_context": model_context,
+        "selected_keys": selected_keys,
+        "element_key_order": filter_config.get("element_key_order", []),
+        "target_layer_key_order": filter_config.get("target_layer_key_order", []),
+        "building_element_context_key_order": filter_config.get("building_element_context_key_order", []),
+        "token_budget": token_budget,
+        "trim_filters": trim_filters,
+        "selected_key_order": selected_key_order
+    }
+    workers = filter_config.get("workers", 0)
+    tasks = []
+
+    # Element files (resolving the staging manifest of step 01c)
+    for filename, file_path in staged_files(element_input_dir):
+        tasks.append(("element", str(file_path), str(element_output_dir / filename)))
+
+    # Target layer files (layer records only keep the reference to their shared context)
+    # The layer signature for the deduplication is taken from the unfiltered layer (see layer_dedup.py)
+    deduplicator = LayerDeduplicator(filter_config.get("layer_deduplication", {}))
+    unfiltered_contexts = LayerContextLoader(layer_context_input_dir)
+    signatures = {}
+    for file_path in sorted(target_layer_input_dir.glob("*.json")):
         try:
-            data = load_json(file_path)
-            filtered = filter_element_json(data, config_element, remove_empty)
-            if use_pset_filter and selected_keys:
-                filtered = apply_pset_filter(filtered, selected_keys)
-            top_order = master_config.get("filter_config", {}).get("element_key_order", [])
-            if top_order:
-                filtered = reorder_keys(filtered, top_order)
-            save_json(filtered, element_output_dir / file_path.name)
+            signatures[file_path.name] = deduplicator.signature(unfiltered_contexts.materialize(load_json(file_path))) if deduplicator.enabled else None
         except Exception:
-            continue
+            signatures[file_path.name] = None
+        tasks.append(("target_layer", str(file_path), str(target_layer_output_dir / file_path.name)))
 
-    # Process target layer files
-    for file_path in target_layer_input_dir.glob("*.json"):
-        try:
-            data = load_json(file_path)
-            filtered = filter_target_layer_json(data, config_target_layer, remove_empty)
-            if use_pset_filter and selected_keys:
-                filtered = apply_pset_filter(filtered, selected_keys)
-            top_order = master_config.get("filter_config", {}).get("target_layer_key_order", [])
-            nested_order = master_config.get("filter_config", {}).get("building_element_context_key_order", [])
-            if top_order:
-                filtered = reorder_keys_target_layer(filtered, top_order)
-            if "Building Element Context" in filtered and nested_order:
-                filtered["Building Element Context"] = reorder_keys_target_layer(
-                    filtered["Building Element Context"], nested_order
-                )
-            save_json(filtered, target_layer_output_dir / file_path.name)
-        except Exception:
+    # Filter the element and target layer data sheets in parallel
+    written, trimmed = filter_files(tasks, plan_arguments, workers)
+
+    # Target layers with the same layer signature as an earlier written layer are not passed on to the inference,
+    # step 02a fans the result of the representative out to them
+    members = 0
+    for (kind, input_path, output_path), is_written in zip(tasks, written):
+        if kind != "target_layer" or not is_written:
             continue
+        output_path = Path(output_path)
+        if deduplicator.assign(output_path.stem, signatures[output_path.name]):
+            output_path.unlink()
+            trimmed.pop(str(Path(output_path.parent.name) / output_path.name), None)
+            members += 1
+
+    # Shared layer contexts ("Material Layers" take the place of "Other Material Layers" in the key order)
+    # With the token budget, a context is budgeted on the largest of its written layer records after materialization,
+    # as the prompt of the target layer holds both (see token_budget.py)
+    references = {}
+    if token_budget.get("enabled", False):
+        for (kind, input_path, output_path), is_written in zip(tasks, written):
+            if kind != "target_layer" or not is_written or not Path(output_path).exists():
+                continue
+            data = load_json(output_path)
+            if is_layer_record(data):
+                references.setdefault(data["Building Element Context"]["Layer Context"], []).append(data)
+    layer_context_output_dir.mkdir(parents=True, exist_ok=True)
+    context_tasks = [
+        ("layer_context", str(file_path), str(layer_context_output_dir / file_path.name), references.get(file_path.name))
+        for file_path in layer_context_input_dir.glob("*.json")
+    ]
+    context_written, context_trimmed = filter_files(context_tasks, plan_arguments, workers)
+    trimmed.update(context_trimmed)
+    print(f"Filtered {sum(written) - members + sum(context_written)} data sheets.")
+
+    # Record what the token budget trimmed
+    budget_report = None
+    if token_budget.get("enabled", False):
+        budget_report = token_budget_report(token_budget, trimmed)
+        save_json({**budget_report, "Trimmed Data Sheets": trimmed}, output_folder / "token_budget_report.json", "report")
+        print(f"Token budget: {len(trimmed)} data sheets trimmed, {budget_report['Data Sheets above Budget after Trimming']} still above the budget.")
+
+    # Save the layer groups and the dedup ratio (the required inferences shrink by the deduplicated layers)
+    deduplicator.save(output_folder)
+    dedup_report = deduplicator.report()
+    if metadata_input_path.exists():
+        metadata = load_json(metadata_input_path)
+        module_01 = metadata.setdefault("Module 01: Data Extraction", {})
+        module_01["Module 01d: Filter Data"] = {"Layer Deduplication": dedup_report}
+        if budget_report is not None:
+            module_01["Module 01d: Filter Data"]["Token Budget"] = budget_report
+        if "Required Inferences" in module_01:
+            module_01["Required Inferences"] -= dedup_report["Target Layers Reusing a Representative"]
+        save_json(metadata, output_folder / "metadata_step_01d.json", "report")
 
 if __name__ == "__main__":
     filter_data_sheets()
\ No newline at end of file
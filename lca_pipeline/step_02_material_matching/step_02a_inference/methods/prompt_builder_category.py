@@ -1,11 +1,12 @@
 import json
 from methods.prompt_components_category import category_prompt_components, category_prompt_components_ger
+from methods.utils import resolve_model_context, resolve_layer_context
 
 # Build dynamic prompt
 def build_category_prompt(bim_element, category_entries, mode, config):
 
     # Load the inputs of the current element as strings
-    ifc_string = json.dumps(bim_element, indent=2, ensure_ascii=False)
+    ifc_string = json.dumps(resolve_model_context(resolve_layer_context(bim_element)), indent=2, ensure_ascii=False)
 
     # Corresponding material entries list
     categories_string = json.dumps(category_entries, indent=2, ensure_ascii=False)
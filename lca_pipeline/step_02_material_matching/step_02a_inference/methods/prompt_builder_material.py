@@ -1,11 +1,12 @@
 import json
 from methods.prompt_components_material import material_prompt_components, material_prompt_components_ger
+from methods.utils import resolve_model_context, resolve_layer_context
 
 # Build dynamic prompt
 def build_material_prompt(bim_element, material_entries, mode, category, config):
 
     # Load the inputs of the current element as strings
-    ifc_string = json.dumps(bim_element, indent=2, ensure_ascii=False)
+    ifc_string = json.dumps(resolve_model_context(resolve_layer_context(bim_element)), indent=2, ensure_ascii=False)
 
     # Corresponding material entries list
     materials_string = json.dumps(material_entries, indent=2, ensure_ascii=False)
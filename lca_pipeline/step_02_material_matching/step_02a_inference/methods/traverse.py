@@ -1,8 +1,7 @@
 import copy
 import os
-import json
 import time
-from methods.utils import load_json
+from methods.utils import load_json, save_json
 from methods.llm_interface import category_inference, material_inference
 
 def traverse_lci_hierarchy(bim_element, current_dir, lci_base_dir, results_dir, mode, config, step=1, path_trace=None):
@@ -71,8 +70,7 @@ def traverse_lci_hierarchy(bim_element, current_dir, lci_base_dir, results_dir,
         }
 
         result_path = os.path.join(results_dir, f"step_{step}_category.json")
-        with open(result_path, "w", encoding="utf-8") as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
+        save_json(result, result_path)
 
         if not category_name:
             return result
@@ -150,8 +148,7 @@ def traverse_lci_hierarchy(bim_element, current_dir, lci_base_dir, results_dir,
         }
 
         result_path = os.path.join(results_dir, f"step_{step}_material_match.json")
-        with open(result_path, "w", encoding="utf-8") as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
+        save_json(result, result_path)
 
         return result
 
@@ -172,7 +169,6 @@ def traverse_lci_hierarchy(bim_element, current_dir, lci_base_dir, results_dir,
         }
 
         result_path = os.path.join(results_dir, f"step_{step}_no_match.json")
-        with open(result_path, "w", encoding="utf-8") as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
+        save_json(result, result_path)
 
         return result
\ No newline at end of file
@@ -1,19 +1,87 @@
 # utils.py
-import json
 import os
 import yaml
+from methods.layer_context import LayerContextLoader
+from methods.json_io import read_json, write_json
 
 def load_yaml_config(path):
     with open(path, "r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
 def load_json(path):
-    with open(path, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def save_json(data, path):
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    return read_json(path)
+
+# Inference results are data sheets (see json_io.py)
+def save_json(data, path, artifact="data_sheet"):
+    write_json(data, path, artifact)
+
+# Model context sidecar written by step 01a (storeys, spatial hierarchy, units)
+MODEL_CONTEXT_PATH = "data/pipeline/step_01_data_extraction/step_01a_extract_all/model_context.json"
+_model_context = None
+
+def load_model_context(path=MODEL_CONTEXT_PATH):
+    global _model_context
+    if _model_context is None:
+        _model_context = load_json(path) if os.path.exists(path) else {}
+    return _model_context
+
+# Replaces model context references ({"Model Context": <key>}) left in a data sheet by the referenced data
+# (normally already done by the filter in step 01d)
+def resolve_model_context(data, model_context=None):
+    if isinstance(data, dict):
+        if len(data) == 1 and "Model Context" in data:
+            if model_context is None:
+                model_context = load_model_context()
+            return model_context.get(data["Model Context"], data)
+        return {k: resolve_model_context(v, model_context) for k, v in data.items()}
+    elif isinstance(data, list):
+        return [resolve_model_context(item, model_context) for item in data]
+    else:
+        return data
+
+# Shared element contexts of the target layer records (filtered by step 01d, see layer_context.py)
+LAYER_CONTEXT_DIRECTORY = "data/pipeline/step_01_data_extraction/step_01d_filter_data/Layer_Contexts"
+_layer_contexts = None
+
+# Materializes the shared element context of a target layer record (other data is returned unchanged)
+def resolve_layer_context(data):
+    global _layer_contexts
+    if _layer_contexts is None:
+        _layer_contexts = LayerContextLoader(LAYER_CONTEXT_DIRECTORY)
+    return _layer_contexts.materialize(data)
+
+# Layer groups of the target layer deduplication in step 01d ({"<representative>": {"Members": [...]}})
+LAYER_DEDUP_OVERVIEW_PATH = "data/pipeline/step_01_data_extraction/step_01d_filter_data/layer_dedup_overview.json"
+
+# Copies the inference steps of each representative target layer to the members of its group
+# The copies keep the LLM response, but carry no token usage or processing time (nothing was inferred for them),
+# and "deduplicated_from" names the representative, such that step 02b does not count the costs twice
+def fan_out_layer_inferences(output_dir, overview_path=LAYER_DEDUP_OVERVIEW_PATH):
+    if not os.path.exists(overview_path):
+        return 0
+    fanned_out = 0
+    for representative, group in load_json(overview_path).items():
+        representative_dir = os.path.join(output_dir, representative)
+        if not os.path.isdir(representative_dir):
+            continue
+        step_files = sorted(f for f in os.listdir(representative_dir) if f.startswith("step_") and f.endswith(".json"))
+        for member in group.get("Members", []):
+            member_dir = os.path.join(output_dir, member)
+            os.makedirs(member_dir, exist_ok=True)
+            for filename in os.listdir(member_dir):
+                if filename.startswith("step_") and filename.endswith(".json"):
+                    os.remove(os.path.join(member_dir, filename))
+            for filename in step_files:
+                result = load_json(os.path.join(representative_dir, filename))
+                metadata = result.get("llm_metadata", {})
+                metadata["token_usage"] = {key: 0 for key in metadata.get("token_usage", {})}
+                metadata["processing_time"] = 0.0
+                if "inference_cost_usd" in metadata:
+                    metadata["inference_cost_usd"] = 0.0
+                metadata["deduplicated_from"] = representative
+                save_json(result, os.path.join(member_dir, filename))
+            fanned_out += 1
+    return fanned_out
 
 def load_json_files_from_directory(dir_path):
     files = [f for f in os.listdir(dir_path) if f.endswith(".json")]
@@ -33,8 +101,7 @@ def create_inference_folders(input_dir, output_dir):
 
 # Extracts a simplified, Pythonic list of material categories
 def simplify_category_list(category_index_path):
-    with open(category_index_path, 'r', encoding='utf-8') as f:
-        db_index = json.load(f)
+    db_index = read_json(category_index_path)
     
     # Extract just the names into a list of strings
     category_names = [item["name"] for item in db_index.get("items", [])]
@@ -45,8 +112,7 @@ def simplify_category_list(category_index_path):
     # Save as JSON object with a key
     base_dir = os.path.dirname(category_index_path)
     output_path = os.path.join(base_dir, "llm_categories.json")
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump({"categories": category_names}, f, indent=2, ensure_ascii=False)
+    write_json({"categories": category_names}, output_path)
 
     return category_names
 
@@ -65,8 +131,7 @@ def simplify_material_lists(base_dir):
         output_path = os.path.join(root, "llm_materials.json")
 
         try:
-            with open(index_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = read_json(index_path)
         except Exception:
             continue
 
@@ -78,8 +143,7 @@ def simplify_material_lists(base_dir):
         material_names = material_names[:40] # Limit to 40 such that token limit not exceeded
 
         try:
-            with open(output_path, 'w', encoding='utf-8') as out_f:
-                json.dump({"material_options": material_names}, out_f, indent=2, ensure_ascii=False)
+            write_json({"material_options": material_names}, output_path)
             processed_paths.append(root)
         except Exception:
             pass
@@ -101,8 +165,7 @@ def simplify_material_lists_density(base_dir):
         index_path = os.path.join(root, "index.json")
         llm_output_path = os.path.join(root, "llm_materials.json")
         try:
-            with open(index_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = read_json(index_path)
         except Exception:
             continue
         material_entries = []
@@ -123,8 +186,7 @@ def simplify_material_lists_density(base_dir):
         material_entries = material_entries[:30] # Limit to 30 such that token limit not exceeded, less than without density (since more tokens)
         llm_data = {"Material Options": material_entries}
         try:
-            with open(llm_output_path, 'w', encoding='utf-8') as out_f:
-                json.dump(llm_data, out_f, indent=2, ensure_ascii=False)
+            write_json(llm_data, llm_output_path)
             processed_paths.append(root)
         except Exception:
             pass
@@ -142,8 +204,7 @@ def simplify_lci_lists_oekobaudat(base_dir, include_density=False):
 
         index_path = os.path.join(root, "index.json")
         try:
-            with open(index_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = read_json(index_path)
         except Exception:
             continue
 
@@ -173,16 +234,14 @@ def simplify_lci_lists_oekobaudat(base_dir, include_density=False):
 
             llm_data = {"Material Options": material_entries[:MAX_MATERIALS]}
             output_path = os.path.join(root, "llm_materials.json")
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(llm_data, f, indent=2, ensure_ascii=False)
+            write_json(llm_data, output_path)
             processed_paths.append(output_path)
 
         elif index_type in ("categories", "mixed"):
             category_entries = [item["name"] for item in items if "name" in item]
             llm_data = {"Material Categories": category_entries}
             output_path = os.path.join(root, "llm_categories.json")
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(llm_data, f, indent=2, ensure_ascii=False)
+            write_json(llm_data, output_path)
             processed_paths.append(output_path)
 
     return processed_paths
@@ -1,8 +1,7 @@
 # runner.py
 import os
-import json
 from pathlib import Path
-from methods.utils import create_inference_folders, load_yaml_config, simplify_category_list, simplify_material_lists, simplify_material_lists_density, simplify_lci_lists_oekobaudat
+from methods.utils import create_inference_folders, fan_out_layer_inferences, load_json, load_yaml_config, simplify_category_list, simplify_material_lists, simplify_material_lists_density, simplify_lci_lists_oekobaudat
 from methods.traverse import traverse_lci_hierarchy
 
 def match_bim_files(input_dir, output_dir, lci_base_dir, mode_label, config):
@@ -13,8 +12,7 @@ def match_bim_files(input_dir, output_dir, lci_base_dir, mode_label, config):
         element_path = os.path.join(input_dir, filename)
         results_dir = os.path.join(output_dir, element_id)
         os.makedirs(results_dir, exist_ok=True)
-        with open(element_path, "r", encoding="utf-8") as f:
-            bim_element = json.load(f)
+        bim_element = load_json(element_path)
         print(f"> Processing {mode_label.upper()} → {element_id}")
         result = traverse_lci_hierarchy(
             bim_element=bim_element,
@@ -84,5 +82,10 @@ def material_matcher():
         config = master_config
     )
 
+    # Copy the results of deduplicated target layers (step 01d) to the other layers of their group
+    fanned_out = fan_out_layer_inferences(inference_target_layers_folders)
+    if fanned_out:
+        print(f"> Reused the inference of a representative layer for {fanned_out} target layers")
+
 if __name__ == "__main__":
     material_matcher()
@@ -1,6 +1,6 @@
-import json
 from pathlib import Path
 from .costs import get_token_cost
+from .json_io import read_json, write_json
 
 def summarize_inferences(base_dir, output_dir, config):
     base_dir = Path(base_dir)
@@ -28,8 +28,7 @@ def summarize_inferences(base_dir, output_dir, config):
             if not file.name.endswith(".json") or file.name.startswith("summary"):
                 continue
 
-            with open(file, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = read_json(file)
 
             meta = data.get("llm_metadata", {})
             llm_response = data.get("llm_response", {})
@@ -58,6 +57,10 @@ def summarize_inferences(base_dir, output_dir, config):
                 (completion_tokens / 1000) * cost_rates["completion"]
             )
 
+            # Steps copied from the representative of a deduplicated target layer (step 02a)
+            if meta.get("deduplicated_from"):
+                summary["deduplicated_from"] = meta["deduplicated_from"]
+
             summary["total_steps"] += 1
             summary["total_tokens"] += total_tokens
             summary["total_prompt_tokens"] += prompt_tokens
@@ -85,5 +88,4 @@ def summarize_inferences(base_dir, output_dir, config):
             })
 
         summary_path = output_dir / f"{summary['name']}_inference.json"
-        with open(summary_path, "w", encoding="utf-8") as f:
-            json.dump(summary, f, ensure_ascii=False, indent=2)
+        write_json(summary, summary_path)
@@ -1,6 +1,7 @@
 import json
 from pathlib import Path
 from .utils import load_yaml_config
+from .json_io import read_json, write_json
 
 def update_metadata(metadata_input_path, directories_to_scan, metadata_output_path, config):
     keys_to_sum = [
@@ -18,39 +19,42 @@ def update_metadata(metadata_input_path, directories_to_scan, metadata_output_pa
     material_negative_matches = 0
     total_material_matches = 0
     successful_material_matches_count = 0
+    deduplicated_count = 0
 
     for directory in directories_to_scan:
         dir_path = Path(directory)
         for file in dir_path.glob("*.json"):
-            with open(file, "r", encoding="utf-8") as f:
-                try:
-                    data = json.load(f)
-
-                    # Sum metrics
-                    for key in keys_to_sum:
-                        totals[key] += data.get(key, 0)
-
-                    for step in data.get("inference_steps", []):
-                        matched_type = step.get("matched_type", "").lower()
-                        message = step.get("message", "").lower()
-
-                        if matched_type == "category":
-                            category_count += 1
-                            if message == "no match found":
-                                category_negative_matches += 1
-
-                        elif matched_type == "material":
-                            material_count += 1
-                            if message == "no match found":
-                                material_negative_matches += 1
-                            else:
-                                matched_names = step.get("matched_name", [])
-                                if isinstance(matched_names, list) and matched_names:
-                                    total_material_matches += len(matched_names)
-                                    successful_material_matches_count += 1
-
-                except json.JSONDecodeError:
-                    print(f"Warning: Skipping invalid JSON file: {file}")
+            try:
+                data = read_json(file)
+
+                if data.get("deduplicated_from"):
+                    deduplicated_count += 1
+
+                # Sum metrics
+                for key in keys_to_sum:
+                    totals[key] += data.get(key, 0)
+
+                for step in data.get("inference_steps", []):
+                    matched_type = step.get("matched_type", "").lower()
+                    message = step.get("message", "").lower()
+
+                    if matched_type == "category":
+                        category_count += 1
+                        if message == "no match found":
+                            category_negative_matches += 1
+
+                    elif matched_type == "material":
+                        material_count += 1
+                        if message == "no match found":
+                            material_negative_matches += 1
+                        else:
+                            matched_names = step.get("matched_name", [])
+                            if isinstance(matched_names, list) and matched_names:
+                                total_material_matches += len(matched_names)
+                                successful_material_matches_count += 1
+
+            except json.JSONDecodeError:
+                print(f"Warning: Skipping invalid JSON file: {file}")
 
     # Round totals
     for key in totals:
@@ -64,8 +68,7 @@ def update_metadata(metadata_input_path, directories_to_scan, metadata_output_pa
         avg_matched_materials = 0.0
 
     # Load preexisting metadata
-    with open(metadata_input_path, "r", encoding="utf-8") as f:
-        existing_data = json.load(f)
+    existing_data = read_json(metadata_input_path)
 
     # Load YAML config and extract prompt settings
     category_settings = config.get("category_prompt_variables", {})
@@ -92,6 +95,7 @@ def update_metadata(metadata_input_path, directories_to_scan, metadata_output_pa
         "Material Inference Counts": material_count,
         "Material Negative Matches": material_negative_matches,
         "Average Number of Matched Material Entries per Success": avg_matched_materials,
+        "Inferences Reused from Deduplicated Target Layers": deduplicated_count,
         "Category Prompt Settings": category_settings,
         "Material Prompt Settings": material_settings
     }
@@ -102,5 +106,4 @@ def update_metadata(metadata_input_path, directories_to_scan, metadata_output_pa
     metadata_output_path.mkdir(parents=True, exist_ok=True)
     output_file = metadata_output_path / "metadata_step_02b.json"
 
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(existing_data, f, ensure_ascii=False, indent=2)
+    write_json(existing_data, output_file, "report")
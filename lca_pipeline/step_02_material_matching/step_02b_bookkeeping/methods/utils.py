@@ -1,6 +1,7 @@
 import os
-import json
 import yaml
+from .staging import staged_files
+from .json_io import read_json, write_json
 
 def load_yaml_config(path):
     with open(path, "r", encoding="utf-8") as f:
@@ -26,21 +27,22 @@ def recursive_finder(data, target_keys):
 
 
 # Find GlobalId or GroupId and append to inference files
+# Source files may be staged by step 01c (hard link or staging manifest entry, see staging.py)
 def append_id(inference_root, source_root):
+    source_files = dict(staged_files(source_root))
     for filename in os.listdir(inference_root):
         if not filename.endswith("_inference.json"):
             continue
 
         # Derive the base element name (remove "_inference.json")
         element_name = filename.replace("_inference.json", "")
-        source_file_path = os.path.join(source_root, f"{element_name}.json")
+        source_file_path = source_files.get(f"{element_name}.json")
 
-        if not os.path.exists(source_file_path):
+        if source_file_path is None:
             continue
 
         # Load source data to extract the ID
-        with open(source_file_path, "r", encoding="utf-8") as f:
-            source_data = json.load(f)
+        source_data = read_json(source_file_path)
 
         result = recursive_finder(source_data, ["CompilationGroupID", "GlobalId"])
         if not result:
@@ -50,13 +52,11 @@ def append_id(inference_root, source_root):
 
         # Load the inference file
         inference_file_path = os.path.join(inference_root, filename)
-        with open(inference_file_path, "r", encoding="utf-8") as f:
-            inference_data = json.load(f)
+        inference_data = read_json(inference_file_path)
 
         # Append the ID
         updated_data = {id_key: id_value}
         updated_data.update(inference_data)
 
         # Save back to the same file
-        with open(inference_file_path, "w", encoding="utf-8") as f:
-            json.dump(updated_data, f, ensure_ascii=False, indent=2)
\ No newline at end of file
+        write_json(updated_data, inference_file_path)
\ No newline at end of file
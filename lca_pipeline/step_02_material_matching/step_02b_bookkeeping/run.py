@@ -7,8 +7,10 @@ from pathlib import Path
 source_root_elements = Path("data/pipeline/step_01_data_extraction/step_01c_dissect_layers/Elements")
 source_root_target_layers = Path("data/pipeline/step_01_data_extraction/step_01c_dissect_layers/Target_Layers")
 
-# Metadata file path
-metadata_file_path = Path("data/pipeline/step_01_data_extraction/step_01c_dissect_layers/metadata_step_01c.json")
+# Metadata file path (step 01d extends the metadata of step 01c with the layer deduplication)
+metadata_file_path = Path("data/pipeline/step_01_data_extraction/step_01d_filter_data/metadata_step_01d.json")
+if not metadata_file_path.exists():
+    metadata_file_path = Path("data/pipeline/step_01_data_extraction/step_01c_dissect_layers/metadata_step_01c.json")
 
 # Master config path
 master_config_path = Path("config/master_config.yaml")
@@ -2,6 +2,7 @@ import json
 import csv
 from pathlib import Path
 from collections import OrderedDict
+from .json_io import read_json, write_json
 
 def append_quantities(json_dirs, boq_path, database):
     # Load CSV data into a dictionary keyed by ID
@@ -21,12 +22,11 @@ def append_quantities(json_dirs, boq_path, database):
     for json_dir in json_dirs:
         json_dir = Path(json_dir)
         for file in json_dir.glob("*.json"):
-            with open(file, "r", encoding="utf-8") as f:
-                try:
-                    data = json.load(f, object_pairs_hook=OrderedDict)
-                except json.JSONDecodeError:
-                    print(f"Skipping invalid JSON: {file}")
-                    continue
+            try:
+                data = read_json(file)
+            except json.JSONDecodeError:
+                print(f"Skipping invalid JSON: {file}")
+                continue
 
             # Determine the ID key
             json_id = data.get("CompilationGroupID") or data.get("GlobalId")
@@ -55,8 +55,7 @@ def append_quantities(json_dirs, boq_path, database):
                 new_data[key] = value
 
             # Write updated JSON back to file
-            with open(file, "w", encoding="utf-8") as f:
-                json.dump(new_data, f, indent=2, ensure_ascii=False)
+            write_json(new_data, file)
 
 def try_cast_number(value):
     """Attempt to cast a string to float, fallback to original."""
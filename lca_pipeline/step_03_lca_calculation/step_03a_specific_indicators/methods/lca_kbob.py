@@ -1,5 +1,6 @@
 import json
 from pathlib import Path
+from .json_io import read_json, write_json
 
 def extract_kbob_data(input_dirs, output_base_dir, selected_keys=None):
     if selected_keys is None:
@@ -32,12 +33,11 @@ def extract_kbob_data(input_dirs, output_base_dir, selected_keys=None):
         output_dir.mkdir(parents=True, exist_ok=True)
 
         for file_path in input_dir.glob("*.json"):
-            with open(file_path, "r", encoding="utf-8") as f:
-                try:
-                    data = json.load(f)
-                except json.JSONDecodeError:
-                    print(f"Skipping invalid JSON: {file_path}")
-                    continue
+            try:
+                data = read_json(file_path)
+            except json.JSONDecodeError:
+                print(f"Skipping invalid JSON: {file_path}")
+                continue
 
             # Get identifier and name
             identifier_key = "CompilationGroupID" if "CompilationGroupID" in data else "GlobalId"
@@ -60,8 +60,7 @@ def extract_kbob_data(input_dirs, output_base_dir, selected_keys=None):
 
             if not material_steps:
                 output_json["Matched Materials with KBOB Indicators"].append({"Name": "None"})
-                with open(output_file, "w", encoding="utf-8") as out_f:
-                    json.dump(output_json, out_f, ensure_ascii=False, indent=2)
+                write_json(output_json, output_file)
                 continue
 
             last_material_step = material_steps[-1]
@@ -75,19 +74,16 @@ def extract_kbob_data(input_dirs, output_base_dir, selected_keys=None):
             if not index_path.exists():
                 print(f"Missing index.json at: {index_path}")
                 output_json["Matched Materials with KBOB Indicators"].append({"Name": "None"})
-                with open(output_file, "w", encoding="utf-8") as out_f:
-                    json.dump(output_json, out_f, ensure_ascii=False, indent=2)
+                write_json(output_json, output_file)
                 continue
 
             try:
-                with open(index_path, "r", encoding="utf-8") as idx_file:
-                    index_data = json.load(idx_file)
-                    items = index_data.get("items", [])
+                index_data = read_json(index_path)
+                items = index_data.get("items", [])
             except json.JSONDecodeError:
                 print(f"Invalid index.json: {index_path}")
                 output_json["Matched Materials with KBOB Indicators"].append({"Name": "None"})
-                with open(output_file, "w", encoding="utf-8") as out_f:
-                    json.dump(output_json, out_f, ensure_ascii=False, indent=2)
+                write_json(output_json, output_file)
                 continue
 
             enriched_materials = []
@@ -104,5 +100,4 @@ def extract_kbob_data(input_dirs, output_base_dir, selected_keys=None):
 
             output_json["Matched Materials with KBOB Indicators"] = enriched_materials
 
-            with open(output_file, "w", encoding="utf-8") as out_f:
-                json.dump(output_json, out_f, ensure_ascii=False, indent=2)
\ No newline at end of file
+            write_json(output_json, output_file)
\ No newline at end of file
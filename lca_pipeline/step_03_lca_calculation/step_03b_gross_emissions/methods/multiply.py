@@ -1,7 +1,7 @@
-import json
 from pathlib import Path
 from collections import OrderedDict
 import csv
+from .json_io import read_json, write_json
 
 # Emission keys for KBOB
 ENV_KEYS_KBOB = [
@@ -72,8 +72,7 @@ def process_material(material, volume, area, keys, is_oekobaudat=False):
 
 
 def process_file(input_path, output_path, quantity_lookup):
-    with open(input_path, 'r', encoding='utf-8-sig') as f:
-        data = json.load(f)
+    data = read_json(input_path)
 
     id_ = data.get("GlobalId") or data.get("CompilationGroupID")
     volume = area = 1
@@ -119,8 +118,7 @@ def process_file(input_path, output_path, quantity_lookup):
     new_data[new_key] = processed
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, 'w', encoding='utf-8-sig') as f:
-        json.dump(new_data, f, indent=2, ensure_ascii=False)
+    write_json(new_data, output_path)
 
 def load_quantity_lookup(boq_csv_path):
     lookup = {}
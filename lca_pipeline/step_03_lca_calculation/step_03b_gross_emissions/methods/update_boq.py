@@ -1,6 +1,7 @@
 import csv
 import json
 from pathlib import Path
+from .json_io import read_json
 
 def append_emissions_to_csv(csv_path, json_dir, output_csv_path, config_database):
     """
@@ -55,11 +56,10 @@ def append_emissions_to_csv(csv_path, json_dir, output_csv_path, config_database
 
         matching_file = None
         for json_file in json_dir.rglob("*.json"):
-            with open(json_file, encoding="utf-8-sig") as jf:
-                try:
-                    data = json.load(jf)
-                except json.JSONDecodeError:
-                    continue
+            try:
+                data = read_json(json_file)
+            except json.JSONDecodeError:
+                continue
 
             if data.get("GlobalId") == match_id or data.get("CompilationGroupID") == match_id:
                 matching_file = data
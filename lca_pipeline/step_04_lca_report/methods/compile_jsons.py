@@ -3,6 +3,7 @@ import shutil
 from pathlib import Path
 from collections import defaultdict, OrderedDict
 import re
+from .json_io import read_json, write_json
 
 
 def compile_elements(input_dir, output_dir):
@@ -11,12 +12,11 @@ def compile_elements(input_dir, output_dir):
     output_dir.mkdir(parents=True, exist_ok=True)
 
     for json_file in input_dir.rglob("*.json"):
-        with open(json_file, encoding="utf-8-sig") as f:
-            try:
-                data = json.load(f)
-            except json.JSONDecodeError:
-                print(f"Skipping invalid JSON: {json_file}")
-                continue
+        try:
+            data = read_json(json_file)
+        except json.JSONDecodeError:
+            print(f"Skipping invalid JSON: {json_file}")
+            continue
 
         # === Strip _indicators or _emissions from filename ===
         original_name = json_file.stem
@@ -37,8 +37,7 @@ def compile_elements(input_dir, output_dir):
             for k, v in data.items():
                 ordered[k] = v
 
-            with open(output_path, "w", encoding="utf-8-sig") as outf:
-                json.dump(ordered, outf, indent=2, ensure_ascii=False)
+            write_json(ordered, output_path)
 
         elif "CompilationGroupID" in data:
             # Rename "Name" to "ObjectType Name"
@@ -52,8 +51,7 @@ def compile_elements(input_dir, output_dir):
             for k, v in data.items():
                 ordered[k] = v
 
-            with open(output_path, "w", encoding="utf-8-sig") as outf:
-                json.dump(ordered, outf, indent=2, ensure_ascii=False)
+            write_json(ordered, output_path)
 
         else:
             continue
@@ -85,12 +83,11 @@ def compile_target_layers(input_dir, output_dir):
         files.sort()
 
         for layer_num, file_path in files:
-            with open(file_path, encoding="utf-8-sig") as f:
-                try:
-                    data = json.load(f)
-                except json.JSONDecodeError:
-                    print(f"Skipping invalid JSON: {file_path}")
-                    continue
+            try:
+                data = read_json(file_path)
+            except json.JSONDecodeError:
+                print(f"Skipping invalid JSON: {file_path}")
+                continue
 
             # Set top-level name & ID (stripped of _L{n})
             if not combined:
@@ -117,5 +114,4 @@ def compile_target_layers(input_dir, output_dir):
 
         # Step 3: Write to new JSON file
         output_file = output_dir / f"{base_name}.json"
-        with open(output_file, "w", encoding="utf-8-sig") as out_f:
-            json.dump(combined, out_f, indent=2, ensure_ascii=False)
+        write_json(combined, output_file)
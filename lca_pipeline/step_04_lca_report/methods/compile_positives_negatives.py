@@ -1,6 +1,7 @@
 import json
 import re
 from pathlib import Path
+from .json_io import read_json, write_json
 
 def collect_match_status(parent_dir, output_dir):
     parent_dir = Path(parent_dir)
@@ -24,12 +25,11 @@ def collect_match_status(parent_dir, output_dir):
             continue
 
         for json_file in current_dir.rglob("*.json"):
-            with open(json_file, encoding="utf-8-sig") as f:
-                try:
-                    data = json.load(f)
-                except json.JSONDecodeError:
-                    print(f"Skipping invalid JSON: {json_file}")
-                    continue
+            try:
+                data = read_json(json_file)
+            except json.JSONDecodeError:
+                print(f"Skipping invalid JSON: {json_file}")
+                continue
 
             # Check for material match key
             matched_data = None
@@ -70,8 +70,6 @@ def collect_match_status(parent_dir, output_dir):
             d[key] = sorted(set(d[key]))
 
     # Write both JSON files
-    with open(output_dir / "inference_negatives.json", "w", encoding="utf-8-sig") as nf:
-        json.dump(negatives, nf, indent=2, ensure_ascii=False)
+    write_json(negatives, output_dir / "inference_negatives.json", "report")
 
-    with open(output_dir / "inference_positives.json", "w", encoding="utf-8-sig") as pf:
-        json.dump(positives, pf, indent=2, ensure_ascii=False)
+    write_json(positives, output_dir / "inference_positives.json", "report")
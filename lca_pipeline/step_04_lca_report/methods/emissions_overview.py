@@ -1,6 +1,6 @@
 import pandas as pd
-import json
 from pathlib import Path
+from .json_io import write_json
 
 def generate_emission_totals(csv_file, database_config, output_path):
     # Define indicator sets
@@ -68,5 +68,4 @@ def generate_emission_totals(csv_file, database_config, output_path):
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(totals, f, ensure_ascii=False, indent=2)
+    write_json(totals, output_path, "report")
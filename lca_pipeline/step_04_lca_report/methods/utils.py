@@ -4,6 +4,7 @@ from pathlib import Path
 from datetime import datetime
 import json
 import shutil
+from .json_io import read_json, write_json
 
 def copy_metadata_to_report(config_database: str, metadata_output_dir: Path):
     # Determine the source metadata path
@@ -15,12 +16,11 @@ def copy_metadata_to_report(config_database: str, metadata_output_dir: Path):
         return
 
     # Read and load the original JSON
-    with open(metadata_input_path, "r", encoding="utf-8-sig") as f:
-        try:
-            data = json.load(f)
-        except json.JSONDecodeError:
-            print(f"Invalid JSON format in: {metadata_input_path}")
-            return
+    try:
+        data = read_json(metadata_input_path)
+    except json.JSONDecodeError:
+        print(f"Invalid JSON format in: {metadata_input_path}")
+        return
 
     # Add timestamp fields at the top
     now = datetime.now()
@@ -35,8 +35,7 @@ def copy_metadata_to_report(config_database: str, metadata_output_dir: Path):
     metadata_output_dir.mkdir(parents=True, exist_ok=True)
 
     # Save to new location
-    with open(output_file_path, "w", encoding="utf-8-sig") as out_f:
-        json.dump(annotated_data, out_f, indent=2, ensure_ascii=False)
+    write_json(annotated_data, output_file_path, "report")
 
 
 def copy_boq_to_report(boq_source: Path, report_dir: Path):
@@ -4,6 +4,7 @@ import subprocess
 MODULES = [
     {"key": "p1", "name": "     Preview Category Inference Prompt", "path": "lca_pipeline/step_02_material_matching/step_02a_inference/preview_category_prompt.py", "main": False},
     {"key": "p2", "name": "     Preview Material Inference Prompt", "path": "lca_pipeline/step_02_material_matching/step_02a_inference/preview_material_prompt.py", "main": False},
+    {"key": "bq", "name": "     Rebuild BoQ of Submodule 01a from the JSON data sheets", "path": "lca_pipeline/step_01_data_extraction/step_01a_extract_all/rebuild_boq.py", "main": False},
     {"key": "01", "name": "     MODULE 01 → Data Extraction", "main": True},
     {"key": "01a", "name": "    Submodule 01a → Extract All Data from IFC model", "path": "lca_pipeline/step_01_data_extraction/step_01a_extract_all/run.py", "main": False},
     {"key": "01b", "name": "    Submodule 01b → Aggregate Data", "path": "lca_pipeline/step_01_data_extraction/step_01b_aggregate_elements/run.py", "main": False},
@@ -37,7 +38,7 @@ def pipeline_menu():
         for i, mod in enumerate(MODULES):
             print(f"  {mod['key'].upper()}. {mod['name']}")
 
-            if mod["key"].lower() == "p2":
+            if mod["key"].lower() == "bq":
                 print("")
             
             if mod["key"].lower() == "01d":